@@ -6,7 +6,7 @@ import logging
 import re
 from dataclasses import dataclass
 from itertools import chain
-from typing import List, Set
+from typing import Dict, List, Set
 from urllib.parse import quote_plus
 
 from pymongo import MongoClient
@@ -31,7 +31,7 @@ LIBAPI = 0
 
 # Increment this PATCH version before using `charmcraft publish-lib` or reset
 # to 0 if you are raising the major API version
-LIBPATCH = 2
+LIBPATCH = 6
 
 ADMIN_AUTH_SOURCE = "authSource=admin"
 SYSTEM_DBS = ("admin", "local", "config")
@@ -265,6 +265,32 @@ class MongoConnection:
         """Drop user."""
         self.client.admin.command("dropUser", username)
 
+    def rotate_certificates(self) -> None:
+        """Reloads the TLS certificates and CA files of the server without restarting it."""
+        self.client.admin.command("rotateCertificates")
+
+    def set_parameters(self, parameters: Dict) -> None:
+        """Sets server parameters on the running process."""
+        self.client.admin.command({"setParameter": 1, **parameters})
+
+    def set_default_rw_concern(self, defaults: Dict) -> None:
+        """Sets the cluster-wide default read and write concerns."""
+        self.client.admin.command({"setDefaultRWConcern": 1, **defaults})
+
+    def get_default_rw_concern(self) -> Dict:
+        """Returns the cluster-wide default read and write concerns in effect."""
+        defaults = self.client.admin.command("getDefaultRWConcern")
+        return {
+            key: defaults[key]
+            for key in ["defaultReadConcern", "defaultWriteConcern"]
+            if key in defaults
+        }
+
+    def create_indexes(self, namespace: str, indexes: List[Dict]) -> None:
+        """Builds the indexes of a collection, in a single pass over its documents."""
+        database, _, collection = namespace.partition(".")
+        self.client[database].command("createIndexes", collection, indexes=indexes)
+
     def get_users(self) -> Set[str]:
         """Add a new member to replica set config inside MongoDB."""
         users_info = self.client.admin.command("usersInfo")
@@ -4,14 +4,19 @@
 # See LICENSE file for licensing details.
 import json
 import logging
-from typing import Optional, Tuple
+from typing import Dict, Iterable, Optional, Tuple
 
 from charms.mongodb.v1.mongodb import MongoConfiguration, MongoDBConnection
 from data_platform_helpers.version_check import NoVersionError, get_charm_revision
 from ops.charm import CharmBase
 from ops.framework import Object
 from ops.model import ActiveStatus, BlockedStatus, StatusBase, WaitingStatus
-from pymongo.errors import AutoReconnect, OperationFailure, ServerSelectionTimeoutError
+from pymongo.errors import (
+    AutoReconnect,
+    OperationFailure,
+    PyMongoError,
+    ServerSelectionTimeoutError,
+)
 
 from config import Config
 
@@ -23,7 +28,7 @@ LIBAPI = 0
 
 # Increment this PATCH version before using `charmcraft publish-lib` or reset
 # to 0 if you are raising the major API version
-LIBPATCH = 6
+LIBPATCH = 9
 
 AUTH_FAILED_CODE = 18
 UNAUTHORISED_CODE = 13
@@ -100,13 +105,13 @@ class MongoDBStatusHandler(Object):
 
         return False
 
-    def are_all_units_ready_for_upgrade(self, unit_to_ignore: str = "") -> bool:
+    def are_all_units_ready_for_upgrade(self, units_to_ignore: Iterable[str] = ()) -> bool:
         """Returns True if all charm units status's show that they are ready for upgrade."""
         goal_state = self.charm.model._backend._run(
             "goal-state", return_output=True, use_json=True
         )
         for unit_name, unit_state in goal_state["units"].items():
-            if unit_name == unit_to_ignore:
+            if unit_name in units_to_ignore:
                 continue
             if unit_state["status"] == "active":
                 continue
@@ -281,6 +286,56 @@ class MongoDBStatusHandler(Object):
             )
 
 
+def format_initial_sync_progress(progress: Dict) -> str:
+    """Returns a short description of the progress of an initial sync.
+
+    Args:
+        progress: progress as returned by `MongoDBConnection.get_initial_sync_progress`.
+    """
+    description = (
+        f"{progress['databases_cloned']} databases cloned, "
+        f"{progress['databases_to_clone']} to clone, "
+        f"{_format_bytes(progress['bytes_copied'])}/{_format_bytes(progress['bytes_total'])} "
+        f"copied at {_format_bytes(progress['rate'])}/s"
+    )
+    if progress["eta"] is not None:
+        description += f", ETA {_format_duration(progress['eta'])}"
+
+    return description
+
+
+def _format_bytes(size: float) -> str:
+    """Returns a size in bytes with a binary unit, e.g. 1.5GiB."""
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if size < 1024:
+            return f"{size:.1f}{unit}"
+        size /= 1024
+
+    return f"{size:.1f}TiB"
+
+
+def _format_duration(seconds: float) -> str:
+    """Returns a duration in hours and minutes, e.g. 3h12m."""
+    minutes = int(seconds) // 60
+    return f"{minutes // 60}h{minutes % 60:02d}m"
+
+
+def _build_initial_sync_status(mongodb_config: MongoConfiguration, unit_host: str) -> StatusBase:
+    """Generates the status of a unit syncing its data, with the progress when available."""
+    try:
+        # only the syncing member reports the progress of its initial sync
+        with MongoDBConnection(mongodb_config, unit_host, direct=True) as direct_mongo:
+            progress = direct_mongo.get_initial_sync_progress()
+    except PyMongoError as e:
+        logger.debug("Got error: %s, while checking the initial sync progress", str(e))
+        progress = None
+
+    if not progress:
+        return WaitingStatus("Member is syncing...")
+
+    return WaitingStatus(f"Member is syncing... {format_initial_sync_progress(progress)}")
+
+
 def build_unit_status(mongodb_config: MongoConfiguration, unit_host: str) -> StatusBase:
     """Generates the status of a unit based on its status reported by mongod."""
     try:
@@ -297,7 +352,9 @@ def build_unit_status(mongodb_config: MongoConfiguration, unit_host: str) -> Sta
                     return ActiveStatus("Primary")
                 case "SECONDARY":
                     return ActiveStatus("")
-                case "STARTUP" | "STARTUP2" | "ROLLBACK" | "RECOVERING":
+                case "STARTUP2":
+                    return _build_initial_sync_status(mongodb_config, unit_host)
+                case "STARTUP" | "ROLLBACK" | "RECOVERING":
                     return WaitingStatus("Member is syncing...")
                 case "REMOVED":
                     return WaitingStatus("Member is removing...")
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 """Substrate agnostic manager for handling MongoDB in-place upgrades."""
+
 # Copyright 2024 Canonical Ltd.
 # See LICENSE file for licensing details.
 import abc
@@ -10,16 +11,32 @@ import logging
 import pathlib
 import secrets
 import string
-from typing import Dict, List, Tuple
+import time
+from typing import Dict, List, Optional, Set, Tuple
 
 import poetry.core.constraints.version as poetry_version
+from bson.timestamp import Timestamp
 from charms.mongodb.v0.mongo import MongoConfiguration
-from charms.mongodb.v1.mongodb import FailedToMovePrimaryError, MongoDBConnection
+from charms.mongodb.v1.helpers import fan_out
+from charms.mongodb.v1.mongodb import (
+    SYNCING_STATES,
+    FailedToMovePrimaryError,
+    MongoDBConnection,
+)
 from charms.mongodb.v1.mongos import MongosConnection
-from ops import ActionEvent, BlockedStatus, MaintenanceStatus, StatusBase, Unit
+from ops import (
+    ActionEvent,
+    BlockedStatus,
+    MaintenanceStatus,
+    Relation,
+    StatusBase,
+    Unit,
+)
 from ops.charm import CharmBase
 from ops.framework import Object
 from pymongo.errors import OperationFailure, PyMongoError, ServerSelectionTimeoutError
+from pymongo.read_concern import ReadConcern
+from pymongo.write_concern import WriteConcern
 from tenacity import RetryError, Retrying, retry, stop_after_attempt, wait_fixed
 
 from config import Config
@@ -33,12 +50,15 @@ LIBAPI = 0
 
 # Increment this PATCH version before using `charmcraft publish-lib` or reset
 # to 0 if you are raising the major API version
-LIBPATCH = 3
+LIBPATCH = 9
 
 logger = logging.getLogger(__name__)
 
 SHARD_NAME_INDEX = "_id"
 WRITE_KEY = "write_value"
+# the admin database is local to each replica set, even when it is part of a sharded cluster
+HEALTH_CHECK_DB = "admin"
+HEALTH_CHECK_COLLECTION = "charm_health_check"
 ROLLBACK_INSTRUCTIONS = "To rollback, `juju refresh` to the previous revision"
 
 PEER_RELATION_ENDPOINT_NAME = "upgrade-version-a"
@@ -104,6 +124,14 @@ class UnitState(str, enum.Enum):
     OUTDATED = "outdated"  # Machines only
 
 
+class ShardRefreshState(str, enum.Enum):
+    """Refresh state of a shard, as tracked by the config-server."""
+
+    IDLE = "idle"
+    REFRESHING = "refreshing"
+    FAILED = "failed"
+
+
 # BEGIN: Useful classes
 class AbstractUpgrade(abc.ABC):
     """In-place upgrades abstract class (typing).
@@ -202,6 +230,11 @@ class AbstractUpgrade(abc.ABC):
         """Units sorted from highest to lowest unit number."""
         return sorted((self._unit, *self._peer_relation.units), key=unit_number, reverse=True)
 
+    @property
+    def refreshing_unit_names(self) -> Set[str]:
+        """Names of the units refreshing at the same time as this unit, this unit included."""
+        return {self._unit.name}
+
     @abc.abstractmethod
     def _get_unit_healthy_status(self) -> StatusBase:
         """Status shown during upgrade if unit is healthy."""
@@ -410,10 +443,12 @@ class GenericMongoDBUpgrade(Object, abc.ABC):
         # unhealthy. In order to check if this unit has resolved its issue, we ignore the status
         # that was set in a previous check of cluster health. Otherwise, we are stuck in an
         # infinite check of cluster health due to never being able to reset an unhealthy status.
+        # The units refreshing along with this unit are ignored as well, they are still restarting
+        # and would otherwise wait on each other.
         if not self.charm.status.is_current_unit_ready(
             ignore_unhealthy_upgrade=True
         ) or not self.charm.status.are_all_units_ready_for_upgrade(
-            unit_to_ignore=self.charm.unit.name
+            units_to_ignore=self.refreshing_unit_names
         ):
             logger.error(
                 "Cannot proceed with refresh. Status of charm units do not show active / waiting for refresh."
@@ -435,10 +470,30 @@ class GenericMongoDBUpgrade(Object, abc.ABC):
             )
             return False
 
+    @property
+    def refreshing_unit_names(self) -> Set[str]:
+        """Names of the units of this application refreshing at the same time as this unit."""
+        if not self._upgrade:
+            return {self.charm.unit.name}
+
+        return self._upgrade.refreshing_unit_names
+
+    def get_refreshing_hosts(self) -> Set[str]:
+        """Returns the hosts of the units refreshing at the same time as this unit."""
+        return {
+            self.charm.unit_host(unit)
+            for unit in [self.charm.unit, *self.charm.peers_units]
+            if unit.name in self.refreshing_unit_names
+        }
+
     def are_nodes_healthy(self) -> bool:
-        """Returns true if all nodes in the MongoDB deployment are healthy."""
+        """Returns true if all nodes in the MongoDB deployment are healthy.
+
+        The members refreshing along with this unit are not taken into account.
+        """
+        hosts_to_ignore = self.get_refreshing_hosts()
         if self.charm.is_role(Config.Role.REPLICATION):
-            return self.are_replica_set_nodes_healthy(self.charm.mongodb_config)
+            return self.are_replica_set_nodes_healthy(self.charm.mongodb_config, hosts_to_ignore)
 
         mongos_config = self.get_cluster_mongos()
         if not self.are_shards_healthy(mongos_config):
@@ -447,21 +502,62 @@ class GenericMongoDBUpgrade(Object, abc.ABC):
             )
             return False
 
-        if not self.are_replicas_in_sharded_cluster_healthy(mongos_config):
+        if not self.are_replicas_in_sharded_cluster_healthy(mongos_config, hosts_to_ignore):
             logger.debug("One or more nodes are not healthy - do not proceed with refresh.")
             return False
 
         return True
 
-    def are_replicas_in_sharded_cluster_healthy(self, mongos_config: MongoConfiguration) -> bool:
-        """Returns True if all replicas in the sharded cluster are healthy."""
-        # dictionary of all replica sets in the sharded cluster
-        for mongodb_config in self.get_all_replica_set_configs_in_cluster():
-            if not self.are_replica_set_nodes_healthy(mongodb_config):
-                logger.debug(f"Replica set: {mongodb_config.replset} contains unhealthy nodes.")
-                return False
+    def are_replicas_in_sharded_cluster_healthy(
+        self, mongos_config: MongoConfiguration, hosts_to_ignore: Optional[Set[str]] = None
+    ) -> bool:
+        """Returns True if all replicas in the sharded cluster, but the ignored ones, are healthy."""
+        hosts_to_ignore = hosts_to_ignore or set()
+        cluster_healthy = True
+        for replset, members in self.get_cluster_health_map().items():
+            if isinstance(members, Exception):
+                logger.debug("Failed to probe replica set: %s, error: %s", replset, members)
+                cluster_healthy = False
+                continue
+
+            syncing_members = [
+                host
+                for host, state in members.items()
+                if state in SYNCING_STATES and host not in hosts_to_ignore
+            ]
+            if syncing_members:
+                logger.debug(
+                    "Replica set: %s contains unhealthy nodes: %s",
+                    replset,
+                    ", ".join(syncing_members),
+                )
+                cluster_healthy = False
 
-        return True
+        return cluster_healthy
+
+    def get_cluster_health_map(self) -> Dict[str, Dict[str, str] | Exception]:
+        """Returns the state of each member of each replica set in the sharded cluster.
+
+        Replica sets are probed concurrently, the whole map within `Config.Probe.DEADLINE`
+        seconds however many replica sets the cluster has. The state of a replica set that could
+        not be probed, or not in time, is the error raised while probing it, i.e.:
+        {"shard-one": {"10.0.0.1": "PRIMARY", "10.0.0.2": "SECONDARY"}, "shard-two": TimeoutError}
+        """
+        replica_set_configs = {
+            mongodb_config.replset: mongodb_config
+            for mongodb_config in self.get_all_replica_set_configs_in_cluster()
+        }
+        return fan_out(
+            lambda replset: self.get_replica_set_health(replica_set_configs[replset]),
+            replica_set_configs,
+            deadline=Config.Probe.DEADLINE,
+        )
+
+    @staticmethod
+    def get_replica_set_health(mongodb_config: MongoConfiguration) -> Dict[str, str]:
+        """Returns the state of each member of the replica set."""
+        with MongoDBConnection(mongodb_config) as mongod:
+            return mongod.get_replset_status()
 
     def are_shards_healthy(self, mongos_config: MongoConfiguration) -> bool:
         """Returns True if all shards in the cluster are healthy."""
@@ -508,12 +604,19 @@ class GenericMongoDBUpgrade(Object, abc.ABC):
 
         return mongodb_configurations
 
-    def are_replica_set_nodes_healthy(self, mongodb_config: MongoConfiguration) -> bool:
-        """Returns true if all nodes in the MongoDB replica set are healthy."""
+    def are_replica_set_nodes_healthy(
+        self, mongodb_config: MongoConfiguration, hosts_to_ignore: Optional[Set[str]] = None
+    ) -> bool:
+        """Returns true if all nodes in the MongoDB replica set, but the ignored ones, are healthy."""
+        hosts_to_ignore = hosts_to_ignore or set()
         with MongoDBConnection(mongodb_config) as mongod:
-            rs_status = mongod.get_replset_status()
             rs_status = mongod.client.admin.command("replSetGetStatus")
-            return not mongod.is_any_sync(rs_status)
+            members = [
+                member
+                for member in rs_status["members"]
+                if member["name"].split(":")[0] not in hosts_to_ignore
+            ]
+            return not mongod.is_any_sync({"members": members})
 
     def is_cluster_able_to_read_write(self) -> bool:
         """Returns True if read and write is feasible for cluster."""
@@ -523,32 +626,33 @@ class GenericMongoDBUpgrade(Object, abc.ABC):
             return self.is_sharded_cluster_able_to_read_write()
 
     def is_sharded_cluster_able_to_read_write(self) -> bool:
-        """Returns True if possible to write all cluster shards and read from all replicas."""
-        mongos_config = self.get_cluster_mongos()
-        with MongosConnection(mongos_config) as mongos:
-            sc_status = mongos.client.admin.command("listShards")
-            for shard in sc_status["shards"]:
-                # force a write to a specific shard to ensure the primary on that shard can
-                # receive writes
-                db_name, collection_name, write_value = self.get_random_write_and_collection()
-                self.add_write_to_sharded_cluster(
-                    mongos_config, db_name, collection_name, write_value
-                )
-                mongos.client.admin.command("movePrimary", db_name, to=shard[SHARD_NAME_INDEX])
+        """Returns True if possible to write to all replica sets and read from all their members.
 
-                write_replicated = self.is_write_on_secondaries(
-                    self.get_mongodb_config_from_shard_entry(shard),
-                    collection_name,
-                    write_value,
-                    db_name,
-                )
+        Each replica set of the cluster is probed directly and concurrently, the sharding catalog
+        is left untouched. All replica sets and their members are probed within
+        `Config.Probe.DEADLINE` seconds.
+        """
+        replica_set_configs = {
+            mongodb_config.replset: mongodb_config
+            for mongodb_config in self.get_all_replica_set_configs_in_cluster()
+        }
+        # the members of each replica set are probed in the time left to the whole fan-out
+        deadline = time.monotonic() + Config.Probe.DEADLINE
+        probe_results = fan_out(
+            lambda replset: self.probe_replica_set_read_write(
+                replica_set_configs[replset], timeout=deadline - time.monotonic()
+            ),
+            replica_set_configs,
+            deadline=Config.Probe.DEADLINE,
+        )
 
-                self.clear_db_collection(mongos_config, db_name)
-                if not write_replicated:
-                    logger.debug(f"Test read/write to shard {shard['_id']} failed.")
-                    return False
+        able_to_read_write = True
+        for replset, write_replicated in probe_results.items():
+            if write_replicated is not True:
+                logger.debug("Test read/write to %s failed: %s", replset, write_replicated)
+                able_to_read_write = False
 
-        return True
+        return able_to_read_write
 
     def get_mongodb_config_from_shard_entry(self, shard_entry: dict) -> MongoConfiguration:
         """Returns a replica set MongoConfiguration based on a shard entry from ListShards."""
@@ -567,96 +671,91 @@ class GenericMongoDBUpgrade(Object, abc.ABC):
 
     def is_replica_set_able_read_write(self) -> bool:
         """Returns True if is possible to write to primary and read from replicas."""
-        _, collection_name, write_value = self.get_random_write_and_collection()
-        self.add_write_to_replica_set(self.charm.mongodb_config, collection_name, write_value)
-        write_replicated = self.is_write_on_secondaries(
-            self.charm.mongodb_config, collection_name, write_value
-        )
-        self.clear_tmp_collection(self.charm.mongodb_config, collection_name)
-        return write_replicated
+        return self.probe_replica_set_read_write(self.charm.mongodb_config)
 
-    def clear_db_collection(self, mongos_config: MongoConfiguration, db_name: str) -> None:
-        """Clears the temporary collection."""
-        with MongoDBConnection(mongos_config) as mongos:
-            mongos.client.drop_database(db_name)
+    def probe_replica_set_read_write(
+        self, mongodb_config: MongoConfiguration, timeout: float = Config.Probe.DEADLINE
+    ) -> bool:
+        """Returns True if a majority write to the primary can be read from every member.
 
-    def clear_tmp_collection(
-        self, mongodb_config: MongoConfiguration, collection_name: str
-    ) -> None:
-        """Clears the temporary collection."""
+        A single document, owned by this unit, is upserted in a dedicated health collection with
+        write concern majority. Each member is then read directly within a causally consistent
+        session, so that the read with read concern majority waits for the write to be majority
+        committed on that member (afterClusterTime). The members are read in the time left of
+        `timeout` seconds once the write completed.
+        """
+        started = time.monotonic()
+        write_value = self.get_random_write_value()
         with MongoDBConnection(mongodb_config) as mongod:
-            db = mongod.client["admin"]
-            db.drop_collection(collection_name)
+            health_collection = mongod.client[HEALTH_CHECK_DB].get_collection(
+                HEALTH_CHECK_COLLECTION,
+                write_concern=WriteConcern(
+                    w="majority", wtimeout=Config.Probe.OPERATION_TIMEOUT_MS
+                ),
+            )
+            with mongod.client.start_session(causal_consistency=True) as session:
+                health_collection.update_one(
+                    {"_id": self.charm.unit.name},
+                    {"$set": {WRITE_KEY: write_value}},
+                    upsert=True,
+                    session=session,
+                )
+                cluster_time, operation_time = session.cluster_time, session.operation_time
+
+        members_results = fan_out(
+            lambda host: self.is_write_on_member(
+                mongodb_config, host, write_value, cluster_time, operation_time
+            ),
+            mongodb_config.hosts,
+            deadline=max(0, timeout - (time.monotonic() - started)),
+        )
+        write_replicated = True
+        for host, write_on_member in members_results.items():
+            if write_on_member is not True:
+                logger.debug(
+                    "Member %s of %s does not contain the expected write: %s",
+                    host,
+                    mongodb_config.replset,
+                    write_on_member,
+                )
+                write_replicated = False
 
-    @retry(
-        stop=stop_after_attempt(10),
-        wait=wait_fixed(1),
-        reraise=True,
-    )
-    def confirm_excepted_write_on_replica(
+        return write_replicated
+
+    def is_write_on_member(
         self,
+        mongodb_config: MongoConfiguration,
         host: str,
-        db_name: str,
-        collection: str,
         expected_write_value: str,
-        secondary_config: MongoConfiguration,
+        cluster_time: Optional[Dict],
+        operation_time: Optional[Timestamp],
     ) -> bool:
-        """Returns True if the replica contains the expected write in the provided collection."""
-        secondary_config.hosts = {host}
-        with MongoDBConnection(secondary_config, direct=True) as direct_seconary:
-            db = direct_seconary.client[db_name]
-            test_collection = db[collection]
-            query = test_collection.find({}, {WRITE_KEY: 1})
-            if query[0][WRITE_KEY] != expected_write_value:
-                raise ClusterNotHealthyError
-
-    def get_random_write_and_collection(self) -> Tuple[str, str]:
-        """Returns a tuple for a random collection name and a unique write to add to it."""
-        choices = string.ascii_letters + string.digits
-        collection_name = "collection_" + "".join([secrets.choice(choices) for _ in range(32)])
-        write_value = "unique_write_" + "".join([secrets.choice(choices) for _ in range(16)])
-        db_name = "db_name_" + "".join([secrets.choice(choices) for _ in range(32)])
-        return (db_name, collection_name, write_value)
-
-    def add_write_to_sharded_cluster(
-        self, mongos_config: MongoConfiguration, db_name, collection_name, write_value
-    ) -> None:
-        """Adds a the provided write to the provided database with the provided collection."""
-        with MongoDBConnection(mongos_config) as mongod:
-            db = mongod.client[db_name]
-            test_collection = db[collection_name]
-            write = {WRITE_KEY: write_value}
-            test_collection.insert_one(write)
-
-    def add_write_to_replica_set(
-        self, mongodb_config: MongoConfiguration, collection_name, write_value
-    ) -> None:
-        """Adds a the provided write to the admin database with the provided collection."""
-        with MongoDBConnection(mongodb_config) as mongod:
-            db = mongod.client["admin"]
-            test_collection = db[collection_name]
-            write = {WRITE_KEY: write_value}
-            test_collection.insert_one(write)
-
-    def is_write_on_secondaries(
-        self,
-        mongodb_config: MongoConfiguration,
-        collection_name,
-        expected_write_value,
-        db_name: str = "admin",
-    ):
-        """Returns true if the expected write."""
-        for replica_ip in mongodb_config.hosts:
-            try:
-                self.confirm_excepted_write_on_replica(
-                    replica_ip, db_name, collection_name, expected_write_value, mongodb_config
+        """Returns True if the member has the expected write majority committed."""
+        member_config = copy.deepcopy(mongodb_config)
+        member_config.hosts = {host}
+        with MongoDBConnection(member_config, direct=True) as direct_member:
+            health_collection = direct_member.client[HEALTH_CHECK_DB].get_collection(
+                HEALTH_CHECK_COLLECTION, read_concern=ReadConcern("majority")
+            )
+            with direct_member.client.start_session(causal_consistency=True) as session:
+                # reads in this session wait until the member has caught up with the write.
+                if cluster_time:
+                    session.advance_cluster_time(cluster_time)
+                if operation_time:
+                    session.advance_operation_time(operation_time)
+                health_check = health_collection.find_one(
+                    {"_id": self.charm.unit.name},
+                    session=session,
+                    max_time_ms=Config.Probe.OPERATION_TIMEOUT_MS,
                 )
-            except ClusterNotHealthyError:
-                # do not return False immediately - as it is
-                logger.debug("Secondary with IP %s, does not contain the expected write.")
-                return False
 
-        return True
+        return bool(health_check) and health_check[WRITE_KEY] == expected_write_value
+
+    @staticmethod
+    def get_random_write_value() -> str:
+        """Returns a unique value to write in the health collection."""
+        choices = string.ascii_letters + string.digits
+        return "unique_write_" + "".join([secrets.choice(choices) for _ in range(16)])
 
     def step_down_primary_and_wait_reelection(self) -> None:
         """Steps down the current primary and waits for a new one to be elected."""
@@ -709,23 +808,192 @@ class GenericMongoDBUpgrade(Object, abc.ABC):
         Note it is NOT sufficient to check only mongos or the individual shards. It is necessary to
         check each node according to MongoDB upgrade docs.
         """
-        for replica_set_config in self.get_all_replica_set_configs_in_cluster():
-            for single_host in replica_set_config.hosts:
-                single_replica_config = self.charm.remote_mongodb_config(
-                    single_host, replset=replica_set_config.replset, standalone=True
+        nodes = [
+            (replica_set_config.replset, single_host)
+            for replica_set_config in self.get_all_replica_set_configs_in_cluster()
+            for single_host in replica_set_config.hosts
+        ]
+        feature_versions = fan_out(self.get_feature_compatibility_version, nodes)
+        for (replset, host), version in feature_versions.items():
+            if isinstance(version, Exception):
+                logger.debug(
+                    "Failed to retrieve the feature compatibility of %s in %s, error: %s",
+                    host,
+                    replset,
+                    version,
                 )
-                with MongoDBConnection(single_replica_config) as mongod:
-                    version = mongod.client.admin.command(
-                        ({"getParameter": 1, "featureCompatibilityVersion": 1})
-                    )
-                    if (
-                        version["featureCompatibilityVersion"]["version"]
-                        != expected_feature_version
-                    ):
-                        return False
+                return False
+
+            if version != expected_feature_version:
+                return False
 
         return True
 
+    def get_feature_compatibility_version(self, node: Tuple[str, str]) -> str:
+        """Returns the feature compatibility version of a single node of a replica set."""
+        replset, host = node
+        single_replica_config = self.charm.remote_mongodb_config([host], replset=replset)
+        with MongoDBConnection(single_replica_config, direct=True) as mongod:
+            version = mongod.client.admin.command(
+                ({"getParameter": 1, "featureCompatibilityVersion": 1})
+            )
+            return version["featureCompatibilityVersion"]["version"]
+
+    def share_refresh_state_with_config_server(self) -> None:
+        """Shares the refresh state of this shard unit with the config-server."""
+        if not self.charm.is_role(Config.Role.SHARD) or not self._upgrade:
+            return
+
+        if not (config_server_relation := self.charm.shard.get_config_server_relation()):
+            return
+
+        if self.charm.unit.status == Config.Status.UNHEALTHY_UPGRADE:
+            refresh_state = ShardRefreshState.FAILED.value
+        elif self._upgrade.unit_state:
+            refresh_state = self._upgrade.unit_state.value
+        else:
+            return
+
+        unit_data = config_server_relation.data[self.charm.unit]
+        unit_data[Config.Upgrade.SHARD_REFRESH_STATE_KEY] = refresh_state
+
+    def is_shard_refresh_authorized(self) -> bool:
+        """Returns True if this shard is allowed by the config-server to start refreshing."""
+        if not self.charm.is_role(Config.Role.SHARD):
+            return True
+
+        if not (config_server_relation := self.charm.shard.get_config_server_relation()):
+            return True
+
+        config_server_data = config_server_relation.data[config_server_relation.app]
+        authorized = config_server_data.get(Config.Upgrade.SHARD_REFRESH_AUTHORIZED_KEY)
+        if authorized is None:
+            # config-servers which do not orchestrate the refresh of shards publish neither key.
+            return Config.Upgrade.SHARD_REFRESH_CONCURRENCY_KEY not in config_server_data
+
+        return json.loads(authorized)
+
+    def get_shard_refresh_states(self) -> Dict[str, ShardRefreshState]:
+        """Returns the refresh state of each shard related to the config-server."""
+        shard_refresh_states = {}
+        for sharding_relation in self.charm.config_server.get_all_sharding_relations():
+            units_states = {
+                sharding_relation.data[unit].get(Config.Upgrade.SHARD_REFRESH_STATE_KEY)
+                for unit in sharding_relation.units
+            }
+            if ShardRefreshState.FAILED.value in units_states:
+                shard_state = ShardRefreshState.FAILED
+            elif units_states & {UnitState.OUTDATED.value, UnitState.UPGRADING.value}:
+                shard_state = ShardRefreshState.REFRESHING
+            else:
+                shard_state = ShardRefreshState.IDLE
+
+            shard_refresh_states[sharding_relation.app.name] = shard_state
+
+        return shard_refresh_states
+
+    def reconcile_shard_refresh_waves(self) -> None:
+        """Authorizes shards waiting to refresh, at most `shard-refresh-concurrency` at a time.
+
+        Shards which finished refreshing release their authorization. No shard is authorized
+        while one of the shards has failed its post-refresh checks. Every shard which is not
+        authorized is explicitly told to wait.
+        """
+        if not self.charm.unit.is_leader() or not self.charm.is_role(Config.Role.CONFIG_SERVER):
+            return
+
+        shard_refresh_states = self.get_shard_refresh_states()
+        sharding_relations = {
+            relation.app.name: relation
+            for relation in self.charm.config_server.get_all_sharding_relations()
+        }
+        authorized_shards = set()
+        for shard_name, relation in sharding_relations.items():
+            if not json.loads(
+                relation.data[self.charm.app].get(
+                    Config.Upgrade.SHARD_REFRESH_AUTHORIZED_KEY, "false"
+                )
+            ):
+                continue
+
+            if shard_refresh_states[shard_name] == ShardRefreshState.IDLE:
+                logger.info("Shard %s finished refreshing.", shard_name)
+                continue
+
+            authorized_shards.add(shard_name)
+
+        failed_shards = [
+            shard_name
+            for shard_name, state in shard_refresh_states.items()
+            if state == ShardRefreshState.FAILED
+        ]
+        if failed_shards:
+            logger.error(
+                "Not authorizing more shards to refresh, shards %s failed post-refresh checks.",
+                ", ".join(failed_shards),
+            )
+        else:
+            authorized_shards |= self._get_next_shard_wave(shard_refresh_states, authorized_shards)
+
+        for shard_name, relation in sharding_relations.items():
+            self._set_shard_refresh_authorized(relation, shard_name in authorized_shards)
+
+    def _get_next_shard_wave(
+        self, shard_refresh_states: Dict[str, ShardRefreshState], authorized_shards: Set[str]
+    ) -> Set[str]:
+        """Returns the waiting shards to authorize, within `shard-refresh-concurrency`."""
+        concurrency = self.charm.config["shard-refresh-concurrency"] or len(shard_refresh_states)
+        waiting_shards = sorted(
+            shard_name
+            for shard_name, state in shard_refresh_states.items()
+            if state == ShardRefreshState.REFRESHING and shard_name not in authorized_shards
+        )
+        next_wave = set(waiting_shards[: max(0, concurrency - len(authorized_shards))])
+        for shard_name in sorted(next_wave):
+            logger.info("Authorizing shard %s to refresh.", shard_name)
+
+        return next_wave
+
+    def _set_shard_refresh_authorized(self, relation: Relation, authorized: bool) -> None:
+        # the concurrency tells the shards that this config-server orchestrates their refresh
+        self.charm.config_server._update_relation_data(
+            relation.id,
+            {
+                Config.Upgrade.SHARD_REFRESH_AUTHORIZED_KEY: json.dumps(authorized),
+                Config.Upgrade.SHARD_REFRESH_CONCURRENCY_KEY: json.dumps(
+                    self.charm.config["shard-refresh-concurrency"]
+                ),
+            },
+        )
+
+    def get_shard_refresh_status(self) -> StatusBase | None:
+        """Returns the status of the refresh of the shards, as seen by the config-server."""
+        if not self.charm.is_role(Config.Role.CONFIG_SERVER):
+            return None
+
+        shard_refresh_states = self.get_shard_refresh_states()
+        failed_shards = [
+            shard_name
+            for shard_name, state in shard_refresh_states.items()
+            if state == ShardRefreshState.FAILED
+        ]
+        if failed_shards:
+            return BlockedStatus(
+                f"Shard refresh halted, {', '.join(failed_shards)} failed post-refresh checks."
+            )
+
+        refreshing_shards = [
+            shard_name
+            for shard_name, state in shard_refresh_states.items()
+            if state == ShardRefreshState.REFRESHING
+        ]
+        if refreshing_shards:
+            return MaintenanceStatus(
+                f"Refreshing shards: {len(refreshing_shards)}/{len(shard_refresh_states)} in progress."
+            )
+
+        return None
+
     def set_mongos_feature_compatibilty_version(self, feature_version) -> None:
         """Sets the mongos feature compatibility version."""
         with MongosConnection(self.charm.mongos_config) as mongos:
@@ -8,7 +8,18 @@ import os
 import secrets
 import string
 import subprocess
-from typing import List, Mapping
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import (
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
 from charms.mongodb.v1.mongodb import MongoConfiguration
 from ops.model import ActiveStatus, MaintenanceStatus, StatusBase, WaitingStatus
@@ -23,7 +34,7 @@ LIBAPI = 1
 
 # Increment this PATCH version before using `charmcraft publish-lib` or reset
 # to 0 if you are raising the major API version
-LIBPATCH = 12
+LIBPATCH = 19
 
 # path to store mongodb ketFile
 KEY_FILE = "keyFile"
@@ -43,33 +54,72 @@ CONF_DIR = "/etc/mongod"
 MONGODB_LOG_FILENAME = "mongodb.log"
 logger = logging.getLogger(__name__)
 
-
-def _get_logging_options(snap_install: bool) -> str:
-    """Returns config option for log path.
-
-    :param snap_install: indicate that charmed-mongodb was installed from snap (VM charms)
-    :return: a path to log file to be used
+Target = TypeVar("Target", bound=Hashable)
+ProbeResult = TypeVar("ProbeResult")
+
+
+# command line equivalent of the configuration file options, in the order they are passed.
+# Boolean options are passed as flags, the value of the other options fills in the template.
+SERVICE_ARGS = [
+    ("net.bindIpAll", "--bind_ip_all"),
+    ("net.bindIp", "--bind_ip {}"),
+    ("net.unixDomainSocket.filePermissions", "--filePermissions {}"),
+    ("replication.replSetName", "--replSet={}"),
+    ("storage.dbPath", "--dbpath={}"),
+    ("sharding.configDB", "--configdb {}"),
+    ("net.port", "--port={}"),
+    # one --setParameter argument per server parameter
+    ("setParameter", "--setParameter {}={}"),
+    ("systemLog.logRotate", "--logRotate {}"),
+    ("systemLog.logAppend", "--logappend"),
+    ("systemLog.path", "--logpath={}"),
+    ("auditLog.destination", "--auditDestination={}"),
+    ("auditLog.format", "--auditFormat={}"),
+    ("auditLog.path", "--auditPath={}"),
+    ("net.maxIncomingConnections", "--maxConns={}"),
+    ("replication.oplogSizeMB", "--oplogSize={}"),
+    ("storage.oplogMinRetentionHours", "--oplogMinRetentionHours={}"),
+    ("security.authorization", "--auth"),
+    ("security.clusterAuthMode", "--clusterAuthMode={}"),
+    ("security.keyFile", "--keyFile={}"),
+    ("net.tls.CAFile", "--tlsCAFile={}"),
+    ("net.tls.certificateKeyFile", "--tlsCertificateKeyFile={}"),
+    ("net.tls.mode", "--tlsMode={}"),
+    ("net.tls.disabledProtocols", "--tlsDisabledProtocols={}"),
+    ("net.tls.allowInvalidCertificates", "--tlsAllowInvalidCertificates"),
+    ("net.tls.clusterCAFile", "--tlsClusterCAFile={}"),
+    ("net.tls.clusterFile", "--tlsClusterFile={}"),
+    # configsvr or shardsvr
+    ("sharding.clusterRole", "--{}"),
+]
+
+
+def _get_service_args(service_config: Dict) -> str:
+    """Returns the command line arguments equivalent to a configuration file.
+
+    :param service_config: options of the mongod or mongos configuration file
+    :return: a string of the arguments to be passed to mongod or mongos
     """
-    log_path = f"{LOG_DIR}/{MONGODB_LOG_FILENAME}"
-    if snap_install:
-        log_path = f"{MONGODB_COMMON_DIR}{log_path}"
-    return f"--logpath={log_path}"
+    cmd = []
+    for path, template in SERVICE_ARGS:
+        value = service_config
+        for key in path.split("."):
+            value = value.get(key) if isinstance(value, dict) else None
 
+        if value is None or value is False:
+            continue
 
-def _get_audit_log_settings(snap_install: bool) -> List[str]:
-    """Return config options for audit log.
+        if path == "setParameter":
+            cmd.extend(
+                template.format(name, str(value).lower() if isinstance(value, bool) else value)
+                for name, value in value.items()
+            )
+            continue
 
-    :param snap_install: indicate that charmed-mongodb was installed from snap (VM charms)
-    :return: a list of audit log settings for charmed MongoDB
-    """
-    audit_log_path = f"{LOG_DIR}/{Config.AuditLog.FILE_NAME}"
-    if snap_install:
-        audit_log_path = f"{MONGODB_COMMON_DIR}{audit_log_path}"
-    return [
-        f"--auditDestination={Config.AuditLog.DESTINATION}",
-        f"--auditFormat={Config.AuditLog.FORMAT}",
-        f"--auditPath={audit_log_path}",
-    ]
+        cmd.append(template.format(value))
+
+    cmd.append("\n")
+    return " ".join(cmd)
 
 
 # noinspection GrazieInspection
@@ -108,142 +158,204 @@ def get_mongos_args(
     snap_install: bool = False,
     config_server_db: str = None,
     external_connectivity: bool = True,
+    parameters: Optional[Dict] = None,
+    max_connections: Optional[int] = None,
 ) -> str:
     """Returns the arguments used for starting mongos on a config-server side application.
 
     Returns:
-        A string representing the arguments to be passed to mongos.
+        A string representing the arguments to be passed to mongos, equivalent to
+        `get_mongos_config`.
     """
-    # suborinate charm which provides its own config_server_db, should only use unix domain socket
-    binding_ips = (
-        "--bind_ip_all"
-        if external_connectivity
-        else f"--bind_ip {MONGODB_COMMON_DIR}/var/mongodb-27018.sock  --filePermissions 0766"
+    return _get_service_args(
+        get_mongos_config(
+            config,
+            snap_install=snap_install,
+            config_server_db=config_server_db,
+            external_connectivity=external_connectivity,
+            parameters=parameters,
+            max_connections=max_connections,
+        )
     )
 
-    # mongos running on the config server communicates through localhost
-    config_server_db = config_server_db or f"{config.replset}/localhost:{Config.MONGODB_PORT}"
 
-    full_conf_dir = f"{MONGODB_SNAP_DATA_DIR}{CONF_DIR}" if snap_install else CONF_DIR
-    cmd = [
-        # mongos on config server side should run on 0.0.0.0 so it can be accessed by other units
-        # in the sharded cluster
-        binding_ips,
-        f"--configdb {config_server_db}",
-        # config server is already using 27017
-        f"--port {Config.MONGOS_PORT}",
-        "--logRotate reopen",
-        "--logappend",
-    ]
+def get_mongod_args(
+    config: MongoConfiguration,
+    auth: bool = True,
+    snap_install: bool = False,
+    role: str = "replication",
+    parameters: Optional[Dict] = None,
+    max_connections: Optional[int] = None,
+) -> str:
+    """Construct the MongoDB startup command line.
 
-    # TODO : generalise these into functions to be re-used
+    Returns:
+        A string representing the command used to start MongoDB, equivalent to
+        `get_mongod_config`.
+    """
+    return _get_service_args(
+        get_mongod_config(
+            config,
+            auth=auth,
+            snap_install=snap_install,
+            role=role,
+            parameters=parameters,
+            max_connections=max_connections,
+        )
+    )
+
+
+def _get_tls_config(config: MongoConfiguration, conf_dir: str) -> Tuple[Dict, Dict]:
+    """Returns the net.tls and security settings shared by mongod and mongos."""
+    tls_config = {}
+    security_config = {}
     if config.tls_external:
-        cmd.extend(
-            [
-                f"--tlsCAFile={full_conf_dir}/{TLS_EXT_CA_FILE}",
-                f"--tlsCertificateKeyFile={full_conf_dir}/{TLS_EXT_PEM_FILE}",
+        tls_config.update(
+            {
+                "CAFile": f"{conf_dir}/{TLS_EXT_CA_FILE}",
+                "certificateKeyFile": f"{conf_dir}/{TLS_EXT_PEM_FILE}",
                 # allow non-TLS connections
-                "--tlsMode=preferTLS",
-                "--tlsDisabledProtocols=TLS1_0,TLS1_1",
-            ]
+                "mode": "preferTLS",
+                "disabledProtocols": "TLS1_0,TLS1_1",
+            }
         )
 
     # internal TLS can be enabled only if external is enabled
     if config.tls_internal and config.tls_external:
-        cmd.extend(
-            [
-                "--clusterAuthMode=x509",
-                "--tlsAllowInvalidCertificates",
-                f"--tlsClusterCAFile={full_conf_dir}/{TLS_INT_CA_FILE}",
-                f"--tlsClusterFile={full_conf_dir}/{TLS_INT_PEM_FILE}",
-            ]
-        )
-    else:
-        # keyFile used for authentication replica set peers if no internal tls configured.
-        cmd.extend(
-            [
-                "--clusterAuthMode=keyFile",
-                f"--keyFile={full_conf_dir}/{KEY_FILE}",
-            ]
+        tls_config.update(
+            {
+                "allowInvalidCertificates": True,
+                "clusterCAFile": f"{conf_dir}/{TLS_INT_CA_FILE}",
+                "clusterFile": f"{conf_dir}/{TLS_INT_PEM_FILE}",
+            }
         )
+        security_config["clusterAuthMode"] = "x509"
 
-    cmd.append("\n")
-    return " ".join(cmd)
+    return tls_config, security_config
 
 
-def get_mongod_args(
+def get_mongod_config(
     config: MongoConfiguration,
     auth: bool = True,
     snap_install: bool = False,
     role: str = "replication",
-) -> str:
-    """Construct the MongoDB startup command line.
+    parameters: Optional[Dict] = None,
+    max_connections: Optional[int] = None,
+    oplog_size_mb: Optional[int] = None,
+    oplog_min_retention_hours: Optional[float] = None,
+) -> Dict:
+    """Construct the structured mongod configuration file.
 
     Returns:
-        A string representing the command used to start MongoDB.
+        A dictionary of the mongod configuration file options.
     """
     full_data_dir = f"{MONGODB_COMMON_DIR}{DATA_DIR}" if snap_install else DATA_DIR
     full_conf_dir = f"{MONGODB_SNAP_DATA_DIR}{CONF_DIR}" if snap_install else CONF_DIR
-    logging_options = _get_logging_options(snap_install)
-    audit_log_settings = _get_audit_log_settings(snap_install)
-    cmd = [
+    full_log_dir = f"{MONGODB_COMMON_DIR}{LOG_DIR}" if snap_install else LOG_DIR
+    tls_config, security_config = _get_tls_config(config, full_conf_dir)
+
+    mongod_config = {
         # bind to localhost and external interfaces
-        "--bind_ip_all",
-        # part of replicaset
-        f"--replSet={config.replset}",
+        "net": {"bindIpAll": True, "port": Config.MONGODB_PORT},
+        "replication": {"replSetName": config.replset},
         # db must be located within the snap common directory since the snap is strictly confined
-        f"--dbpath={full_data_dir}",
-        # for simplicity we run the mongod daemon on shards, configsvrs, and replicas on the same
-        # port
-        f"--port={Config.MONGODB_PORT}",
-        "--setParameter processUmask=037",  # required for log files perminission (g+r)
-        "--logRotate reopen",
-        "--logappend",
-        logging_options,
-    ]
-    cmd.extend(audit_log_settings)
-    if auth:
-        cmd.extend(["--auth"])
-
-    if auth and not config.tls_internal:
-        # keyFile cannot be used without auth and cannot be used in tandem with internal TLS
-        cmd.extend(
-            [
-                "--clusterAuthMode=keyFile",
-                f"--keyFile={full_conf_dir}/{KEY_FILE}",
-            ]
-        )
+        "storage": {"dbPath": full_data_dir},
+        "systemLog": {
+            "destination": "file",
+            "path": f"{full_log_dir}/{MONGODB_LOG_FILENAME}",
+            "logAppend": True,
+            "logRotate": "reopen",
+        },
+        "auditLog": {
+            "destination": Config.AuditLog.DESTINATION,
+            "format": Config.AuditLog.FORMAT,
+            "path": f"{full_log_dir}/{Config.AuditLog.FILE_NAME}",
+        },
+        # required for log files perminission (g+r)
+        "setParameter": {"processUmask": "037", **(parameters or {})},
+    }
+    if max_connections:
+        mongod_config["net"]["maxIncomingConnections"] = max_connections
+
+    # only used when the oplog is created, existing oplogs are resized at runtime
+    if oplog_size_mb:
+        mongod_config["replication"]["oplogSizeMB"] = oplog_size_mb
+
+    if oplog_min_retention_hours:
+        mongod_config["storage"]["oplogMinRetentionHours"] = float(oplog_min_retention_hours)
+
+    if tls_config:
+        mongod_config["net"]["tls"] = tls_config
 
-    if config.tls_external:
-        cmd.extend(
-            [
-                f"--tlsCAFile={full_conf_dir}/{TLS_EXT_CA_FILE}",
-                f"--tlsCertificateKeyFile={full_conf_dir}/{TLS_EXT_PEM_FILE}",
-                # allow non-TLS connections
-                "--tlsMode=preferTLS",
-                "--tlsDisabledProtocols=TLS1_0,TLS1_1",
-            ]
-        )
+    if auth:
+        mongod_config["security"] = {"authorization": "enabled"}
+        if not config.tls_internal:
+            # keyFile cannot be used without auth and cannot be used in tandem with internal TLS
+            mongod_config["security"].update(
+                {"clusterAuthMode": "keyFile", "keyFile": f"{full_conf_dir}/{KEY_FILE}"}
+            )
 
-    # internal TLS can be enabled only in external is enabled
-    if config.tls_internal and config.tls_external:
-        cmd.extend(
-            [
-                "--clusterAuthMode=x509",
-                "--tlsAllowInvalidCertificates",
-                f"--tlsClusterCAFile={full_conf_dir}/{TLS_INT_CA_FILE}",
-                f"--tlsClusterFile={full_conf_dir}/{TLS_INT_PEM_FILE}",
-            ]
-        )
+    if security_config:
+        mongod_config.setdefault("security", {}).update(security_config)
 
     if role == Config.Role.CONFIG_SERVER:
-        cmd.append("--configsvr")
+        mongod_config["sharding"] = {"clusterRole": "configsvr"}
 
     if role == Config.Role.SHARD:
-        cmd.append("--shardsvr")
+        mongod_config["sharding"] = {"clusterRole": "shardsvr"}
+
+    return mongod_config
 
-    cmd.append("\n")
-    return " ".join(cmd)
+
+def get_mongos_config(
+    config: MongoConfiguration,
+    snap_install: bool = False,
+    config_server_db: str = None,
+    external_connectivity: bool = True,
+    parameters: Optional[Dict] = None,
+    max_connections: Optional[int] = None,
+) -> Dict:
+    """Construct the structured configuration file of mongos on a config-server.
+
+    Returns:
+        A dictionary of the mongos configuration file options.
+    """
+    full_conf_dir = f"{MONGODB_SNAP_DATA_DIR}{CONF_DIR}" if snap_install else CONF_DIR
+    tls_config, security_config = _get_tls_config(config, full_conf_dir)
+
+    # mongos on config server side should run on 0.0.0.0 so it can be accessed by other units in
+    # the sharded cluster, suborinate charms should only use unix domain socket
+    net_config = (
+        {"bindIpAll": True}
+        if external_connectivity
+        else {
+            "bindIp": f"{MONGODB_COMMON_DIR}/var/mongodb-27018.sock",
+            "unixDomainSocket": {"filePermissions": "0766"},
+        }
+    )
+    # config server is already using 27017
+    net_config["port"] = Config.MONGOS_PORT
+    if max_connections:
+        net_config["maxIncomingConnections"] = max_connections
+
+    if tls_config:
+        net_config["tls"] = tls_config
+
+    mongos_config = {
+        "net": net_config,
+        # mongos running on the config server communicates through localhost
+        "sharding": {
+            "configDB": config_server_db or f"{config.replset}/localhost:{Config.MONGODB_PORT}"
+        },
+        "systemLog": {"logAppend": True, "logRotate": "reopen"},
+        # keyFile used for authentication replica set peers if no internal tls configured.
+        "security": security_config
+        or {"clusterAuthMode": "keyFile", "keyFile": f"{full_conf_dir}/{KEY_FILE}"},
+    }
+    if parameters:
+        mongos_config["setParameter"] = dict(parameters)
+
+    return mongos_config
 
 
 def generate_password() -> str:
@@ -342,3 +454,56 @@ def safe_exec(
     except subprocess.CalledProcessError as err:
         logger.error(f"cmd failed - {err.cmd}, {err.stdout}, {err.stderr}")
         raise
+
+
+def fan_out(
+    probe: Callable[[Target], ProbeResult],
+    targets: Iterable[Target],
+    max_workers: int = Config.Probe.MAX_WORKERS,
+    deadline: float = Config.Probe.DEADLINE,
+) -> Dict[Target, ProbeResult | Exception]:
+    """Runs the probe against all targets concurrently and collects the outcome of each target.
+
+    A bounded pool of threads is used, so that probing a large cluster does not open an unbounded
+    number of connections. The whole fan-out returns within `deadline` seconds, however many
+    targets are probed. Targets that did not complete in time are reported with a TimeoutError.
+    Targets not started yet are cancelled, while the threads of probes in progress are left to
+    finish on their own: they are still joined when the interpreter exits, so probes must enforce
+    their own connection and operation timeouts. Probes fanning out in turn should be given the
+    time left before the deadline.
+
+    Args:
+        probe: function called with a single target, its return value is the target result.
+        targets: hashable targets to probe, i.e. a shard name or a host.
+        max_workers: maximum number of targets probed at the same time.
+        deadline: number of seconds granted to probe all targets.
+
+    Returns:
+        A dictionary mapping each target to its result or to the exception raised by the probe.
+    """
+    targets = list(dict.fromkeys(targets))
+    if not targets:
+        return {}
+
+    results = {}
+    executor = ThreadPoolExecutor(
+        max_workers=min(max_workers, len(targets)), thread_name_prefix="fan-out"
+    )
+    futures = {executor.submit(probe, target): target for target in targets}
+    try:
+        wait(futures, timeout=deadline)
+        for future, target in futures.items():
+            if not future.done():
+                results[target] = TimeoutError(
+                    f"probe of {target} did not complete within {deadline}s"
+                )
+                continue
+
+            try:
+                results[target] = future.result()
+            except Exception as e:
+                results[target] = e
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
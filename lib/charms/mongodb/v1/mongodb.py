@@ -4,11 +4,18 @@
 # See LICENSE file for licensing details.
 
 import logging
-from typing import Dict, Set
+import time
+from copy import deepcopy
+from typing import Dict, List, Optional, Set, Tuple
 
 from bson.json_util import dumps
 from charms.mongodb.v0.mongo import MongoConfiguration, MongoConnection, NotReadyError
-from pymongo.errors import OperationFailure
+from pymongo.errors import (
+    ConnectionFailure,
+    ExecutionTimeout,
+    OperationFailure,
+    PyMongoError,
+)
 from tenacity import (
     RetryError,
     Retrying,
@@ -27,11 +34,38 @@ LIBAPI = 1
 
 # Increment this PATCH version before using `charmcraft publish-lib` or reset
 # to 0 if you are raising the major API version
-LIBPATCH = 3
+LIBPATCH = 18
 
 # path to store mongodb ketFile
 logger = logging.getLogger(__name__)
 
+# states of members that are still syncing data from other members
+SYNCING_STATES = ("STARTUP", "STARTUP2", "ROLLBACK", "RECOVERING")
+# databases of the server itself, never pre-warmed nor compacted
+INTERNAL_DATABASES = ("admin", "local", "config")
+
+# seconds a stepped down primary is not electable
+STEP_DOWN_SECS = 60
+# seconds the primary waits for an electable secondary to catch up before stepping down
+STEP_DOWN_CATCH_UP_SECS = 10
+# maximum lag in seconds of the electable secondary before stepping down
+STEP_DOWN_MAX_LAG = 2
+# seconds to wait for an electable secondary to be within the maximum lag
+STEP_DOWN_LAG_TIMEOUT = 60
+# client operations waited for before shutting down, replication and internal operations are
+# not waited for, nor the awaitable hello and getMore commands drivers keep open to monitor the
+# topology or tail cursors
+ACTIVE_OPERATIONS_FILTER = {
+    "active": True,
+    "client": {"$exists": True},
+    "ns": {"$ne": "local.oplog.rs"},
+    "command.currentOp": {"$exists": False},
+    "command.hello": {"$exists": False},
+    "command.isMaster": {"$exists": False},
+    "command.ismaster": {"$exists": False},
+    "command.maxAwaitTimeMS": {"$exists": False},
+}
+
 
 class FailedToMovePrimaryError(Exception):
     """Raised when attempt to move a primary fails."""
@@ -75,9 +109,12 @@ class MongoDBConnection(MongoConnection):
         reraise=True,
         before=before_log(logger, logging.DEBUG),
     )
-    def init_replset(self) -> None:
+    def init_replset(self, settings: Optional[Dict] = None) -> None:
         """Create replica set config the first time.
 
+        Args:
+            settings: election and heartbeat settings of the replica set.
+
         Raises:
             ConfigurationError, ConfigurationError, OperationFailure
         """
@@ -85,6 +122,8 @@ class MongoDBConnection(MongoConnection):
             "_id": self.config.replset,
             "members": [{"_id": i, "host": h} for i, h in enumerate(self.config.hosts)],
         }
+        if settings:
+            config["settings"] = settings
         try:
             self.client.admin.command("replSetInitiate", config)
         except OperationFailure as e:
@@ -180,7 +219,7 @@ class MongoDBConnection(MongoConnection):
         # avoid downtime we need to reelect new primary if removable member is the primary.
         logger.debug("primary: %r", self._is_primary(rs_status, hostname))
         if self._is_primary(rs_status, hostname):
-            self.client.admin.command("replSetStepDown", {"stepDownSecs": "60"})
+            self.step_down_primary()
 
         rs_config["config"]["version"] += 1
         rs_config["config"]["members"][:] = [
@@ -191,13 +230,99 @@ class MongoDBConnection(MongoConnection):
         logger.debug("rs_config: %r", dumps(rs_config["config"]))
         self.client.admin.command("replSetReconfig", rs_config["config"])
 
-    def step_down_primary(self) -> None:
-        """Steps down the current primary, forcing a re-election."""
-        self.client.admin.command("replSetStepDown", {"stepDownSecs": "60"})
+    def step_down_primary(self, candidate: Optional[str] = None) -> Optional[float]:
+        """Steps down the current primary, forcing a re-election.
+
+        The primary only steps down once an electable secondary is close to caught up, so that
+        the election does not wait for the secondaries to replicate a long backlog.
+
+        Args:
+            candidate: hostname of the secondary that should catch up, defaults to the most
+                caught up electable secondary.
+
+        Returns:
+            Seconds during which the replica set had no primary, None if no new primary was
+            elected in time.
+
+        Raises:
+            ConfigurationError, ConfigurationError, OperationFailure
+        """
+        old_primary = self.primary()
+        self.wait_for_step_down_candidate(candidate)
+
+        started = time.monotonic()
+        self.client.admin.command(
+            "replSetStepDown",
+            {
+                "stepDownSecs": STEP_DOWN_SECS,
+                "secondaryCatchUpPeriodSecs": STEP_DOWN_CATCH_UP_SECS,
+            },
+        )
+
+        try:
+            for attempt in Retrying(
+                stop=stop_after_delay(STEP_DOWN_SECS), wait=wait_fixed(0.5), reraise=True
+            ):
+                with attempt:
+                    new_primary = self.primary()
+                    if new_primary in (None, old_primary):
+                        raise NotReadyError
+        except (NotReadyError, PyMongoError):
+            logger.warning("No new primary elected %ss after stepping down.", STEP_DOWN_SECS)
+            return None
+
+        unavailable = time.monotonic() - started
+        logger.info(
+            "Primary %s stepped down, %s elected, writes unavailable for %.1fs",
+            old_primary,
+            new_primary,
+            unavailable,
+        )
+        return unavailable
+
+    def wait_for_step_down_candidate(self, candidate: Optional[str] = None) -> Optional[str]:
+        """Waits until an electable secondary lags less than `STEP_DOWN_MAX_LAG` seconds.
+
+        Args:
+            candidate: hostname of the secondary to wait for, defaults to the most caught up
+                electable secondary.
+
+        Returns:
+            The hostname of the caught up secondary, None if none caught up in time.
+
+        Raises:
+            ConfigurationError, ConfigurationError, OperationFailure
+        """
+        try:
+            for attempt in Retrying(
+                stop=stop_after_delay(STEP_DOWN_LAG_TIMEOUT), wait=wait_fixed(1), reraise=True
+            ):
+                with attempt:
+                    hostname, lag = self._get_step_down_candidate(
+                        self.client.admin.command("replSetGetStatus"),
+                        self.client.admin.command("replSetGetConfig")["config"],
+                        candidate,
+                    )
+                    if lag is None or lag > STEP_DOWN_MAX_LAG:
+                        raise NotReadyError
+        except NotReadyError:
+            logger.warning(
+                "No electable secondary within %ss of the primary, stepping down anyway.",
+                STEP_DOWN_MAX_LAG,
+            )
+            return None
+
+        logger.debug("%s lags %.1fs behind the primary", hostname, lag)
+        return hostname
 
     def move_primary(self, new_primary_ip: str) -> None:
         """Forcibly moves the primary to the new primary provided.
 
+        The other members are given a lower election priority while the primary moves. Their
+        original priorities are restored afterwards only if the new primary holds the highest of
+        them, a higher priority member would otherwise take the primary back within seconds. The
+        charm restores the priorities of the placement policy once the upgrade finished.
+
         Args:
             new_primary_ip: ip address of the unit chosen to be the new primary.
         """
@@ -207,21 +332,38 @@ class MongoDBConnection(MongoConnection):
             # it can take a while, we should defer
             raise NotReadyError
 
+        # the priorities set by the charm, i.e. for the primary placement or pre-warming members
+        original_priorities = {
+            self._hostname_from_hostport(member["host"]): member.get("priority", 1)
+            for member in self.client.admin.command("replSetGetConfig")["config"]["members"]
+        }
         is_move_successful = True
-        self.set_replicaset_election_priority(priority=0.5, ignore_member=new_primary_ip)
+        self.set_replicaset_member_priorities(
+            {
+                hostname: min(priority, 0.5)
+                for hostname, priority in original_priorities.items()
+                if hostname != new_primary_ip
+            }
+        )
         try:
+            self.step_down_primary(candidate=new_primary_ip)
+            # the new primary takes over once caught up if another member won the election, as
+            # it has the highest priority.
             for attempt in Retrying(stop=stop_after_delay(180), wait=wait_fixed(3)):
                 with attempt:
-                    self.step_down_primary()
                     if self.primary() != new_primary_ip:
                         raise FailedToMovePrimaryError
-        except RetryError:
+        except (RetryError, PyMongoError):
             # catch all possible exceptions when failing to step down primary. We do this in order
             # to ensure that we reset the replica set election priority.
             is_move_successful = False
 
-        # reset all replicas to the same priority
-        self.set_replicaset_election_priority(priority=1)
+        if is_move_successful and original_priorities.get(new_primary_ip, 1) < max(
+            original_priorities.values()
+        ):
+            logger.info("Keeping the lowered priorities until the upgrade finished.")
+        else:
+            self.set_replicaset_member_priorities(original_priorities)
 
         if not is_move_successful:
             raise FailedToMovePrimaryError
@@ -230,24 +372,79 @@ class MongoDBConnection(MongoConnection):
         """Set the election priority for the entire replica set."""
         rs_config = self.client.admin.command("replSetGetConfig")
         rs_config = rs_config["config"]
-        rs_config["version"] += 1
 
         # keep track of the original configuration before setting the priority, reconfiguring the
         # replica set can result in primary re-election, which would would like to avoid when
         # possible.
-        original_rs_config = rs_config
+        original_rs_config = deepcopy(rs_config)
 
         for member in rs_config["members"]:
-            if member["host"] == ignore_member:
+            if ignore_member in (member["host"], self._hostname_from_hostport(member["host"])):
                 continue
 
             member["priority"] = priority
 
+        self._reconfigure_replset(original_rs_config, rs_config)
+
+    def set_replicaset_member_priorities(
+        self, priorities: Dict[str, float], tags: Optional[Dict[str, Dict[str, str]]] = None
+    ) -> bool:
+        """Set the election priority and the tags of the given members of the replica set.
+
+        Args:
+            priorities: election priority by member hostname, members not listed keep their
+                priority.
+            tags: tags to set by member hostname, other tags of the members are kept.
+
+        Returns:
+            True if the replica set was reconfigured.
+        """
+        rs_config = self.client.admin.command("replSetGetConfig")
+        rs_config = rs_config["config"]
+        original_rs_config = deepcopy(rs_config)
+
+        tags = tags or {}
+        for member in rs_config["members"]:
+            hostname = self._hostname_from_hostport(member["host"])
+            if hostname in priorities:
+                member["priority"] = priorities[hostname]
+            if hostname in tags:
+                member["tags"] = {**member.get("tags", {}), **tags[hostname]}
+
+        return self._reconfigure_replset(original_rs_config, rs_config)
+
+    def set_replicaset_settings(self, settings: Dict) -> bool:
+        """Set the election and heartbeat settings of the replica set.
+
+        Args:
+            settings: replica set settings to update, e.g. `electionTimeoutMillis`.
+
+        Returns:
+            True if the replica set was reconfigured.
+
+        Raises:
+            ConfigurationError, ConfigurationError, OperationFailure
+        """
+        rs_config = self.client.admin.command("replSetGetConfig")
+        rs_config = rs_config["config"]
+        original_rs_config = deepcopy(rs_config)
+
+        rs_config.setdefault("settings", {}).update(settings)
+        return self._reconfigure_replset(original_rs_config, rs_config)
+
+    def _reconfigure_replset(self, original_rs_config: Dict, rs_config: Dict) -> bool:
+        """Reconfigures the replica set if its configuration changed.
+
+        Returns:
+            True if the replica set was reconfigured.
+        """
         if original_rs_config == rs_config:
-            return
+            return False
 
+        rs_config["version"] += 1
         logger.debug("rs_config: %r", rs_config)
         self.client.admin.command("replSetReconfig", rs_config)
+        return True
 
     def _is_primary(self, rs_status: Dict, hostname: str) -> bool:
         """Returns True if passed host is the replica set primary.
@@ -275,6 +472,367 @@ class MongoDBConnection(MongoConnection):
 
         return primary
 
+    def get_replset_member_lag(self, hostname: str) -> Optional[float]:
+        """Returns how many seconds a member is behind the primary.
+
+        Args:
+            hostname: host of interest.
+
+        Returns:
+            The replication lag of the member in seconds or None if the member is not a healthy
+            data bearing member or if the replica set has no primary.
+
+        Raises:
+            ConfigurationError, ConfigurationError, OperationFailure
+        """
+        rs_status = self.client.admin.command("replSetGetStatus")
+        primary_optime = None
+        member_optime = None
+        for member in rs_status["members"]:
+            if member["stateStr"] == "PRIMARY":
+                primary_optime = member["optimeDate"]
+
+            if hostname != self._hostname_from_hostport(member["name"]):
+                continue
+
+            if member["stateStr"] not in ("PRIMARY", "SECONDARY"):
+                return None
+            member_optime = member["optimeDate"]
+
+        if primary_optime is None or member_optime is None:
+            return None
+
+        return max(0.0, (primary_optime - member_optime).total_seconds())
+
+    def get_initial_sync_progress(self) -> Optional[Dict]:
+        """Returns the progress of the initial sync of the connected member.
+
+        The progress is only reported by the syncing member, i.e. on a direct connection.
+
+        Returns:
+            None if the member is not running an initial sync, otherwise a dictionary with the
+            number of databases cloned and left to clone, the bytes copied out of the total, the
+            seconds elapsed, the copy rate in bytes per second and the estimated seconds
+            remaining, None until the copy rate is known.
+
+        Raises:
+            ConfigurationError, ConfigurationError, OperationFailure
+        """
+        rs_status = self.client.admin.command("replSetGetStatus")
+        if not rs_status.get("initialSyncStatus"):
+            return None
+
+        return self._get_initial_sync_progress(rs_status["initialSyncStatus"])
+
+    @staticmethod
+    def _get_initial_sync_progress(sync_status: Dict) -> Dict:
+        """Returns the progress of an initial sync from its `initialSyncStatus`."""
+        databases = sync_status.get("databases", {})
+        bytes_copied = sync_status.get("approxTotalBytesCopied", 0)
+        bytes_total = sync_status.get("approxTotalDataSize", 0)
+        elapsed = sync_status.get("totalInitialSyncElapsedMillis", 0) / 1000
+        rate = bytes_copied / elapsed if elapsed else 0.0
+
+        # mongod estimates the remaining time from 4.4
+        if "remainingInitialSyncEstimatedMillis" in sync_status:
+            eta = sync_status["remainingInitialSyncEstimatedMillis"] / 1000
+        elif rate:
+            eta = max(0, bytes_total - bytes_copied) / rate
+        else:
+            eta = None
+
+        return {
+            "databases_cloned": databases.get("databasesCloned", 0),
+            "databases_to_clone": databases.get("databasesToClone", 0),
+            "bytes_copied": bytes_copied,
+            "bytes_total": bytes_total,
+            "elapsed": elapsed,
+            "rate": rate,
+            "eta": eta,
+            "failed_attempts": sync_status.get("failedInitialSyncAttempts", 0),
+        }
+
+    def compact_collections(self) -> int:
+        """Compacts the collections of the connected member to release their free space.
+
+        Compaction blocks the writes to each collection while it runs, it should only run on a
+        secondary over a direct connection.
+
+        Returns:
+            The number of bytes released to the filesystem.
+
+        Raises:
+            ConfigurationError, ConfigurationError, OperationFailure
+        """
+        freed = 0
+        for database in self.client.list_database_names():
+            if database in INTERNAL_DATABASES:
+                continue
+
+            for collection in self.client[database].list_collection_names(
+                filter={"type": "collection"}
+            ):
+                if collection.startswith("system."):
+                    continue
+
+                result = self.client[database].command("compact", collection)
+                logger.debug("Compacted %s.%s: %r", database, collection, result)
+                freed += result.get("bytesFreed", 0)
+
+        return freed
+
+    def get_flow_control_status(self) -> Dict:
+        """Returns the flow control state of the connected member.
+
+        Flow control is only enforced on the primary, which throttles writes when the majority
+        commit point lags behind.
+
+        Returns:
+            A dictionary with whether flow control is enabled, whether the majority commit point
+            lags behind the target, the number of times it lagged, the target rate of writes in
+            locks per second and the seconds writes spent waiting for flow control tickets.
+
+        Raises:
+            ConfigurationError, ConfigurationError, OperationFailure
+        """
+        flow_control = self.client.admin.command("serverStatus").get("flowControl", {})
+        return {
+            "enabled": flow_control.get("enabled", False),
+            "is_lagged": flow_control.get("isLagged", False),
+            "is_lagged_count": flow_control.get("isLaggedCount", 0),
+            "target_rate": flow_control.get("targetRateLimit", 0),
+            "time_acquiring": flow_control.get("timeAcquiringMicros", 0) / 1_000_000,
+        }
+
+    def get_oplog_stats(self) -> Dict:
+        """Returns the size of the oplog of the connected member and the time span it holds.
+
+        Returns:
+            A dictionary with the maximum size and the used size of the oplog in bytes, and the
+            time between its oldest and newest entries in seconds.
+
+        Raises:
+            ConfigurationError, ConfigurationError, OperationFailure
+        """
+        local = self.client["local"]
+        stats = local.command("collStats", "oplog.rs")
+        oldest = local["oplog.rs"].find_one(sort=[("$natural", 1)], projection={"ts": 1})
+        newest = local["oplog.rs"].find_one(sort=[("$natural", -1)], projection={"ts": 1})
+        window = newest["ts"].time - oldest["ts"].time if oldest and newest else 0
+        return {"max_size": stats["maxSize"], "size": stats["size"], "window": window}
+
+    def resize_oplog(
+        self, size_mb: Optional[float] = None, min_retention_hours: Optional[float] = None
+    ) -> None:
+        """Resizes the oplog of the connected member and sets its minimum retention period.
+
+        Raises:
+            ConfigurationError, ConfigurationError, OperationFailure
+        """
+        command = {"replSetResizeOplog": 1}
+        if size_mb is not None:
+            command["size"] = float(size_mb)
+        if min_retention_hours is not None:
+            command["minRetentionHours"] = float(min_retention_hours)
+
+        self.client.admin.command(command)
+
+    def get_active_operations_count(self) -> int:
+        """Returns the number of client operations in progress on the connected member.
+
+        Raises:
+            ConfigurationError, ConfigurationError, OperationFailure
+        """
+        operations = self.client.admin.command({"currentOp": True, **ACTIVE_OPERATIONS_FILTER})
+        return len(operations["inprog"])
+
+    def drain_operations(self, timeout: int) -> Tuple[int, int]:
+        """Waits until the client operations in progress on the connected member completed.
+
+        Args:
+            timeout: maximum number of seconds to wait.
+
+        Returns:
+            The number of operations in progress when draining started and the number of
+            operations still in progress once drained or timed out.
+
+        Raises:
+            ConfigurationError, ConfigurationError, OperationFailure
+        """
+        active = initial = self.get_active_operations_count()
+        try:
+            for attempt in Retrying(
+                stop=stop_after_delay(timeout), wait=wait_fixed(1), reraise=True
+            ):
+                with attempt:
+                    active = self.get_active_operations_count()
+                    if active:
+                        raise NotReadyError
+        except NotReadyError:
+            pass
+
+        return initial, active
+
+    def shutdown(self, timeout: int) -> None:
+        """Shuts down the connected member.
+
+        Args:
+            timeout: seconds during which the member reports that it is shutting down, so that
+                clients route new operations to the other members, before it shuts down.
+
+        Raises:
+            ConfigurationError, ConfigurationError, OperationFailure
+        """
+        try:
+            self.client.admin.command("shutdown", timeoutSecs=timeout)
+        except ConnectionFailure:
+            # the member closes the connection as it shuts down
+            pass
+
+    def get_hot_collections(self, limit: int) -> List[Dict]:
+        """Returns the most used collections of the connected member and their used indexes.
+
+        Args:
+            limit: maximum number of collections to return.
+
+        Returns:
+            The namespaces of the most used collections, most used first, with the names of their
+            indexes that were used, most used first.
+
+        Raises:
+            ConfigurationError, ConfigurationError, OperationFailure
+        """
+        usage = []
+        for namespace, stats in self.client.admin.command("top")["totals"].items():
+            database, _, collection = namespace.partition(".")
+            if (
+                not collection
+                or database in INTERNAL_DATABASES
+                or collection.startswith("system.")
+            ):
+                continue
+
+            usage.append((stats["total"]["count"], namespace))
+
+        hot_collections = []
+        for _, namespace in sorted(usage, reverse=True)[:limit]:
+            database, _, collection = namespace.partition(".")
+            try:
+                index_stats = list(
+                    self.client[database][collection].aggregate([{"$indexStats": {}}])
+                )
+            except OperationFailure as e:
+                logger.debug("Failed to get the index usage of %s, error: %r", namespace, e)
+                continue
+
+            index_stats.sort(key=lambda index: index["accesses"]["ops"], reverse=True)
+            hot_collections.append(
+                {
+                    "ns": namespace,
+                    "indexes": [
+                        index["name"] for index in index_stats if index["accesses"]["ops"] > 0
+                    ],
+                }
+            )
+
+        return hot_collections
+
+    def prewarm_collections(self, collections: List[Dict], timeout: float, max_bytes: int) -> int:
+        """Loads the used indexes and the documents of the collections in the cache.
+
+        Indexes are loaded before the documents of their collection, and collections in order,
+        until the time or the size budget is exhausted.
+
+        Args:
+            collections: collections as returned by `get_hot_collections`.
+            timeout: maximum number of seconds to spend loading.
+            max_bytes: maximum uncompressed size of the indexes and documents to load.
+
+        Returns:
+            The uncompressed size of the indexes and documents loaded.
+
+        Raises:
+            ConfigurationError, ConfigurationError, OperationFailure
+        """
+        deadline = time.monotonic() + timeout
+        loaded = 0
+        for hot_collection in collections:
+            database, _, collection = hot_collection["ns"].partition(".")
+            try:
+                stats = self.client[database].command("collStats", collection)
+            except OperationFailure as e:
+                logger.debug("Failed to get the size of %s, error: %r", hot_collection["ns"], e)
+                continue
+
+            index_sizes = stats.get("indexSizes", {})
+            scans = [(index, index_sizes.get(index, 0)) for index in hot_collection["indexes"]]
+            scans.append(({"$natural": 1}, stats.get("size", 0)))
+            for hint, size in scans:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or loaded + size > max_bytes:
+                    return loaded
+
+                # counting reads the whole index, or every document for a natural order scan
+                try:
+                    list(
+                        self.client[database][collection].aggregate(
+                            [{"$count": "count"}], hint=hint, maxTimeMS=int(remaining * 1000)
+                        )
+                    )
+                except ExecutionTimeout:
+                    return loaded
+                except OperationFailure as e:
+                    logger.debug(
+                        "Failed to load %s of %s, error: %r", hint, hot_collection["ns"], e
+                    )
+                    continue
+
+                loaded += size
+
+        return loaded
+
+    @classmethod
+    def _get_step_down_candidate(
+        cls, rs_status: Dict, rs_config: Dict, candidate: Optional[str] = None
+    ) -> Tuple[Optional[str], Optional[float]]:
+        """Returns the most caught up electable secondary and its lag in seconds.
+
+        Args:
+            rs_status: current state of replica set as reported by mongod.
+            rs_config: current configuration of the replica set.
+            candidate: only consider the secondary with this hostname.
+        """
+        electable = {
+            cls._hostname_from_hostport(member["host"])
+            for member in rs_config["members"]
+            if member.get("priority", 1) > 0
+            and not member.get("hidden", False)
+            and not member.get("arbiterOnly", False)
+        }
+
+        primary_optime = None
+        best, best_optime = None, None
+        for member in rs_status["members"]:
+            hostname = cls._hostname_from_hostport(member["name"])
+            if member["stateStr"] == "PRIMARY":
+                primary_optime = member["optimeDate"]
+                continue
+
+            if (
+                member["stateStr"] != "SECONDARY"
+                or hostname not in electable
+                or (candidate and hostname != candidate)
+            ):
+                continue
+
+            if best_optime is None or member["optimeDate"] > best_optime:
+                best, best_optime = hostname, member["optimeDate"]
+
+        if primary_optime is None or best_optime is None:
+            return best, None
+
+        return best, max(0.0, (primary_optime - best_optime).total_seconds())
+
     @staticmethod
     def is_any_sync(rs_status: Dict) -> bool:
         """Returns true if any replica set members are syncing data.
@@ -285,10 +843,7 @@ class MongoDBConnection(MongoConnection):
         Args:
             rs_status: current state of replica set as reported by mongod.
         """
-        return any(
-            member["stateStr"] in ["STARTUP", "STARTUP2", "ROLLBACK", "RECOVERING"]
-            for member in rs_status["members"]
-        )
+        return any(member["stateStr"] in SYNCING_STATES for member in rs_status["members"])
 
     @staticmethod
     def _is_any_removing(rs_status: Dict) -> bool:
@@ -37,7 +37,7 @@ LIBAPI = 1
 
 # Increment this PATCH version before using `charmcraft publish-lib` or reset
 # to 0 if you are raising the major API version
-LIBPATCH = 15
+LIBPATCH = 16
 
 logger = logging.getLogger(__name__)
 REL_NAME = "database"
@@ -358,6 +358,33 @@ class MongoDBProvider(Object):
                     config.uri,
                 )
 
+    def update_default_rw_concern(self) -> None:
+        """Shares the cluster-wide default read and write concerns with the clients."""
+        if not self.charm.unit.is_leader():
+            return
+
+        for relation in self._get_relations():
+            self._set_default_rw_concern(relation)
+
+    def _set_default_rw_concern(self, relation: Relation) -> None:
+        """Shares the default read and write concerns in effect with a client."""
+        effective = self.charm.app_peer_data.get(Config.DefaultRWConcern.EFFECTIVE_KEY)
+        if not effective:
+            return
+
+        defaults = json.loads(effective)
+        self.database_provides.update_relation_data(
+            relation.id,
+            {
+                Config.DefaultRWConcern.READ_CONCERN_FIELD: defaults.get(
+                    "defaultReadConcern", {}
+                ).get("level", ""),
+                Config.DefaultRWConcern.WRITE_CONCERN_FIELD: json.dumps(
+                    defaults.get("defaultWriteConcern", {}), sort_keys=True
+                ),
+            },
+        )
+
     def _get_or_set_password(self, relation: Relation) -> str:
         """Retrieve password from cache or generate a new one.
 
@@ -412,6 +439,7 @@ class MongoDBProvider(Object):
 
         self.database_provides.set_credentials(relation.id, config.username, config.password)
         self.database_provides.set_database(relation.id, config.database)
+        self._set_default_rw_concern(relation)
 
         # relations with the mongos server should not connect though the config-server directly
         if self.charm.is_role(Config.Role.CONFIG_SERVER):
@@ -8,6 +8,7 @@ and expose needed information for client connection via fields in
 external relation.
 """
 import base64
+import hashlib
 import json
 import logging
 import re
@@ -23,11 +24,26 @@ from charms.tls_certificates_interface.v3.tls_certificates import (
 )
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
-from ops.charm import ActionEvent, RelationBrokenEvent, RelationJoinedEvent
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from ops.charm import (
+    ActionEvent,
+    ConfigChangedEvent,
+    RelationBrokenEvent,
+    RelationJoinedEvent,
+)
 from ops.framework import Object
-from ops.model import ActiveStatus, MaintenanceStatus, WaitingStatus
+from ops.model import (
+    ActiveStatus,
+    BlockedStatus,
+    MaintenanceStatus,
+    StatusBase,
+    WaitingStatus,
+)
+from pymongo.errors import PyMongoError
 
 from config import Config
+from exceptions import InvalidParametersError
 
 UNIT_SCOPE = Config.Relations.UNIT_SCOPE
 Scopes = Config.Relations.Scopes
@@ -42,9 +58,12 @@ LIBAPI = 1
 
 # Increment this PATCH version before using `charmcraft publish-lib` or reset
 # to 0 if you are raising the major API version
-LIBPATCH = 5
+LIBPATCH = 11
 
 WAIT_CERT_UPDATE = "wait-cert-updated"
+PRIVATE_KEY_TYPE_KEY = "tls-private-key-type"
+TRUSTED_CA_KEY = "trusted-ca"
+INVALID_KEY_TYPE_STATUS = "Invalid TLS private key type"
 
 logger = logging.getLogger(__name__)
 
@@ -72,6 +91,34 @@ class MongoDBTLS(Object):
         )
         self.framework.observe(self.certs.on.certificate_available, self._on_certificate_available)
         self.framework.observe(self.certs.on.certificate_expiring, self._on_certificate_expiring)
+        self.framework.observe(self.charm.on.config_changed, self._on_config_changed)
+        self.framework.observe(
+            self.charm.on[self.peer_relation].relation_changed, self.reconcile_ca_rollover
+        )
+
+    @property
+    def private_key_type(self) -> str:
+        """Returns the type of the private keys to generate.
+
+        Raises:
+            InvalidParametersError if the configured key type is not supported.
+        """
+        key_type = self.charm.model.config.get(
+            Config.TLS.PRIVATE_KEY_TYPE_CONFIG, Config.TLS.RSA_KEY_TYPE
+        )
+        if key_type not in [Config.TLS.RSA_KEY_TYPE, Config.TLS.ECDSA_KEY_TYPE]:
+            raise InvalidParametersError(
+                f"{key_type}, expected {Config.TLS.RSA_KEY_TYPE} or {Config.TLS.ECDSA_KEY_TYPE}"
+            )
+
+        return key_type
+
+    def get_private_key_type_status(self) -> Optional[StatusBase]:
+        """Returns a blocked status if the configured private key type is not supported."""
+        try:
+            _ = self.private_key_type
+        except InvalidParametersError as e:
+            return BlockedStatus(f"{INVALID_KEY_TYPE_STATUS}: {e}")
 
     def is_tls_enabled(self, internal: bool):
         """Returns a boolean indicating if TLS for a given internal/external is enabled."""
@@ -92,6 +139,15 @@ class MongoDBTLS(Object):
             event.fail("Setting TLS key during an upgrade is not supported.")
             return
 
+        # keys are only generated for the certificates that were not given one
+        key_type_status = self.get_private_key_type_status()
+        if key_type_status and None in [
+            event.params.get("external-key"),
+            event.params.get("internal-key"),
+        ]:
+            event.fail(f"Cannot generate TLS keys. {key_type_status.message}")
+            return
+
         try:
             self.request_certificate(event.params.get("external-key", None), internal=False)
             self.request_certificate(event.params.get("internal-key", None), internal=True)
@@ -106,9 +162,11 @@ class MongoDBTLS(Object):
     ):
         """Request TLS certificate."""
         if param is None:
-            key = generate_private_key()
+            key = self.generate_private_key()
+            self.charm.unit_peer_data[PRIVATE_KEY_TYPE_KEY] = self.private_key_type
         else:
             key = self._parse_tls_file(param)
+            self.get_private_key_type(key)
 
         sans = self.get_new_sans()
         csr = generate_csr(
@@ -128,6 +186,44 @@ class MongoDBTLS(Object):
         self.certs.request_certificate_creation(certificate_signing_request=csr)
         self.set_waiting_for_cert_to_update(internal=internal, waiting=True)
 
+    def generate_private_key(self) -> bytes:
+        """Generates a private key of the configured type."""
+        if self.private_key_type == Config.TLS.RSA_KEY_TYPE:
+            return generate_private_key()
+
+        private_key = ec.generate_private_key(ec.SECP256R1())
+        return private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.TraditionalOpenSSL,
+            encryption_algorithm=serialization.NoEncryption(),
+        )
+
+    @staticmethod
+    def get_private_key_type(key: bytes) -> str:
+        """Returns the type of a private key.
+
+        Raises:
+            ValueError if the key cannot be used to request a certificate.
+        """
+        try:
+            private_key = serialization.load_pem_private_key(key, password=None)
+        except (ValueError, TypeError):
+            raise ValueError("Invalid private key, expected an unencrypted PEM key.")
+
+        if isinstance(private_key, rsa.RSAPrivateKey):
+            if private_key.key_size < Config.TLS.MIN_RSA_KEY_SIZE:
+                raise ValueError(
+                    f"RSA private keys must be at least {Config.TLS.MIN_RSA_KEY_SIZE} bits."
+                )
+            return Config.TLS.RSA_KEY_TYPE
+
+        if isinstance(private_key, ec.EllipticCurvePrivateKey):
+            if not isinstance(private_key.curve, (ec.SECP256R1, ec.SECP384R1)):
+                raise ValueError("ECDSA private keys must use the P-256 or P-384 curve.")
+            return Config.TLS.ECDSA_KEY_TYPE
+
+        raise ValueError("Unsupported private key type, expected an RSA or ECDSA key.")
+
     @staticmethod
     def _parse_tls_file(raw_content: str) -> bytes:
         """Parse TLS files from both plain text or base64 format."""
@@ -159,9 +255,48 @@ class MongoDBTLS(Object):
             event.defer()
             return
 
+        key_type_status = self.get_private_key_type_status()
+        if key_type_status:
+            logger.error("Not requesting certificates: %s", key_type_status.message)
+            self.charm.status.set_and_share_status(key_type_status)
+            event.defer()
+            return
+
         self.request_certificate(None, internal=True)
         self.request_certificate(None, internal=False)
 
+    def _on_config_changed(self, event: ConfigChangedEvent) -> None:
+        """Renew the certificates with new private keys when the key type changes."""
+        key_type_status = self.get_private_key_type_status()
+        if key_type_status:
+            logger.error("Not renewing certificates: %s", key_type_status.message)
+            self.charm.status.set_and_share_status(key_type_status)
+            return
+
+        if self.charm.unit.status.message.startswith(INVALID_KEY_TYPE_STATUS):
+            self.charm.status.set_and_share_status(ActiveStatus())
+
+        # keys generated before the key type was configurable are RSA keys
+        current_key_type = self.charm.unit_peer_data.get(
+            PRIVATE_KEY_TYPE_KEY, Config.TLS.RSA_KEY_TYPE
+        )
+        if current_key_type == self.private_key_type:
+            return
+
+        if self.charm.upgrade_in_progress:
+            logger.warning("Changing the TLS private key type during an upgrade is not supported.")
+            event.defer()
+            return
+
+        for internal in [True, False]:
+            if not self.is_tls_enabled(internal):
+                continue
+
+            logger.info("Renewing certificate with a new %s private key.", self.private_key_type)
+            self.request_new_certificates(internal, key=self.generate_private_key())
+
+        self.charm.unit_peer_data[PRIVATE_KEY_TYPE_KEY] = self.private_key_type
+
     def _on_tls_relation_broken(self, event: RelationBrokenEvent) -> None:
         """Disable TLS when TLS relation broken."""
         if not self.charm.db_initialised:
@@ -178,8 +313,11 @@ class MongoDBTLS(Object):
 
         for internal in [True, False]:
             self.set_tls_secret(internal, Config.TLS.SECRET_CA_LABEL, None)
+            self.set_tls_secret(internal, Config.TLS.SECRET_PREVIOUS_CA_LABEL, None)
             self.set_tls_secret(internal, Config.TLS.SECRET_CERT_LABEL, None)
             self.set_tls_secret(internal, Config.TLS.SECRET_CHAIN_LABEL, None)
+            scope = "int" if internal else "ext"
+            self.charm.unit_peer_data.pop(f"{scope}-{TRUSTED_CA_KEY}", None)
 
         if self.charm.is_role(Config.Role.CONFIG_SERVER):
             self.charm.cluster.update_ca_secret(new_ca=None)
@@ -205,19 +343,16 @@ class MongoDBTLS(Object):
             event.defer()
             return
 
-        int_csr = self.get_tls_secret(internal=True, label_name=Config.TLS.SECRET_CSR_LABEL)
-        ext_csr = self.get_tls_secret(internal=False, label_name=Config.TLS.SECRET_CSR_LABEL)
-
-        if ext_csr and event.certificate_signing_request.rstrip() == ext_csr.rstrip():
-            logger.debug("The external TLS certificate available.")
-            internal = False
-        elif int_csr and event.certificate_signing_request.rstrip() == int_csr.rstrip():
-            logger.debug("The internal TLS certificate available.")
-            internal = True
-        else:
+        internal = self.get_certificate_scope(event.certificate_signing_request)
+        if internal is None:
             logger.error("An unknown certificate is available -- ignoring.")
             return
 
+        # renewed certificates do not change the configuration of the replica set, members can
+        # then load them without restarting all together
+        is_renewal = not self.is_waiting_for_both_certs()
+        previous_ca = self.get_tls_secret(internal, Config.TLS.SECRET_CA_LABEL)
+
         self.set_tls_secret(
             internal,
             Config.TLS.SECRET_CHAIN_LABEL,
@@ -238,6 +373,47 @@ class MongoDBTLS(Object):
             event.defer()
             return
 
+        if is_renewal and self.is_rolling_restart_supported():
+            self._on_certificate_renewed(internal, previous_ca, event.ca)
+            return
+
+        self._enable_tls()
+
+    def get_certificate_scope(self, certificate_signing_request: str) -> Optional[bool]:
+        """Returns whether a certificate is internal, None if it was not requested by this unit."""
+        int_csr = self.get_tls_secret(internal=True, label_name=Config.TLS.SECRET_CSR_LABEL)
+        ext_csr = self.get_tls_secret(internal=False, label_name=Config.TLS.SECRET_CSR_LABEL)
+
+        if ext_csr and certificate_signing_request.rstrip() == ext_csr.rstrip():
+            logger.debug("The external TLS certificate available.")
+            return False
+
+        if int_csr and certificate_signing_request.rstrip() == int_csr.rstrip():
+            logger.debug("The internal TLS certificate available.")
+            return True
+
+        return None
+
+    def _on_certificate_renewed(
+        self, internal: bool, previous_ca: Optional[str], new_ca: str
+    ) -> None:
+        """Loads a renewed certificate, trusting both CAs if the CA changed.
+
+        The members receive their certificates signed by the new CA one after the other. Each
+        member trusts both the previous and the new CA until all of them trust the new CA, the
+        previous CA is then dropped in a second pass.
+        """
+        if previous_ca is not None and previous_ca.rstrip() != new_ca.rstrip():
+            logger.info(
+                "The CA changed, trusting the previous CA until all members trust the new CA."
+            )
+            self.set_tls_secret(internal, Config.TLS.SECRET_PREVIOUS_CA_LABEL, previous_ca)
+
+        self.load_certificates()
+        self.reconcile_ca_rollover()
+
+    def _enable_tls(self) -> None:
+        """Restarts the services with TLS enabled."""
         logger.info("Restarting mongod with TLS enabled.")
 
         self.charm.delete_tls_certificate_from_workload()
@@ -253,6 +429,50 @@ class MongoDBTLS(Object):
             # clear waiting status if db service is ready
             self.charm.status.set_and_share_status(ActiveStatus())
 
+    def load_certificates(self) -> None:
+        """Pushes the certificates and loads them, restarting one member at a time if needed."""
+        self.charm.push_tls_certificate_to_workload()
+        if self.rotate_certificates():
+            return
+
+        logger.info("Requesting a rolling restart of mongod with the renewed certificates.")
+        self.charm.rolling_restart.request_restart()
+
+    def reconcile_ca_rollover(self, _=None) -> None:
+        """Publishes the CA this unit trusts and drops the previous CA once all members trust it."""
+        if not self.is_rolling_restart_supported() or not self.charm.peers:
+            return
+
+        # the certificates pushed to the workload are not loaded until this unit restarts
+        if self.charm.rolling_restart.restart_state == Config.RollingRestart.REQUESTED:
+            return
+
+        for internal in [True, False]:
+            self._reconcile_ca_rollover(internal)
+
+    def _reconcile_ca_rollover(self, internal: bool) -> None:
+        """Drops the previous CA of a scope once all members trust the new CA."""
+        ca = self.get_tls_secret(internal, Config.TLS.SECRET_CA_LABEL)
+        if ca is None:
+            return
+
+        scope = "int" if internal else "ext"
+        trusted_ca_key = f"{scope}-{TRUSTED_CA_KEY}"
+        ca_digest = hashlib.sha256(ca.rstrip().encode("utf-8")).hexdigest()
+        self.charm.unit_peer_data[trusted_ca_key] = ca_digest
+
+        if not self.get_tls_secret(internal, Config.TLS.SECRET_PREVIOUS_CA_LABEL):
+            return
+
+        for unit in [self.charm.unit, *self.charm.peers_units]:
+            if self.charm.peers.data[unit].get(trusted_ca_key) != ca_digest:
+                logger.debug("Waiting for %s to trust the new CA.", unit.name)
+                return
+
+        logger.info("All members trust the new CA, dropping the previous CA.")
+        self.set_tls_secret(internal, Config.TLS.SECRET_PREVIOUS_CA_LABEL, None)
+        self.load_certificates()
+
     def is_waiting_for_both_certs(self) -> bool:
         """Returns a boolean indicating whether additional certs are needed."""
         if not self.get_tls_secret(internal=True, label_name=Config.TLS.SECRET_CERT_LABEL):
@@ -264,6 +484,26 @@ class MongoDBTLS(Object):
 
         return False
 
+    def is_rolling_restart_supported(self) -> bool:
+        """Returns whether the members of the replica set restart one at a time."""
+        # mongos is stateless and restarts without coordination
+        return self.substrate == Config.Substrate.VM and not self.charm.is_role(Config.Role.MONGOS)
+
+    def rotate_certificates(self) -> bool:
+        """Loads the renewed certificates in the running services.
+
+        Returns:
+            Whether the certificates were loaded without a restart.
+        """
+        logger.info("Rotating the TLS certificates of the running services.")
+        try:
+            self.charm.rotate_certificates()
+        except PyMongoError as e:
+            logger.error("Failed to rotate the TLS certificates, error: %r", e)
+            return False
+
+        return True
+
     def _on_certificate_expiring(self, event: CertificateExpiringEvent) -> None:
         """Request the new certificate when old certificate is expiring."""
         if self.charm.is_role(Config.Role.MONGOS) and not self.charm.has_config_server():
@@ -294,9 +534,18 @@ class MongoDBTLS(Object):
         logger.debug("Generating a new Certificate Signing Request.")
         self.request_new_certificates(internal)
 
-    def request_new_certificates(self, internal: bool) -> None:
-        """Requests the renewel of a new certificate."""
-        key = self.get_tls_secret(internal, Config.TLS.SECRET_KEY_LABEL).encode("utf-8")
+    def request_new_certificates(self, internal: bool, key: Optional[bytes] = None) -> None:
+        """Requests the renewel of a new certificate.
+
+        Args:
+            internal: whether the internal or external certificate is renewed.
+            key: new private key for the certificate, the current key is used if not provided.
+        """
+        if key is None:
+            key = self.get_tls_secret(internal, Config.TLS.SECRET_KEY_LABEL).encode("utf-8")
+        else:
+            self.set_tls_secret(internal, Config.TLS.SECRET_KEY_LABEL, key.decode("utf-8"))
+
         old_csr = self.get_tls_secret(internal, Config.TLS.SECRET_CSR_LABEL).encode("utf-8")
         sans = self.get_new_sans()
         new_csr = generate_csr(
@@ -378,6 +627,9 @@ class MongoDBTLS(Object):
         ca = self.get_tls_secret(internal, Config.TLS.SECRET_CA_LABEL)
         chain = self.get_tls_secret(internal, Config.TLS.SECRET_CHAIN_LABEL)
         ca_file = chain if chain else ca
+        # members still presenting certificates of the previous CA remain trusted during a rollover
+        if previous_ca := self.get_tls_secret(internal, Config.TLS.SECRET_PREVIOUS_CA_LABEL):
+            ca_file = f"{ca_file}\n{previous_ca}"
 
         key = self.get_tls_secret(internal, Config.TLS.SECRET_KEY_LABEL)
         cert = self.get_tls_secret(internal, Config.TLS.SECRET_CERT_LABEL)
@@ -4,7 +4,7 @@
 # See LICENSE file for licensing details.
 
 import logging
-from typing import List, Optional, Set, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 from charms.mongodb.v0.mongo import MongoConfiguration, MongoConnection, NotReadyError
 from pymongo import collection
@@ -20,7 +20,7 @@ LIBAPI = 1
 
 # Increment this PATCH version before using `charmcraft publish-lib` or reset
 # to 0 if you are raising the major API version
-LIBPATCH = 7
+LIBPATCH = 8
 
 # path to store mongodb ketFile
 logger = logging.getLogger(__name__)
@@ -48,6 +48,10 @@ class BalancerNotEnabledError(Exception):
     """Raised when balancer process is not enabled."""
 
 
+class CollectionNotBalancedError(Exception):
+    """Raised when the chunks of a sharded collection are not yet balanced."""
+
+
 class MongosConnection(MongoConnection):
     """In this class we create connection object to Mongos.
 
@@ -156,6 +160,69 @@ class MongosConnection(MongoConnection):
                 if balancer_state["mode"] == "off":
                     raise BalancerNotEnabledError("balancer is not enabled.")
 
+    def shard_collection(
+        self,
+        namespace: str,
+        shard_key: Dict[str, int | str],
+        num_initial_chunks: Optional[int] = None,
+    ) -> None:
+        """Shards the provided collection, presplitting it when possible.
+
+        Args:
+            namespace: collection to shard in the format <database>.<collection>.
+            shard_key: index specification of the shard key, i.e. {"user_id": "hashed"}.
+            num_initial_chunks: number of chunks to create when sharding an empty collection with
+                a hashed shard key.
+
+        Raises:
+            ConfigurationError, OperationFailure
+        """
+        database_name = namespace.split(".", 1)[0]
+        self.client.admin.command("enableSharding", database_name)
+
+        shard_collection_options = {"key": shard_key}
+        if num_initial_chunks:
+            shard_collection_options["numInitialChunks"] = num_initial_chunks
+
+        logger.info("Sharding collection %s with shard key %s", namespace, shard_key)
+        self.client.admin.command("shardCollection", namespace, **shard_collection_options)
+
+    def is_collection_balanced(self, namespace: str) -> bool:
+        """Returns True if the balancer reports the chunks of the collection as balanced."""
+        collection_status = self.client.admin.command("balancerCollectionStatus", namespace)
+        return collection_status["balancerCompliant"]
+
+    def wait_for_collection_balanced(self, namespace: str, timeout: int) -> None:
+        """Waits until the chunks of the provided collection are balanced across the shards.
+
+        Raises:
+            BalancerNotEnabledError, CollectionNotBalancedError
+        """
+        balancer_state = self.client.admin.command("balancerStatus")
+        if balancer_state["mode"] == "off":
+            raise BalancerNotEnabledError("balancer is not enabled.")
+
+        for attempt in Retrying(stop=stop_after_delay(timeout), wait=wait_fixed(5), reraise=True):
+            with attempt:
+                if not self.is_collection_balanced(namespace):
+                    raise CollectionNotBalancedError(f"collection {namespace} is not balanced.")
+
+    def get_chunk_distribution(self, namespace: str) -> Dict[str, int]:
+        """Returns the number of chunks of the provided collection that each shard owns."""
+        config_db = self.client["config"]
+        collection_info = config_db.collections.find_one({"_id": namespace})
+        if not collection_info:
+            return {}
+
+        # since 5.0 chunks are associated with the collection UUID rather than its namespace.
+        chunks_per_shard = config_db.chunks.aggregate(
+            [
+                {"$match": {"uuid": collection_info["uuid"]}},
+                {"$group": {"_id": "$shard", "chunks": {"$sum": 1}}},
+            ]
+        )
+        return {shard["_id"]: shard["chunks"] for shard in chunks_per_shard}
+
     def remove_shard(self, shard_name: str) -> None:
         """Removes shard from the cluster.
 
@@ -15,7 +15,7 @@ from charms.data_platform_libs.v0.data_interfaces import (
     DatabaseProvides,
     DatabaseRequires,
 )
-from charms.mongodb.v1.helpers import KEY_FILE
+from charms.mongodb.v1.helpers import KEY_FILE, fan_out
 from charms.mongodb.v1.mongodb import MongoDBConnection, NotReadyError, OperationFailure
 from charms.mongodb.v1.mongodb_provider import REL_NAME
 from charms.mongodb.v1.mongos import (
@@ -58,7 +58,7 @@ LIBAPI = 1
 
 # Increment this PATCH version before using `charmcraft publish-lib` or reset
 # to 0 if you are raising the major API version
-LIBPATCH = 12
+LIBPATCH = 14
 
 KEYFILE_KEY = "key-file"
 HOSTS_KEY = "host"
@@ -472,20 +472,43 @@ class ShardingProvider(Object):
             logger.info("shards are not reachable, none related to config-sever")
             return unreachable_hosts
 
-        for shard_name in self.get_related_shards():
-            shard_hosts = self._get_shard_hosts(shard_name)
-            if not shard_hosts:
-                return unreachable_hosts
-
-            # use a URI that is not dependent on the operator password, as we are not guaranteed
-            # that the shard has received the password yet.
-            uri = f"mongodb://{','.join(shard_hosts)}"
-            with MongoDBConnection(None, uri) as mongo:
-                if not mongo.is_ready:
-                    unreachable_hosts.append(shard_name)
+        shards_hosts = {
+            shard_name: shard_hosts
+            for shard_name in self.get_related_shards()
+            if (shard_hosts := self._get_shard_hosts(shard_name))
+        }
+        shards_reachability = fan_out(
+            lambda shard_name: self.is_shard_reachable(shards_hosts[shard_name]), shards_hosts
+        )
+        for shard_name, reachable in shards_reachability.items():
+            if reachable is not True:
+                logger.debug("Shard %s is not reachable: %s", shard_name, reachable)
+                unreachable_hosts.append(shard_name)
 
         return unreachable_hosts
 
+    @staticmethod
+    def is_shard_reachable(shard_hosts: List[str]) -> bool:
+        """Returns True if the shard answers a ping before the probe deadline."""
+        # use a URI that is not dependent on the operator password, as we are not guaranteed
+        # that the shard has received the password yet.
+        uri = f"mongodb://{','.join(shard_hosts)}"
+        with MongoDBConnection(None, uri) as mongo:
+            try:
+                # leave some room for the last attempt to complete before the fan-out deadline
+                for attempt in Retrying(
+                    stop=stop_after_delay(Config.Probe.DEADLINE - 3),
+                    wait=wait_fixed(1),
+                    reraise=True,
+                ):
+                    with attempt:
+                        # The ping command is cheap and does not require auth.
+                        mongo.client.admin.command("ping")
+            except PyMongoError:
+                return False
+
+        return True
+
     def is_mongos_running(self) -> bool:
         """Returns true if mongos service is running."""
         mongos_hosts = ",".join(self.charm.app_hosts)
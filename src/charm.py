@@ -7,15 +7,21 @@ import logging
 import os
 import pwd
 import subprocess
+import tempfile
 import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
+import yaml
 from charms.grafana_agent.v0.cos_agent import COSAgentProvider
 from charms.mongodb.v0.config_server_interface import ClusterProvider
 from charms.mongodb.v0.mongo import MongoConfiguration
 from charms.mongodb.v0.mongodb_secrets import SecretCache, generate_secret_label
-from charms.mongodb.v0.set_status import MongoDBStatusHandler
+from charms.mongodb.v0.set_status import (
+    MongoDBStatusHandler,
+    format_initial_sync_progress,
+)
 from charms.mongodb.v1.helpers import (
     KEY_FILE,
     TLS_EXT_CA_FILE,
@@ -32,6 +38,11 @@ from charms.mongodb.v1.mongodb import MongoDBConnection, NotReadyError
 from charms.mongodb.v1.mongodb_backups import MongoDBBackups
 from charms.mongodb.v1.mongodb_provider import MongoDBProvider
 from charms.mongodb.v1.mongodb_tls import MongoDBTLS
+from charms.mongodb.v1.mongos import (
+    BalancerNotEnabledError,
+    CollectionNotBalancedError,
+    MongosConnection,
+)
 from charms.mongodb.v1.shards_interface import ConfigServerRequirer, ShardingProvider
 from charms.mongodb.v1.users import (
     CHARM_USERS,
@@ -59,6 +70,7 @@ from ops.charm import (
     SecretChangedEvent,
     SecretRemoveEvent,
     StartEvent,
+    StopEvent,
     StorageDetachingEvent,
     UpdateStatusEvent,
 )
@@ -69,6 +81,7 @@ from ops.model import (
     BlockedStatus,
     MaintenanceStatus,
     Relation,
+    StatusBase,
     Unit,
     WaitingStatus,
 )
@@ -76,17 +89,46 @@ from pymongo.errors import PyMongoError, ServerSelectionTimeoutError
 from tenacity import Retrying, before_log, retry, stop_after_attempt, wait_fixed
 
 from config import Config, Package
+from dump import (
+    get_connection_args,
+    get_dump_command,
+    get_dump_indexes,
+    get_dump_size,
+    get_restore_command,
+    get_tool_error,
+    parse_restore_output,
+    resolve_dump_path,
+    resolve_export_path,
+    stream_to_file,
+)
 from exceptions import (
     AdminUserCreationError,
     ApplicationHostNotFoundError,
+    InvalidDumpError,
+    InvalidParametersError,
     NotConfigServerError,
 )
 from machine_helpers import (
     MONGO_USER,
     ROOT_USER_GID,
+    get_services_fingerprint,
     setup_logrotate_and_cron,
     update_mongod_service,
 )
+from oplog import MB, get_target_oplog_size, is_oplog_resize_needed
+from parameters import (
+    get_pending_restart_parameters,
+    get_runtime_parameters,
+    parse_default_rw_concern,
+    parse_flow_control_parameters,
+    parse_initial_sync_parameters,
+    parse_parameters,
+    parse_replset_settings,
+)
+from placement import get_member_priorities, parse_unit_names
+from prewarm import Prewarm
+from rolling_compact import RollingCompact
+from rolling_restart import RollingRestart
 from upgrades.mongodb_upgrade import MongoDBUpgrade
 
 logger = logging.getLogger(__name__)
@@ -108,6 +150,7 @@ class MongodbOperatorCharm(CharmBase):
         self.framework.observe(self.on.install, self._on_install)
         self.framework.observe(self.on.start, self._on_start)
         self.framework.observe(self.on.update_status, self._on_update_status)
+        self.framework.observe(self.on.stop, self._on_stop)
         self.framework.observe(self.on.mongodb_storage_attached, self._on_storage_attached)
         self.framework.observe(
             self.on[Config.Relations.PEERS].relation_joined, self._on_relation_joined
@@ -125,8 +168,17 @@ class MongodbOperatorCharm(CharmBase):
 
         # actions
         self.framework.observe(self.on.get_primary_action, self._on_get_primary_action)
+        self.framework.observe(
+            self.on.get_initial_sync_status_action, self._on_get_initial_sync_status_action
+        )
+        self.framework.observe(
+            self.on.get_flow_control_status_action, self._on_get_flow_control_status_action
+        )
         self.framework.observe(self.on.get_password_action, self._on_get_password)
         self.framework.observe(self.on.set_password_action, self._on_set_password)
+        self.framework.observe(self.on.shard_collection_action, self._on_shard_collection_action)
+        self.framework.observe(self.on.import_action, self._on_import_action)
+        self.framework.observe(self.on.export_action, self._on_export_action)
 
         # secrets
         self.framework.observe(self.on.secret_remove, self._on_secret_remove)
@@ -150,6 +202,9 @@ class MongodbOperatorCharm(CharmBase):
         self.cluster = ClusterProvider(self)
         self.shard = ConfigServerRequirer(self)
         self.status = MongoDBStatusHandler(self)
+        self.rolling_restart = RollingRestart(self)
+        self.rolling_compact = RollingCompact(self)
+        self.prewarm = Prewarm(self)
 
         # relation events for Prometheus metrics are handled in the MetricsEndpointProvider
         self._grafana_agent = COSAgentProvider(
@@ -381,8 +436,7 @@ class MongodbOperatorCharm(CharmBase):
             self.status.set_and_share_status(BlockedStatus("couldn't install MongoDB"))
             return
 
-        # clear the default config file - user provided config files will be added in the config
-        # changed hook
+        # clear the default config file - the charm renders its own configuration file below
         try:
             with open(Config.MONGOD_CONF_FILE_PATH, "r+") as f:
                 f.truncate(0)
@@ -390,12 +444,9 @@ class MongodbOperatorCharm(CharmBase):
             self.status.set_and_share_status(BlockedStatus("Could not install MongoDB"))
             return
 
-        # Construct the mongod startup commandline args for systemd and reload the daemon.
-        update_mongod_service(
-            machine_ip=self.unit_host(self.unit),
-            config=self.mongodb_config,
-            role=self.role,
-        )
+        # Construct the mongod configuration file read by the snap services.
+        mongod_parameters, mongos_parameters = self.get_start_parameters()
+        self.update_services_config(mongod_parameters, mongos_parameters)
         setup_logrotate_and_cron()
         # add licenses
         copy_licenses_to_unit()
@@ -424,12 +475,20 @@ class MongodbOperatorCharm(CharmBase):
                 f"Migration of sharding components not permitted, revert config role to {self.role}"
             )
 
+        self.reconcile_parameters(event)
+        self.reconcile_replset_settings(event)
+        self.reconcile_primary_placement(event)
+        self.reconcile_default_rw_concern(event)
+        self.reconcile_oplog(event)
+
     def _on_start(self, event: StartEvent) -> None:
         """Enables MongoDB service and initialises replica set.
 
         Args:
             event: The triggering start event.
         """
+        self.share_availability_zone()
+
         # mongod requires keyFile and TLS certificates on the file system
         self._instatiate_keyfile(event)
         self.push_tls_certificate_to_workload()
@@ -437,7 +496,13 @@ class MongodbOperatorCharm(CharmBase):
         try:
             logger.debug("starting MongoDB.")
             self.status.set_and_share_status(MaintenanceStatus("starting MongoDB"))
+            mongod_parameters, mongos_parameters = self.get_start_parameters()
+            self.update_services_config(mongod_parameters, mongos_parameters)
             self.start_charm_services()
+            self.set_applied_parameters(mongod_parameters, mongos_parameters)
+            self.unit_peer_data[Config.SERVICES_FINGERPRINT_KEY] = get_services_fingerprint(
+                self.role
+            )
             self.status.set_and_share_status(ActiveStatus())
         except snap.SnapError as e:
             logger.error("An exception occurred when starting mongod agent, error: %s.", str(e))
@@ -625,6 +690,7 @@ class MongodbOperatorCharm(CharmBase):
                 self.shard.wait_for_draining(mongos_hosts)
                 logger.info("Shard successfully drained storage.")
 
+            self._drain_and_stop_services()
             return
 
         try:
@@ -647,6 +713,25 @@ class MongodbOperatorCharm(CharmBase):
         except PyMongoError as e:
             logger.error("Failed to remove %s from replica set, error=%r", self.unit.name, e)
 
+        # clients stop routing operations to the removed member, let its operations complete
+        # while it still has access to its storage.
+        self._drain_and_stop_services()
+
+    def _on_stop(self, _: StopEvent) -> None:
+        """Drains the client operations of mongod and stops the services."""
+        self._drain_and_stop_services()
+
+    def _drain_and_stop_services(self) -> None:
+        """Stops the services, draining the client operations of mongod if it is still running.
+
+        mongod is stopped on storage-detaching already when the unit is removed, it is then not
+        shut down again on stop.
+        """
+        try:
+            self.stop_charm_services(drain=service_running("snap.charmed-mongodb.mongod.service"))
+        except snap.SnapError as e:
+            logger.error("Failed to stop the services, error: %s", e)
+
     def _on_update_status(self, event: UpdateStatusEvent):
         # user-made mistakes might result in other incorrect statues. Prioritise informing users of
         # their mistake.
@@ -655,6 +740,9 @@ class MongodbOperatorCharm(CharmBase):
             self.status.set_and_share_status(invalid_integration_status)
             return
 
+        # units deployed before the zone was shared
+        self.share_availability_zone()
+
         # no need to report on replica set status until initialised
         if not self.db_initialised:
             return
@@ -682,11 +770,79 @@ class MongodbOperatorCharm(CharmBase):
             deployment_mode = "replica set" if self.is_role(Config.Role.REPLICATION) else "cluster"
             WaitingStatus(f"Waiting to sync internal membership across the {deployment_mode}")
 
-        self.status.set_and_share_status(self.status.process_statuses())
+        # retry applying the replica set settings and the default read/write concern, e.g. once a
+        # primary is elected
+        self.reconcile_replset_settings()
+        self.reconcile_default_rw_concern()
+        # oplogs sized for a target window follow the write rate
+        self.reconcile_oplog()
+        # members drop a previous CA once they all trust the new one
+        self.tls.reconcile_ca_rollover()
+
+        status = self.status.process_statuses()
+        if isinstance(status, ActiveStatus):
+            status = (
+                self.get_parameters_status()
+                or self.tls.get_private_key_type_status()
+                or self.get_replset_settings_status()
+                or self.get_primary_placement_status()
+                or self.get_default_rw_concern_status(status)
+            )
+        self.status.set_and_share_status(status)
 
     def _on_get_primary_action(self, event: ActionEvent):
         event.set_results({"replica-set-primary": self.primary})
 
+    def _on_get_initial_sync_status_action(self, event: ActionEvent) -> None:
+        """Returns the progress of the initial sync of this unit as an action response."""
+        try:
+            with MongoDBConnection(self.mongodb_config, "localhost", direct=True) as direct_mongo:
+                progress = direct_mongo.get_initial_sync_progress()
+        except PyMongoError as e:
+            event.fail(f"Failed to get the initial sync status: {e}")
+            return
+
+        if not progress:
+            event.set_results({"syncing": False})
+            return
+
+        event.set_results(
+            {
+                "syncing": True,
+                "databases-cloned": progress["databases_cloned"],
+                "databases-to-clone": progress["databases_to_clone"],
+                "bytes-copied": progress["bytes_copied"],
+                "bytes-total": progress["bytes_total"],
+                "elapsed-seconds": int(progress["elapsed"]),
+                "rate-bytes-per-second": int(progress["rate"]),
+                "eta-seconds": int(progress["eta"]) if progress["eta"] is not None else "unknown",
+                "failed-attempts": progress["failed_attempts"],
+                "summary": format_initial_sync_progress(progress),
+            }
+        )
+
+    def _on_get_flow_control_status_action(self, event: ActionEvent) -> None:
+        """Returns the flow control state of the primary as an action response."""
+        try:
+            with MongoDBConnection(self.mongodb_config) as mongo:
+                # only the primary throttles writes
+                flow_control = mongo.get_flow_control_status()
+        except PyMongoError as e:
+            event.fail(f"Failed to get the flow control status: {e}")
+            return
+
+        event.set_results(
+            {
+                "primary": self.primary,
+                "enabled": flow_control["enabled"],
+                "lagged": flow_control["is_lagged"],
+                "lagged-count": flow_control["is_lagged_count"],
+                "target-lag-seconds": self.model.config[Config.FlowControl.TARGET_LAG_CONFIG],
+                "target-rate-locks-per-second": flow_control["target_rate"],
+                "time-acquiring-seconds": round(flow_control["time_acquiring"], 3),
+            }
+        )
+
     def _on_get_password(self, event: ActionEvent) -> None:
         """Returns the password for the user as an action response."""
         username = self._get_user_or_fail_event(
@@ -762,6 +918,314 @@ class MongodbOperatorCharm(CharmBase):
             APP_SCOPE, MongoDBUser.get_password_key_name_for_user(username), password
         )
 
+    def _on_shard_collection_action(self, event: ActionEvent) -> None:
+        """Shards a collection through mongos, presplitting it in hashed mode."""
+        if not self.pass_pre_shard_collection_checks(event):
+            return
+
+        namespace = event.params["namespace"]
+        mode = event.params.get("mode", Config.Sharding.HASHED_MODE)
+        num_initial_chunks = event.params.get("num-initial-chunks")
+        if num_initial_chunks and mode != Config.Sharding.HASHED_MODE:
+            event.fail("num-initial-chunks is only supported in hashed mode.")
+            return
+
+        try:
+            shard_key = self._build_shard_key(event.params["key"], mode)
+        except ValueError as e:
+            event.fail(str(e))
+            return
+
+        try:
+            with MongosConnection(self.mongos_config) as mongos:
+                mongos.shard_collection(namespace, shard_key, num_initial_chunks)
+
+                if event.params.get("wait-for-balance", False):
+                    try:
+                        mongos.wait_for_collection_balanced(
+                            namespace, timeout=event.params.get("balance-timeout", 600)
+                        )
+                    except (BalancerNotEnabledError, CollectionNotBalancedError) as e:
+                        event.fail(f"Collection {namespace} was sharded but is not balanced: {e}")
+                        return
+
+                chunk_distribution = mongos.get_chunk_distribution(namespace)
+        except PyMongoError as e:
+            logger.error("Failed to shard collection %s, error: %s", namespace, e)
+            event.fail(f"Failed to shard collection {namespace}: {e}")
+            return
+
+        event.set_results(
+            {
+                "namespace": namespace,
+                "shard-key": json.dumps(shard_key),
+                "chunks-per-shard": json.dumps(chunk_distribution),
+            }
+        )
+
+    def _on_import_action(self, event: ActionEvent) -> None:
+        """Loads a dump with mongorestore, through mongos on a config-server."""
+        if not self.pass_pre_dump_checks(event, "import"):
+            return
+
+        try:
+            path = resolve_dump_path(event.params["path"])
+        except InvalidDumpError as e:
+            event.fail(str(e))
+            return
+
+        defer_index_builds = event.params.get("defer-index-builds", False)
+        if defer_index_builds and path.is_file():
+            event.fail("Index builds can only be deferred when importing a dump directory.")
+            return
+
+        command = get_restore_command(
+            path,
+            parallel_collections=event.params.get("parallel-collections", 4),
+            insertion_workers=event.params.get("insertion-workers", 4),
+            defer_index_builds=defer_index_builds,
+            drop=event.params.get("drop", False),
+        )
+        event.log(f"Importing {path}")
+        started = time.monotonic()
+        try:
+            output = self.run_database_tool(command)
+        except subprocess.CalledProcessError as e:
+            logger.error("Failed to import %s, error: %s", path, e.stderr)
+            event.fail(f"Failed to import {path}: {get_tool_error(e.stderr)}")
+            return
+
+        try:
+            indexes = self.build_dump_indexes(event, path) if defer_index_builds else {}
+        except PyMongoError as e:
+            logger.error("Failed to build the indexes of %s, error: %r", path, e)
+            event.fail(f"Imported {path} but failed to build its indexes: {e}")
+            return
+
+        event.set_results(
+            self._get_import_results(path, output, indexes, time.monotonic() - started)
+        )
+
+    def build_dump_indexes(self, event: ActionEvent, path: Path) -> Dict[str, List[Dict]]:
+        """Builds the secondary indexes of an imported dump directory, once all data is loaded.
+
+        Returns:
+            The specifications of the indexes built, by namespace.
+
+        Raises:
+            PyMongoError
+        """
+        indexes = get_dump_indexes(path)
+        if not indexes:
+            return {}
+
+        event.log(f"Building the indexes of {len(indexes)} collections")
+        with self.get_dump_connection() as mongo:
+            for namespace, specs in indexes.items():
+                mongo.create_indexes(namespace, specs)
+
+        return indexes
+
+    @staticmethod
+    def _get_import_results(
+        path: Path, output: str, indexes: Dict[str, List[Dict]], elapsed: float
+    ) -> Dict:
+        """Returns the results of the import action.
+
+        The rate in MB is the one of the dump as stored, i.e. compressed for gzipped dumps.
+        """
+        restored, failed = parse_restore_output(output)
+        return {
+            "path": str(path),
+            "documents-restored": restored,
+            "documents-failed": failed,
+            "indexes-built": sum(len(specs) for specs in indexes.values()),
+            "elapsed-seconds": round(elapsed, 1),
+            "documents-per-second": int(restored / elapsed),
+            "dump-mb-per-second": round(get_dump_size(path) / MB / elapsed, 1),
+        }
+
+    def _on_export_action(self, event: ActionEvent) -> None:
+        """Streams a gzipped archive of a database, read from a secondary, to the unit storage."""
+        if not self.pass_pre_dump_checks(event, "export"):
+            return
+
+        database = event.params["database"].strip()
+        collections = [
+            collection.strip()
+            for collection in event.params.get("collections", "").split(",")
+            if collection.strip()
+        ]
+        raw_path = event.params.get("path") or (
+            f"{Config.Dump.EXPORT_DIR}/{database}-{time.strftime('%Y%m%d%H%M%S')}.archive.gz"
+        )
+        try:
+            path = resolve_export_path(raw_path)
+            with self.get_dump_connection() as mongo:
+                existing_collections = mongo.client[database].list_collection_names()
+            command = get_dump_command(
+                database,
+                collections,
+                existing_collections,
+                parallel_collections=event.params.get("parallel-collections", 4),
+            )
+        except InvalidDumpError as e:
+            event.fail(str(e))
+            return
+        except PyMongoError as e:
+            event.fail(f"Failed to list the collections of {database}: {e}")
+            return
+
+        event.log(f"Exporting {database} to {path}")
+        started = time.monotonic()
+        try:
+            size = self.export_to_file(command, path, event.params.get("max-rate-mb", 0) * MB)
+        except subprocess.CalledProcessError as e:
+            logger.error("Failed to export %s, error: %s", database, e.stderr)
+            path.unlink(missing_ok=True)
+            event.fail(f"Failed to export {database}: {get_tool_error(e.stderr)}")
+            return
+        except OSError as e:
+            logger.error("Failed to write the export of %s, error: %r", database, e)
+            path.unlink(missing_ok=True)
+            event.fail(f"Failed to write {path}: {e.strerror or e}")
+            return
+
+        elapsed = time.monotonic() - started
+        event.set_results(
+            {
+                "path": str(path),
+                "bytes": size,
+                "elapsed-seconds": round(elapsed, 1),
+                "bytes-per-second": int(size / elapsed),
+            }
+        )
+
+    def export_to_file(self, command: List[str], path: Path, max_rate: int) -> int:
+        """Streams the output of mongodump to a file, at most `max_rate` bytes per second if set.
+
+        Returns:
+            The number of bytes written.
+
+        Raises:
+            subprocess.CalledProcessError, OSError
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self.database_tool_args() as args, tempfile.TemporaryFile() as stderr:
+            # the tools log their progress to stderr, which must not fill up a pipe
+            process = subprocess.Popen([*command, *args], stdout=subprocess.PIPE, stderr=stderr)
+            try:
+                size = stream_to_file(process.stdout, path, max_rate)
+            except OSError:
+                # e.g. the storage is full, mongodump would block writing to the pipe
+                process.kill()
+                process.wait()
+                raise
+
+            if process.wait():
+                stderr.seek(0)
+                raise subprocess.CalledProcessError(
+                    process.returncode, command, stderr=stderr.read().decode()
+                )
+
+        return size
+
+    def pass_pre_dump_checks(self, event: ActionEvent, operation: str) -> bool:
+        """Checks conditions for importing or exporting a dump and fail if necessary."""
+        if self.is_role(Config.Role.SHARD):
+            event.fail(f"Dumps can only be {operation}ed through the config-server.")
+            return False
+
+        if not self.db_initialised:
+            event.fail(f"Cannot {operation} a dump before the cluster is initialised.")
+            return False
+
+        if self.upgrade_in_progress:
+            event.fail(f"Cannot {operation} a dump while an upgrade is in progress.")
+            return False
+
+        return True
+
+    def get_dump_connection(self) -> MongoDBConnection | MongosConnection:
+        """Returns the connection dumps are imported and exported through, mongos if any."""
+        if self.is_role(Config.Role.CONFIG_SERVER):
+            return MongosConnection(self.mongos_config)
+
+        return MongoDBConnection(self.mongodb_config)
+
+    @contextmanager
+    def database_tool_args(self) -> Iterator[List[str]]:
+        """Yields the arguments connecting the database tools of the snap as the operator user.
+
+        The password is stored in a config file of the tools while they run.
+        """
+        config = (
+            self.mongos_config if self.is_role(Config.Role.CONFIG_SERVER) else self.mongodb_config
+        )
+        config_file = Path(Config.MONGOD_CONF_DIR) / Config.Dump.TOOLS_CONFIG_FILE_NAME
+        fd = os.open(config_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as file:
+            yaml.safe_dump({"password": config.password}, file)
+
+        try:
+            yield [*get_connection_args(config), f"--config={config_file}"]
+        finally:
+            config_file.unlink(missing_ok=True)
+
+    def run_database_tool(self, command: List[str]) -> str:
+        """Runs a database tool of the snap and returns its output.
+
+        Raises:
+            subprocess.CalledProcessError
+        """
+        with self.database_tool_args() as args:
+            result = subprocess.run([*command, *args], capture_output=True, check=True, text=True)
+
+        # the tools log their progress to stderr
+        return result.stdout + result.stderr
+
+    def pass_pre_shard_collection_checks(self, event: ActionEvent) -> bool:
+        """Checks conditions for sharding a collection and fail if necessary."""
+        if not self.is_role(Config.Role.CONFIG_SERVER):
+            event.fail("Collections can only be sharded from the config-server.")
+            return False
+
+        if not self.db_initialised:
+            event.fail("Cannot shard a collection before the cluster is initialised.")
+            return False
+
+        if self.upgrade_in_progress:
+            event.fail("Cannot shard a collection while an upgrade is in progress.")
+            return False
+
+        database_name, _, collection_name = event.params["namespace"].partition(".")
+        if not database_name or not collection_name:
+            event.fail("Namespace must be of the format <database>.<collection>.")
+            return False
+
+        return True
+
+    @staticmethod
+    def _build_shard_key(key: str, mode: str) -> Dict[str, int | str]:
+        """Builds the index specification of a shard key from a comma separated list of fields.
+
+        Raises:
+            ValueError
+        """
+        fields = [field.strip() for field in key.split(",") if field.strip()]
+        if not fields:
+            raise ValueError("Shard key must contain at least one field.")
+
+        if len(set(fields)) != len(fields):
+            raise ValueError("Shard key must not contain duplicate fields.")
+
+        # MongoDB supports a single hashed field per shard key, we hash the first one.
+        shard_key = {field: 1 for field in fields}
+        if mode == Config.Sharding.HASHED_MODE:
+            shard_key[fields[0]] = "hashed"
+
+        return shard_key
+
     def _on_secret_remove(self, event: SecretRemoveEvent):
         # We are keeping this function empty on purpose until the issue with secrets
         # is not fixed. The issue is: https://bugs.launchpad.net/juju/+bug/2023364
@@ -1028,11 +1492,10 @@ class MongodbOperatorCharm(CharmBase):
         event.unit = self.unit
         self._on_relation_handler(event)
 
-        # make sure all nodes in the replica set have the same priority for re-election. This is
-        # necessary in the case that pre-upgrade hook fails to reset the priority of election for
-        # cluster nodes.
-        with MongoDBConnection(self.mongodb_config) as mongod:
-            mongod.set_replicaset_election_priority(priority=1)
+        # make sure the election priorities follow the placement policy. This is necessary once
+        # an upgrade finished, or in the case that pre-upgrade hook fails to reset the priority of
+        # election for cluster nodes.
+        self.reconcile_primary_placement()
 
     def _open_ports_tcp(self, ports: int) -> None:
         """Open the given port.
@@ -1103,20 +1566,26 @@ class MongodbOperatorCharm(CharmBase):
         return key
 
     def push_file_to_unit(self, parent_dir, file_name, file_contents) -> None:
-        """K8s charms can push files to their containers easily, this is a vm charm workaround."""
+        """K8s charms can push files to their containers easily, this is a vm charm workaround.
+
+        The file is written next to its destination and then moved in place, so that running
+        services never read a partially written file.
+        """
         Path(parent_dir).mkdir(parents=True, exist_ok=True)
         file_name = f"{parent_dir}/{file_name}"
-        with open(file_name, "w") as write_file:
+        tmp_file_name = f"{file_name}.tmp"
+        with open(tmp_file_name, "w") as write_file:
             write_file.write(file_contents)
 
         # MongoDB limitation; it is needed 400 rights for keyfile and we need 440 rights on tls
         # certs to be able to connect via MongoDB shell
         if Config.TLS.KEY_FILE_NAME in file_name:
-            os.chmod(file_name, 0o400)
+            os.chmod(tmp_file_name, 0o400)
         else:
-            os.chmod(file_name, 0o440)
+            os.chmod(tmp_file_name, 0o440)
         mongodb_user = pwd.getpwnam(MONGO_USER)
-        os.chown(file_name, mongodb_user.pw_uid, ROOT_USER_GID)
+        os.chown(tmp_file_name, mongodb_user.pw_uid, ROOT_USER_GID)
+        os.replace(tmp_file_name, file_name)
 
     def remove_file_from_unit(self, parent_dir, file_name) -> None:
         """Remove file from vm unit."""
@@ -1155,6 +1624,21 @@ class MongodbOperatorCharm(CharmBase):
                 file_contents=internal_pem,
             )
 
+    def rotate_certificates(self) -> None:
+        """Reloads the TLS certificates of the running services without restarting them.
+
+        Raises:
+            PyMongoError
+        """
+        unit_host = {self.unit_host(self.unit)}
+        with MongoDBConnection(self.remote_mongodb_config(unit_host), direct=True) as mongod:
+            mongod.rotate_certificates()
+
+        # charms running as config server are responsible for maintaining a server side mongos
+        if self.is_role(Config.Role.CONFIG_SERVER):
+            with MongosConnection(self.remote_mongos_config(unit_host)) as mongos:
+                mongos.rotate_certificates()
+
     def delete_tls_certificate_from_workload(self) -> None:
         """Deletes certificate from VM."""
         logger.info("Deleting TLS certificate from VM")
@@ -1168,7 +1652,12 @@ class MongodbOperatorCharm(CharmBase):
             self.remove_file_from_unit(Config.MONGOD_CONF_DIR, file)
 
     def _connect_mongodb_exporter(self) -> None:
-        """Exposes the endpoint to mongodb_exporter."""
+        """Exposes the endpoint to mongodb_exporter.
+
+        The snap runs mongodb_exporter in compatible mode, which exposes the `mongodb_mongod_*`
+        metrics used by the dashboards and alert rules next to the `mongodb_rs_*` and
+        `mongodb_ss_*` ones.
+        """
         if not self.db_initialised:
             return
 
@@ -1246,7 +1735,11 @@ class MongodbOperatorCharm(CharmBase):
         with MongoDBConnection(self.mongodb_config, "localhost", direct=True) as direct_mongo:
             try:
                 logger.info("Replica Set initialization")
-                direct_mongo.init_replset()
+                settings = self.get_start_replset_settings()
+                direct_mongo.init_replset(settings=settings)
+                self.app_peer_data[Config.Replication.APPLIED_SETTINGS_KEY] = json.dumps(
+                    settings, sort_keys=True
+                )
                 self.peers.data[self.app]["replica_set_hosts"] = json.dumps(
                     [self.unit_host(self.unit)]
                 )
@@ -1355,12 +1848,28 @@ class MongodbOperatorCharm(CharmBase):
         if self.is_role(Config.Role.CONFIG_SERVER):
             mongodb_snap.start(services=["mongos"], enable=True)
 
-    def stop_charm_services(self):
-        """Stops the mongod service and if necessary stops mongos.
+    def are_charm_services_running(self) -> bool:
+        """Returns true if the mongod service and if necessary the mongos service are running."""
+        if not service_running("snap.charmed-mongodb.mongod.service"):
+            return False
+
+        if self.is_role(Config.Role.CONFIG_SERVER):
+            return service_running("snap.charmed-mongodb.mongos.service")
+
+        return True
+
+    def stop_charm_services(self, drain: bool = False):
+        """Stops the mongod service and if necessary the mongos service.
+
+        Args:
+            drain: shut down mongod gracefully first, when the unit stops or is removed.
 
         Raises:
             snap.SnapError
         """
+        if drain:
+            self.shutdown_mongod_gracefully()
+
         snap_cache = snap.SnapCache()
         mongodb_snap = snap_cache["charmed-mongodb"]
         mongodb_snap.stop(services=["mongod"])
@@ -1369,27 +1878,645 @@ class MongodbOperatorCharm(CharmBase):
         if self.is_role(Config.Role.CONFIG_SERVER):
             mongodb_snap.stop(services=["mongos"])
 
-    def restart_charm_services(self):
-        """Restarts the mongod service with its associated configuration."""
+    def shutdown_mongod_gracefully(self) -> None:
+        """Shuts down mongod once the client operations in progress completed.
+
+        The primary first steps down so that writes move to another member. Client operations in
+        progress are then given up to `shutdown-timeout` seconds to complete before mongod shuts
+        down.
+        """
+        timeout = self.model.config[Config.Shutdown.TIMEOUT_CONFIG]
         try:
-            self.stop_charm_services()
-            update_mongod_service(
-                self.unit_host(self.unit),
-                config=self.mongodb_config,
-                role=self.role,
-            )
-            self.start_charm_services()
+            with MongoDBConnection(self.mongodb_config, "localhost", direct=True) as direct_mongo:
+                # fails fast if mongod is not running
+                direct_mongo.client.admin.command("ping")
+
+                if self.db_initialised and self.peers_units:
+                    if direct_mongo.primary() == self.unit_host(self.unit):
+                        logger.info("Stepping down primary before shutting down.")
+                        direct_mongo.step_down_primary()
+
+                active, remaining = direct_mongo.drain_operations(timeout)
+                logger.info(
+                    "Drained %d of %d client operations before shutting down, %d still active "
+                    "after %ss",
+                    max(0, active - remaining),
+                    active,
+                    remaining,
+                    timeout,
+                )
+                direct_mongo.shutdown(Config.Shutdown.QUIESCE_SECS)
+        except PyMongoError as e:
+            logger.debug("Not shutting down mongod gracefully, error: %r", e)
+
+    def restart_charm_services(self, skip_if_unchanged: bool = False):
+        """Restarts the mongod service with its associated configuration.
+
+        Args:
+            skip_if_unchanged: do not restart the services if they are running and none of their
+                startup options, keyFile or TLS certificates changed since they were last started.
+        """
+        try:
+            mongod_parameters, mongos_parameters = self.get_start_parameters()
+            changed_options = self.update_services_config(mongod_parameters, mongos_parameters)
+            fingerprint = get_services_fingerprint(self.role)
+            if (
+                skip_if_unchanged
+                and fingerprint == self.unit_peer_data.get(Config.SERVICES_FINGERPRINT_KEY)
+                and self.are_charm_services_running()
+            ):
+                logger.info("Startup options of the services unchanged, skipping restart.")
+                return
+
+            logger.info("Restarting services, changed options: %s", changed_options)
+            self.prewarm.prepare()
+            try:
+                self.stop_charm_services()
+                self.start_charm_services()
+                self.set_applied_parameters(mongod_parameters, mongos_parameters)
+                self.unit_peer_data[Config.SERVICES_FINGERPRINT_KEY] = fingerprint
+                # the restart must not be mistaken for a crash, whether pre-warmed or not
+                self.prewarm.record_pid()
+                self.prewarm.run()
+            finally:
+                # a failed restart must not leave the member unelectable
+                self.prewarm.release()
         except snap.SnapError as e:
             logger.error("An exception occurred when starting mongod agent, error: %s.", str(e))
             self.status.set_and_share_status(BlockedStatus("couldn't start MongoDB"))
             return
 
+    def update_services_config(
+        self, mongod_parameters: Dict, mongos_parameters: Dict
+    ) -> List[str]:
+        """Updates the configuration files of the services with the configured limits.
+
+        Returns:
+            The names of the options that changed.
+        """
+        return update_mongod_service(
+            self.unit_host(self.unit),
+            config=self.mongodb_config,
+            role=self.role,
+            mongod_parameters=mongod_parameters,
+            mongos_parameters=mongos_parameters,
+            mongod_max_connections=self.get_max_incoming_connections(),
+            mongos_max_connections=self.get_max_incoming_connections(mongos=True),
+            oplog_size_mb=self.get_oplog_size(),
+            oplog_min_retention_hours=max(self.model.config[Config.Oplog.MIN_RETENTION_CONFIG], 0),
+        )
+
+    def get_max_incoming_connections(self, mongos: bool = False) -> Optional[int]:
+        """Returns the maximum number of connections accepted by mongod or mongos.
+
+        None keeps the MongoDB default when the option is left to 0.
+        """
+        option = (
+            Config.Limits.MONGOS_MAX_INCOMING_CONNECTIONS_CONFIG
+            if mongos
+            else Config.Limits.MAX_INCOMING_CONNECTIONS_CONFIG
+        )
+        limit = self.model.config[option]
+        return limit if limit > 0 else None
+
+    def get_limit_parameters(self, mongos: bool = False) -> Dict:
+        """Returns the server parameters set through the limits config options.
+
+        Options left to 0 keep the MongoDB default.
+        """
+        options = Config.Limits.MONGOS_PARAMETERS if mongos else Config.Limits.MONGOD_PARAMETERS
+        return {
+            name: self.model.config[option]
+            for option, name in options.items()
+            if self.model.config[option] > 0
+        }
+
+    def get_parameters(self, mongos: bool = False) -> Dict:
+        """Returns the server parameters configured for mongod or mongos.
+
+        Raises:
+            InvalidParametersError
+        """
+        if mongos:
+            parameters = parse_parameters(
+                self.model.config[Config.Parameters.MONGOS_CONFIG],
+                runtime=Config.Parameters.MONGOS_RUNTIME,
+                startup=Config.Parameters.MONGOS_STARTUP,
+            )
+        else:
+            parameters = parse_parameters(
+                self.model.config[Config.Parameters.MONGOD_CONFIG],
+                runtime=Config.Parameters.MONGOD_RUNTIME,
+                startup=Config.Parameters.MONGOD_STARTUP,
+            )
+
+        limit_parameters = self.get_limit_parameters(mongos)
+        for option, name in (
+            Config.Limits.MONGOS_PARAMETERS if mongos else Config.Limits.MONGOD_PARAMETERS
+        ).items():
+            if name in parameters and self.model.config[option]:
+                raise InvalidParametersError(f"parameter {name} is also set by {option}")
+
+        if mongos:
+            return {**limit_parameters, **parameters}
+
+        # parameters set through dedicated config options
+        options_parameters = {}
+        for options, values in (
+            ("initial sync", self.get_initial_sync_parameters()),
+            ("flow control", self.get_flow_control_parameters()),
+        ):
+            if conflicting := values.keys() & parameters.keys():
+                raise InvalidParametersError(
+                    f"parameter {', '.join(sorted(conflicting))} is also set by the {options} "
+                    "options"
+                )
+            options_parameters.update(values)
+
+        return {**limit_parameters, **options_parameters, **parameters}
+
+    def get_initial_sync_parameters(self) -> Dict:
+        """Returns the server parameters selecting how new members sync their data.
+
+        Raises:
+            InvalidParametersError
+        """
+        return parse_initial_sync_parameters(
+            self.model.config[Config.InitialSync.METHOD_CONFIG],
+            self.model.config[Config.InitialSync.SOURCE_CONFIG],
+            self.model.config[Config.Replication.CHAINING_ALLOWED_CONFIG],
+        )
+
+    def get_flow_control_parameters(self) -> Dict:
+        """Returns the server parameters throttling the writes on the primary.
+
+        Raises:
+            InvalidParametersError
+        """
+        return parse_flow_control_parameters(
+            self.model.config[Config.FlowControl.ENABLED_CONFIG],
+            self.model.config[Config.FlowControl.TARGET_LAG_CONFIG],
+        )
+
+    def get_applied_parameters(self, mongos: bool = False) -> Dict:
+        """Returns the server parameters the running mongod or mongos were started with."""
+        key = (
+            Config.Parameters.APPLIED_MONGOS_KEY
+            if mongos
+            else Config.Parameters.APPLIED_MONGOD_KEY
+        )
+        return json.loads(self.unit_peer_data.get(key, "{}"))
+
+    def set_applied_parameters(self, mongod_parameters: Dict, mongos_parameters: Dict) -> None:
+        """Stores the server parameters and connection limits the services were started with."""
+        self.unit_peer_data[Config.Parameters.APPLIED_MONGOD_KEY] = json.dumps(mongod_parameters)
+        self.unit_peer_data[Config.Parameters.APPLIED_MONGOS_KEY] = json.dumps(mongos_parameters)
+        self.unit_peer_data[Config.Limits.APPLIED_MAX_CONNECTIONS_KEY] = json.dumps(
+            self.get_max_connections_limits()
+        )
+
+    def get_max_connections_limits(self) -> Dict:
+        """Returns the configured connection limits of the services."""
+        limits = {"mongod": self.get_max_incoming_connections()}
+        if self.is_role(Config.Role.CONFIG_SERVER):
+            limits["mongos"] = self.get_max_incoming_connections(mongos=True)
+
+        return limits
+
+    def get_start_parameters(self) -> Tuple[Dict, Dict]:
+        """Returns the server parameters to start mongod and mongos with.
+
+        Invalid parameters are reported in the status, the services then keep the parameters they
+        were last started with.
+        """
+        try:
+            return self.get_parameters(), self.get_parameters(mongos=True)
+        except InvalidParametersError as e:
+            logger.error("Invalid server parameters, keeping the applied ones: %s", e)
+            return self.get_applied_parameters(), self.get_applied_parameters(mongos=True)
+
+    def get_pending_restart_parameters(self) -> List[str]:
+        """Returns the configured server parameters that only take effect after a restart."""
+        pending = [
+            name
+            for name in get_pending_restart_parameters(
+                self.get_parameters(),
+                self.get_applied_parameters(),
+                runtime=Config.Parameters.MONGOD_RUNTIME,
+            )
+            # members that already synced their data do not use them
+            if name not in Config.InitialSync.PARAMETERS
+        ]
+        if self.is_role(Config.Role.CONFIG_SERVER):
+            pending += get_pending_restart_parameters(
+                self.get_parameters(mongos=True),
+                self.get_applied_parameters(mongos=True),
+                runtime=Config.Parameters.MONGOS_RUNTIME,
+            )
+
+        applied_limits = json.loads(
+            self.unit_peer_data.get(Config.Limits.APPLIED_MAX_CONNECTIONS_KEY, "{}")
+        )
+        if applied_limits and applied_limits != self.get_max_connections_limits():
+            pending.append("maxIncomingConnections")
+
+        return sorted(set(pending))
+
+    def get_parameters_status(self) -> Optional[StatusBase]:
+        """Returns a status if the server parameters are invalid or pending a restart."""
+        try:
+            pending = self.get_pending_restart_parameters()
+        except InvalidParametersError as e:
+            return BlockedStatus(f"Invalid server parameters: {e}")
+
+        if pending:
+            return WaitingStatus(f"Restart pending to apply {', '.join(pending)}")
+
+    def reconcile_parameters(self, event: ConfigChangedEvent) -> None:
+        """Applies the configured server parameters.
+
+        Parameters that can be changed at runtime are set on the running services, a rolling
+        restart is requested for the other ones.
+        """
+        if not self.db_initialised:
+            return
+
+        try:
+            mongod_parameters = self.get_parameters()
+            mongos_parameters = self.get_parameters(mongos=True)
+        except InvalidParametersError as e:
+            logger.error("Invalid server parameters: %s", e)
+            self.status.set_and_share_status(BlockedStatus(f"Invalid server parameters: {e}"))
+            return
+
+        if self.unit.status.message.startswith("Invalid server parameters"):
+            self.status.set_and_share_status(ActiveStatus())
+
+        if self.are_parameters_applied(mongod_parameters, mongos_parameters):
+            return
+
+        # services restarted outside of the charm should use the new parameters too
+        self.update_services_config(mongod_parameters, mongos_parameters)
+
+        try:
+            self.set_runtime_parameters(mongod_parameters, mongos_parameters)
+        except PyMongoError as e:
+            logger.error("Deferring applying the server parameters, error: %r", e)
+            event.defer()
+            return
+
+        if pending := self.get_pending_restart_parameters():
+            logger.info("Requesting a rolling restart to apply %s", ", ".join(pending))
+            self.rolling_restart.request_restart()
+
+    def are_parameters_applied(self, mongod_parameters: Dict, mongos_parameters: Dict) -> bool:
+        """Returns true if the running services use the configured server parameters."""
+        # mongos only runs on config-servers
+        mongos_changed = self.is_role(Config.Role.CONFIG_SERVER) and (
+            mongos_parameters != self.get_applied_parameters(mongos=True)
+        )
+        return (
+            mongod_parameters == self.get_applied_parameters()
+            and not mongos_changed
+            and not self.get_pending_restart_parameters()
+        )
+
+    def set_runtime_parameters(self, mongod_parameters: Dict, mongos_parameters: Dict) -> None:
+        """Sets the parameters that can be changed at runtime on the services of this unit.
+
+        Raises:
+            PyMongoError
+        """
+        unit_host = {self.unit_host(self.unit)}
+        if runtime := get_runtime_parameters(mongod_parameters, Config.Parameters.MONGOD_RUNTIME):
+            with MongoDBConnection(self.remote_mongodb_config(unit_host), direct=True) as mongod:
+                mongod.set_parameters(runtime)
+
+        if self.is_role(Config.Role.CONFIG_SERVER) and (
+            runtime := get_runtime_parameters(mongos_parameters, Config.Parameters.MONGOS_RUNTIME)
+        ):
+            with MongosConnection(self.remote_mongos_config(unit_host)) as mongos:
+                mongos.set_parameters(runtime)
+
+    def get_replset_settings(self) -> Dict:
+        """Returns the configured election and heartbeat settings of the replica set.
+
+        Raises:
+            InvalidParametersError
+        """
+        return parse_replset_settings(
+            self.model.config[Config.Replication.ELECTION_TIMEOUT_CONFIG],
+            self.model.config[Config.Replication.HEARTBEAT_INTERVAL_CONFIG],
+            self.model.config[Config.Replication.CATCH_UP_TIMEOUT_CONFIG],
+            self.model.config[Config.Replication.CHAINING_ALLOWED_CONFIG],
+        )
+
+    def get_start_replset_settings(self) -> Dict:
+        """Returns the settings to initialise the replica set with, empty if invalid."""
+        try:
+            return self.get_replset_settings()
+        except InvalidParametersError as e:
+            logger.error("Invalid replica set settings, using the defaults: %s", e)
+            return {}
+
+    def get_replset_settings_status(self) -> Optional[StatusBase]:
+        """Returns a status if the replica set settings are invalid."""
+        try:
+            self.get_replset_settings()
+        except InvalidParametersError as e:
+            return BlockedStatus(f"Invalid replica set settings: {e}")
+
+    def reconcile_replset_settings(self, event: Optional[ConfigChangedEvent] = None) -> None:
+        """Applies the configured election and heartbeat settings to the replica set."""
+        if not self.unit.is_leader() or not self.db_initialised:
+            return
+
+        try:
+            settings = self.get_replset_settings()
+        except InvalidParametersError as e:
+            logger.error("Invalid replica set settings: %s", e)
+            return
+
+        applied = self.app_peer_data.get(Config.Replication.APPLIED_SETTINGS_KEY)
+        if json.dumps(settings, sort_keys=True) == applied:
+            return
+
+        try:
+            with MongoDBConnection(self.mongodb_config) as mongod:
+                if mongod.set_replicaset_settings(settings):
+                    logger.info("Replica set settings updated to %s", settings)
+        except PyMongoError as e:
+            logger.error("Deferring updating the replica set settings, error: %r", e)
+            if event:
+                event.defer()
+            return
+
+        self.app_peer_data[Config.Replication.APPLIED_SETTINGS_KEY] = json.dumps(
+            settings, sort_keys=True
+        )
+
+    def share_availability_zone(self) -> None:
+        """Shares the availability zone of this unit with the leader."""
+        if not self.peers:
+            return
+
+        az = os.environ.get("JUJU_AVAILABILITY_ZONE", "")
+        if self.unit_peer_data.get(Config.Placement.AZ_KEY, "") != az:
+            self.unit_peer_data[Config.Placement.AZ_KEY] = az
+
+    def get_member_priorities(self) -> Dict[str, float]:
+        """Returns the election priority of each unit for the configured placement policy.
+
+        Raises:
+            InvalidParametersError
+        """
+        app_name = self.app.name
+        preferred_units = parse_unit_names(
+            self.model.config[Config.Placement.PREFERRED_UNITS_CONFIG], app_name
+        )
+        avoid_units = parse_unit_names(
+            self.model.config[Config.Placement.AVOID_UNITS_CONFIG], app_name
+        )
+
+        units = [self.unit, *self.peers_units]
+        return get_member_priorities(
+            {unit.name: self.peers.data[unit].get(Config.Placement.AZ_KEY) for unit in units},
+            preferred_units,
+            self.model.config[Config.Placement.PREFERRED_AZ_CONFIG].strip(),
+            avoid_units,
+            frozenset(
+                unit.name for unit in units if Config.Prewarm.STATE_KEY in self.peers.data[unit]
+            ),
+        )
+
+    def get_primary_placement_status(self) -> Optional[StatusBase]:
+        """Returns a status if the primary placement policy is invalid."""
+        try:
+            self.get_member_priorities()
+        except InvalidParametersError as e:
+            return BlockedStatus(f"Invalid primary placement: {e}")
+
+    def reconcile_primary_placement(self, event: Optional[ConfigChangedEvent] = None) -> None:
+        """Sets the election priorities of the members for the configured placement policy.
+
+        Members with a higher priority call an election once they caught up with the primary,
+        which moves the primary to the preferred members. The priorities are left untouched
+        during an upgrade, which keeps the primary on the last unit to upgrade.
+        """
+        if not self.unit.is_leader() or not self.db_initialised:
+            return
+
+        if self.upgrade_in_progress:
+            logger.debug("Not updating the election priorities during an upgrade.")
+            return
+
+        try:
+            unit_priorities = self.get_member_priorities()
+        except InvalidParametersError as e:
+            logger.error("Invalid primary placement: %s", e)
+            return
+
+        units = [self.unit, *self.peers_units]
+        priorities = {self.unit_host(unit): unit_priorities[unit.name] for unit in units}
+        # tags let clients prefer members of their availability zone
+        tags = {
+            self.unit_host(unit): {Config.Placement.AZ_TAG: az}
+            for unit in units
+            if (az := self.peers.data[unit].get(Config.Placement.AZ_KEY))
+        }
+        try:
+            with MongoDBConnection(self.mongodb_config) as mongod:
+                if mongod.set_replicaset_member_priorities(priorities, tags):
+                    logger.info("Replica set election priorities updated to %s", priorities)
+        except PyMongoError as e:
+            logger.error("Deferring updating the election priorities, error: %r", e)
+            if event:
+                event.defer()
+
+    def get_default_rw_concern(self) -> Dict:
+        """Returns the configured cluster-wide default read and write concerns.
+
+        Raises:
+            InvalidParametersError
+        """
+        return parse_default_rw_concern(
+            self.model.config[Config.DefaultRWConcern.READ_CONCERN_CONFIG],
+            self.model.config[Config.DefaultRWConcern.WRITE_CONCERN_CONFIG],
+        )
+
+    def is_default_rw_concern_configured(self) -> bool:
+        """Returns true if a default read or write concern is configured."""
+        return bool(
+            self.model.config[Config.DefaultRWConcern.READ_CONCERN_CONFIG].strip()
+            or self.model.config[Config.DefaultRWConcern.WRITE_CONCERN_CONFIG].strip()
+        )
+
+    def get_default_rw_concern_status(self, active_status: ActiveStatus) -> StatusBase:
+        """Returns the active status with the defaults in effect, or a status if invalid."""
+        if not self.is_default_rw_concern_configured():
+            return active_status
+
+        if self.is_role(Config.Role.SHARD):
+            return BlockedStatus("Default read/write concern must be set on the config-server")
+
+        try:
+            self.get_default_rw_concern()
+        except InvalidParametersError as e:
+            return BlockedStatus(f"Invalid default read/write concern: {e}")
+
+        effective = self.app_peer_data.get(Config.DefaultRWConcern.EFFECTIVE_KEY)
+        if not effective:
+            return active_status
+
+        defaults = json.loads(effective)
+        summary = ", ".join(
+            [f"readConcern={defaults.get('defaultReadConcern', {}).get('level', 'default')}"]
+            + [
+                f"{name}={str(value).lower() if isinstance(value, bool) else value}"
+                for name, value in defaults.get("defaultWriteConcern", {}).items()
+            ]
+        )
+        message = "; ".join(
+            part for part in [active_status.message, f"default RW concern: {summary}"] if part
+        )
+        return ActiveStatus(message)
+
+    def reconcile_default_rw_concern(self, event: Optional[ConfigChangedEvent] = None) -> None:
+        """Sets the configured default read and write concerns on the replica set or cluster.
+
+        Defaults are cluster-wide, they are set by the leader through mongos on config-servers
+        and through the primary on replica sets.
+        """
+        if not self.unit.is_leader() or not self.db_initialised:
+            return
+
+        if not self.is_role(Config.Role.REPLICATION) and not self.is_role(
+            Config.Role.CONFIG_SERVER
+        ):
+            return
+
+        applied = self.app_peer_data.get(Config.DefaultRWConcern.APPLIED_KEY)
+        if not self.is_default_rw_concern_configured() and not applied:
+            return
+
+        try:
+            defaults = self.get_default_rw_concern()
+        except InvalidParametersError as e:
+            logger.error("Invalid default read/write concern: %s", e)
+            return
+
+        if json.dumps(defaults, sort_keys=True) == applied:
+            return
+
+        connection = (
+            MongosConnection(self.mongos_config)
+            if self.is_role(Config.Role.CONFIG_SERVER)
+            else MongoDBConnection(self.mongodb_config)
+        )
+        try:
+            with connection as mongo:
+                mongo.set_default_rw_concern(defaults)
+                effective = mongo.get_default_rw_concern()
+        except PyMongoError as e:
+            logger.error("Deferring setting the default read/write concern, error: %r", e)
+            if event:
+                event.defer()
+            return
+
+        logger.info("Default read/write concern set to %s", effective)
+        self.app_peer_data[Config.DefaultRWConcern.APPLIED_KEY] = json.dumps(
+            defaults, sort_keys=True
+        )
+        self.app_peer_data[Config.DefaultRWConcern.EFFECTIVE_KEY] = json.dumps(effective)
+        self.client_relations.update_default_rw_concern()
+
+    def get_oplog_size(self) -> int:
+        """Returns the configured oplog size in megabytes, 0 if not configured."""
+        size_mb = self.model.config[Config.Oplog.SIZE_CONFIG]
+        if size_mb <= 0:
+            return 0
+
+        if size_mb < Config.Oplog.MIN_SIZE_MB:
+            logger.warning(
+                "Oplog size %sMB is below the minimum, using %sMB",
+                size_mb,
+                Config.Oplog.MIN_SIZE_MB,
+            )
+            return Config.Oplog.MIN_SIZE_MB
+
+        return size_mb
+
+    def reconcile_oplog(self, event: Optional[ConfigChangedEvent] = None) -> None:
+        """Resizes the oplog of this member and sets its minimum retention period.
+
+        With no oplog size configured and a target window set, the oplog is sized to hold the
+        target window of writes at the measured write rate.
+        """
+        if not self.db_initialised:
+            return
+
+        size_mb = self.get_oplog_size()
+        min_retention_hours = float(max(self.model.config[Config.Oplog.MIN_RETENTION_CONFIG], 0))
+        target_window_hours = self.model.config[Config.Oplog.TARGET_WINDOW_CONFIG]
+        applied_min_retention_hours = json.loads(
+            self.unit_peer_data.get(Config.Oplog.APPLIED_MIN_RETENTION_KEY, "0")
+        )
+
+        if (
+            not size_mb
+            and target_window_hours <= 0
+            and min_retention_hours == applied_min_retention_hours
+        ):
+            return
+
+        unit_host = {self.unit_host(self.unit)}
+        try:
+            with MongoDBConnection(self.remote_mongodb_config(unit_host), direct=True) as mongod:
+                stats = mongod.get_oplog_stats()
+                logger.debug("Oplog window: %ss, size: %sB", stats["window"], stats["size"])
+
+                threshold = 0
+                if not size_mb and target_window_hours > 0:
+                    size_mb = get_target_oplog_size(stats, target_window_hours)
+                    threshold = Config.Oplog.AUTO_RESIZE_THRESHOLD
+
+                resize = bool(size_mb) and is_oplog_resize_needed(
+                    stats["max_size"], size_mb, threshold
+                )
+                retention_changed = min_retention_hours != applied_min_retention_hours
+                if not resize and not retention_changed:
+                    return
+
+                logger.info(
+                    "Resizing oplog to %sMB with a minimum retention of %sh",
+                    size_mb if resize else stats["max_size"] // MB,
+                    min_retention_hours,
+                )
+                mongod.resize_oplog(
+                    size_mb=size_mb if resize else None,
+                    min_retention_hours=min_retention_hours if retention_changed else None,
+                )
+        except PyMongoError as e:
+            logger.error("Deferring resizing the oplog, error: %r", e)
+            if event:
+                event.defer()
+            return
+
+        # mongod restarted outside of the charm should keep the retention period
+        self.update_services_config(*self.get_start_parameters())
+        self.unit_peer_data[Config.Oplog.APPLIED_MIN_RETENTION_KEY] = json.dumps(
+            min_retention_hours
+        )
+
     def auth_enabled(self) -> bool:
         """Returns true is a mongod service has the auth configuration."""
-        with open(Config.ENV_VAR_PATH, "r") as env_vars_file:
-            env_vars = env_vars_file.readlines()
+        try:
+            with open(Config.MONGOD_CONF_FILE_PATH, "r") as mongod_conf_file:
+                mongod_config = yaml.safe_load(mongod_conf_file) or {}
+        except FileNotFoundError:
+            return False
 
-        return any("MONGOD_ARGS" in line and "--auth" in line for line in env_vars)
+        return mongod_config.get("security", {}).get("authorization") == "enabled"
 
     def has_backup_service(self):
         """Verifies the backup service is available."""
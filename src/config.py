@@ -21,6 +21,9 @@ class Config:
     MONGODB_SNAP_DATA_DIR = "/var/snap/charmed-mongodb/current"
     MONGOD_CONF_DIR = f"{MONGODB_SNAP_DATA_DIR}/etc/mongod"
     MONGOD_CONF_FILE_PATH = f"{MONGOD_CONF_DIR}/mongod.conf"
+    MONGOS_CONF_FILE_PATH = f"{MONGOD_CONF_DIR}/mongos.conf"
+    # digest of the startup options the services were last started with
+    SERVICES_FINGERPRINT_KEY = "services-fingerprint"
     CHARM_INTERNAL_VERSION_FILE = "charm_internal_version"
     SNAP_PACKAGES = [("charmed-mongodb", "6/edge", 123)]
 
@@ -81,10 +84,201 @@ class Config:
         INT_PEM_FILE = "internal-cert.pem"
         INT_CA_FILE = "internal-ca.crt"
         SECRET_CA_LABEL = "ca-secret"
+        SECRET_PREVIOUS_CA_LABEL = "previous-ca-secret"
         SECRET_CERT_LABEL = "cert-secret"
         SECRET_CSR_LABEL = "csr-secret"
         SECRET_CHAIN_LABEL = "chain-secret"
 
+        PRIVATE_KEY_TYPE_CONFIG = "tls-private-key-type"
+        RSA_KEY_TYPE = "rsa"
+        ECDSA_KEY_TYPE = "ecdsa"
+        MIN_RSA_KEY_SIZE = 2048
+
+    class Replication:
+        """Replica set settings related config for MongoDB Charm."""
+
+        ELECTION_TIMEOUT_CONFIG = "election-timeout-ms"
+        HEARTBEAT_INTERVAL_CONFIG = "heartbeat-interval-ms"
+        CATCH_UP_TIMEOUT_CONFIG = "catch-up-timeout-ms"
+        CHAINING_ALLOWED_CONFIG = "chaining-allowed"
+        # settings last applied to the replica set, in the app databag
+        APPLIED_SETTINGS_KEY = "applied-replset-settings"
+        MIN_ELECTION_TIMEOUT = 1000
+        MIN_HEARTBEAT_INTERVAL = 100
+
+    class Placement:
+        """Primary placement related config for MongoDB Charm."""
+
+        PREFERRED_UNITS_CONFIG = "primary-preferred-units"
+        PREFERRED_AZ_CONFIG = "primary-preferred-az"
+        AVOID_UNITS_CONFIG = "primary-avoid-units"
+        # availability zone of the unit, in the unit databag
+        AZ_KEY = "availability-zone"
+        # replica set member tag holding the availability zone of the member
+        AZ_TAG = "availability-zone"
+        PREFERRED_UNIT_PRIORITY = 3
+        PREFERRED_AZ_PRIORITY = 2
+        DEFAULT_PRIORITY = 1
+        # avoided members can still be elected when no other member is electable
+        AVOIDED_PRIORITY = 0.5
+
+    class Oplog:
+        """Oplog sizing related config for MongoDB Charm."""
+
+        SIZE_CONFIG = "oplog-size-mb"
+        MIN_RETENTION_CONFIG = "oplog-min-retention-hours"
+        TARGET_WINDOW_CONFIG = "oplog-target-window-hours"
+        # minimum retention period last applied to the running mongod
+        APPLIED_MIN_RETENTION_KEY = "applied-oplog-min-retention-hours"
+        MIN_SIZE_MB = 990
+        # the write rate is only measured once the oplog holds enough entries
+        MIN_MEASURED_WINDOW = 600
+        # headroom over the measured write rate when sizing the oplog for the target window
+        AUTO_SIZE_HEADROOM = 1.2
+        # oplogs sized automatically are only resized when off by more than this ratio
+        AUTO_RESIZE_THRESHOLD = 0.1
+
+    class Parameters:
+        """setParameter related config for MongoDB Charm."""
+
+        MONGOD_CONFIG = "mongod-parameters"
+        MONGOS_CONFIG = "mongos-parameters"
+        # parameters the services were last started with, shared in the unit databag
+        APPLIED_MONGOD_KEY = "applied-mongod-parameters"
+        APPLIED_MONGOS_KEY = "applied-mongos-parameters"
+
+        # parameters that can be changed on the running process with setParameter
+        MONGOD_RUNTIME = frozenset(
+            {
+                "cursorTimeoutMillis",
+                "wiredTigerConcurrentReadTransactions",
+                "wiredTigerConcurrentWriteTransactions",
+                "diagnosticDataCollectionEnabled",
+                "enableFlowControl",
+                "flowControlTargetLagSeconds",
+                "internalQueryMaxBlockingSortMemoryUsageBytes",
+                "logLevel",
+                "maxIndexBuildMemoryUsageMegabytes",
+                "maxTransactionLockRequestTimeoutMillis",
+                "notablescan",
+                "transactionLifetimeLimitSeconds",
+                "ttlMonitorEnabled",
+            }
+        )
+        # parameters that can only be set when the process starts
+        MONGOD_STARTUP = frozenset(
+            {
+                "initialSyncMethod",
+                "initialSyncSourceReadPreference",
+                "oplogFetcherUsesExhaust",
+                "replWriterThreadCount",
+                "taskExecutorPoolSize",
+                "tcpFastOpenQueueSize",
+                "tcpFastOpenServer",
+            }
+        )
+        # parameters that weaken the access control of the charm, rejected in both options
+        DENIED = frozenset({"enableLocalhostAuthBypass"})
+        MONGOS_RUNTIME = frozenset(
+            {
+                "cursorTimeoutMillis",
+                "diagnosticDataCollectionEnabled",
+                "logLevel",
+            }
+        )
+        MONGOS_STARTUP = frozenset(
+            {
+                "ShardingTaskExecutorPoolHostTimeoutMS",
+                "ShardingTaskExecutorPoolMaxConnecting",
+                "ShardingTaskExecutorPoolMaxSize",
+                "ShardingTaskExecutorPoolMinSize",
+                "ShardingTaskExecutorPoolRefreshTimeoutMS",
+                "taskExecutorPoolSize",
+                "tcpFastOpenServer",
+            }
+        )
+
+    class DefaultRWConcern:
+        """Cluster-wide default read and write concerns related config for MongoDB Charm."""
+
+        READ_CONCERN_CONFIG = "default-read-concern"
+        WRITE_CONCERN_CONFIG = "default-write-concern"
+        READ_CONCERN_LEVELS = frozenset({"local", "available", "majority"})
+        WRITE_CONCERN_FIELDS = frozenset({"w", "j", "wtimeout"})
+        # defaults last set by the leader and the defaults in effect, in the app databag
+        APPLIED_KEY = "applied-default-rw-concern"
+        EFFECTIVE_KEY = "effective-default-rw-concern"
+        # fields shared with the clients
+        READ_CONCERN_FIELD = "default-read-concern"
+        WRITE_CONCERN_FIELD = "default-write-concern"
+
+    class Limits:
+        """Connection and concurrency limits related config for MongoDB Charm."""
+
+        MAX_INCOMING_CONNECTIONS_CONFIG = "max-incoming-connections"
+        MONGOS_MAX_INCOMING_CONNECTIONS_CONFIG = "mongos-max-incoming-connections"
+        READ_TICKETS_CONFIG = "storage-read-tickets"
+        WRITE_TICKETS_CONFIG = "storage-write-tickets"
+        POOL_MAX_SIZE_CONFIG = "mongos-pool-max-size"
+        POOL_MIN_SIZE_CONFIG = "mongos-pool-min-size"
+        POOL_MAX_CONNECTING_CONFIG = "mongos-pool-max-connecting"
+        # incoming connection limits the services were last started with
+        APPLIED_MAX_CONNECTIONS_KEY = "applied-max-incoming-connections"
+
+        # server parameters set through the config options, by config option name
+        MONGOD_PARAMETERS = {
+            READ_TICKETS_CONFIG: "wiredTigerConcurrentReadTransactions",
+            WRITE_TICKETS_CONFIG: "wiredTigerConcurrentWriteTransactions",
+        }
+        MONGOS_PARAMETERS = {
+            POOL_MAX_SIZE_CONFIG: "ShardingTaskExecutorPoolMaxSize",
+            POOL_MIN_SIZE_CONFIG: "ShardingTaskExecutorPoolMinSize",
+            POOL_MAX_CONNECTING_CONFIG: "ShardingTaskExecutorPoolMaxConnecting",
+        }
+
+    class InitialSync:
+        """Initial sync of new members related config for MongoDB Charm."""
+
+        METHOD_CONFIG = "initial-sync-method"
+        SOURCE_CONFIG = "initial-sync-source"
+        # initialSyncMethod by config value, the logical initial sync is the MongoDB default
+        METHODS = {"logical": None, "file-copy": "fileCopyBased"}
+        # initialSyncSourceReadPreference by config value
+        SOURCES = {
+            "": None,
+            "primary": "primary",
+            "secondary": "secondaryPreferred",
+            "nearest": "nearest",
+        }
+        # only used by members that did not sync yet, changes do not require a restart
+        PARAMETERS = frozenset({"initialSyncMethod", "initialSyncSourceReadPreference"})
+
+    class Dump:
+        """Import and export of logical dumps related config for MongoDB Charm."""
+
+        RESTORE_COMMAND = "charmed-mongodb.mongorestore"
+        DUMP_COMMAND = "charmed-mongodb.mongodump"
+        # directory of the exported archives, relative to the storage of the unit
+        EXPORT_DIR = "dumps"
+        CHUNK_SIZE = 1024**2
+        # the database tools read the password from a file, kept out of the process list
+        TOOLS_CONFIG_FILE_NAME = "database-tools.yaml"
+
+    class FlowControl:
+        """Flow control of the writes on the primary related config for MongoDB Charm."""
+
+        ENABLED_CONFIG = "flow-control"
+        TARGET_LAG_CONFIG = "flow-control-target-lag"
+
+    class Probe:
+        """Cluster-wide health probe related constants."""
+
+        MAX_WORKERS = 8
+        # seconds granted to probe all the shards or members of a fan-out
+        DEADLINE = 10
+        # server side timeout of the read/write operations of a probe
+        OPERATION_TIMEOUT_MS = 3000
+
     class Relations:
         """Relations related config for MongoDB Charm."""
 
@@ -116,6 +310,12 @@ class Config:
         SECRET_DELETED_LABEL = "None"
         MAX_PASSWORD_LENGTH = 4096
 
+    class Sharding:
+        """Sharding related constants."""
+
+        HASHED_MODE = "hashed"
+        RANGED_MODE = "ranged"
+
     class Status:
         """Status related constants.
 
@@ -133,7 +333,49 @@ class Config:
         VM = "vm"
         K8S = "k8s"
 
+    class Prewarm:
+        """Cache pre-warming related constants."""
+
+        TIMEOUT_CONFIG = "prewarm-timeout"
+        MAX_SIZE_CONFIG = "prewarm-max-size-mb"
+        # the unit is unelectable until pre-warmed, in the unit databag
+        STATE_KEY = "prewarming"
+        # most used collections and indexes sampled on update-status, in the unit databag
+        COLLECTIONS_KEY = "prewarm-collections"
+        # process id of mongod, to detect restarts outside of the charm, in the unit databag
+        PID_KEY = "mongod-pid"
+        MAX_COLLECTIONS = 10
+
+    class Shutdown:
+        """Graceful shutdown related constants."""
+
+        TIMEOUT_CONFIG = "shutdown-timeout"
+        # seconds mongod reports it is shutting down before it closes its connections
+        QUIESCE_SECS = 5
+
+    class RollingRestart:
+        """Rolling restart related constants."""
+
+        # units request a restart in their databag, the leader grants one unit at a time
+        REQUEST_KEY = "restart-request"
+        GRANTED_KEY = "restart-granted"
+        REQUESTED = "requested"
+        RESTARTED = "restarted"
+        MAX_CATCH_UP_LAG = 10
+
+    class RollingCompact:
+        """Rolling compaction related config for MongoDB Charm."""
+
+        MAINTENANCE_WINDOW_CONFIG = "maintenance-window"
+        MAX_CATCH_UP_LAG = 10
+        CATCH_UP_TIMEOUT = 600
+
     class Upgrade:
         """Upgrade related constants."""
 
         FEATURE_VERSION_6 = "6.0"
+        # shard units share their refresh state with the config-server, which authorizes the
+        # shards to refresh in waves
+        SHARD_REFRESH_STATE_KEY = "refresh-state"
+        SHARD_REFRESH_AUTHORIZED_KEY = "refresh-authorized"
+        SHARD_REFRESH_CONCURRENCY_KEY = "refresh-concurrency"
@@ -0,0 +1,226 @@
+# Copyright 2024 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Import and export of logical dumps with the MongoDB database tools of the snap."""
+
+import gzip
+import re
+import time
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Tuple
+
+from bson import json_util
+from charms.mongodb.v0.mongo import MongoConfiguration
+
+from config import Config
+from exceptions import InvalidDumpError
+
+# summary printed by mongorestore once done
+RESTORED_DOCUMENTS_PATTERN = re.compile(
+    r"(\d+) document\(s\) restored successfully\. (\d+) document\(s\) failed to restore"
+)
+
+
+def _resolve_path(raw_path: str) -> Path:
+    """Returns the absolute path of a dump, relative paths being relative to the unit storage.
+
+    Raises:
+        InvalidDumpError if the path is out of reach of the snap.
+    """
+    path = (Config.MONGODB_COMMON_PATH / raw_path.strip()).resolve()
+    # the database tools are confined to the directories of the snap
+    if not path.is_relative_to(Config.MONGODB_COMMON_PATH):
+        raise InvalidDumpError(f"{raw_path} is not in {Config.MONGODB_COMMON_PATH}")
+
+    return path
+
+
+def resolve_dump_path(raw_path: str) -> Path:
+    """Returns the absolute path of a dump to import.
+
+    Raises:
+        InvalidDumpError if the dump does not exist or is out of reach of the snap.
+    """
+    path = _resolve_path(raw_path)
+    if not path.exists():
+        raise InvalidDumpError(f"{path} does not exist")
+
+    return path
+
+
+def resolve_export_path(raw_path: str) -> Path:
+    """Returns the absolute path of the archive to export to.
+
+    Raises:
+        InvalidDumpError if the archive already exists or is out of reach of the snap.
+    """
+    path = _resolve_path(raw_path)
+    if path.exists():
+        raise InvalidDumpError(f"{path} already exists")
+
+    return path
+
+
+def get_connection_args(config: MongoConfiguration) -> List[str]:
+    """Returns the arguments of the database tools connecting to mongod or mongos.
+
+    The password is not part of the arguments, to keep it out of the process list.
+    """
+    hosts = ",".join(f"{host}:{config.port}" for host in sorted(config.hosts))
+    return [
+        f"--host={config.replset}/{hosts}" if config.replset else f"--host={hosts}",
+        f"--username={config.username}",
+        "--authenticationDatabase=admin",
+    ]
+
+
+def get_restore_command(
+    path: Path,
+    parallel_collections: int,
+    insertion_workers: int,
+    defer_index_builds: bool = False,
+    drop: bool = False,
+) -> List[str]:
+    """Returns the mongorestore command loading a dump directory or archive.
+
+    Args:
+        path: dump directory or archive file.
+        parallel_collections: number of collections restored in parallel.
+        insertion_workers: number of insertion workers per collection.
+        defer_index_builds: skip the indexes, to build them once all the data is loaded.
+        drop: drop the collections before restoring them.
+    """
+    command = [
+        Config.Dump.RESTORE_COMMAND,
+        f"--numParallelCollections={parallel_collections}",
+        f"--numInsertionWorkersPerCollection={insertion_workers}",
+    ]
+    if drop:
+        command.append("--drop")
+
+    if defer_index_builds:
+        command.append("--noIndexRestore")
+
+    if path.is_file():
+        if path.suffix == ".gz":
+            command.append("--gzip")
+        command.append(f"--archive={path}")
+    else:
+        if any(path.glob("*/*.bson.gz")):
+            command.append("--gzip")
+        command.append(f"--dir={path}")
+
+    return command
+
+
+def get_dump_command(
+    database: str,
+    collections: List[str],
+    existing_collections: List[str],
+    parallel_collections: int,
+) -> List[str]:
+    """Returns the mongodump command streaming a gzipped archive of a database to stdout.
+
+    The documents are read from a secondary, if any, to keep the load off the primary.
+
+    Args:
+        database: database to export.
+        collections: collections of the database to export, all of them if empty.
+        existing_collections: collections of the database.
+        parallel_collections: number of collections dumped in parallel.
+
+    Raises:
+        InvalidDumpError if the database or a collection does not exist.
+    """
+    if not existing_collections:
+        raise InvalidDumpError(f"database {database} has no collections")
+
+    if missing := set(collections) - set(existing_collections):
+        raise InvalidDumpError(f"{', '.join(sorted(missing))} not in database {database}")
+
+    command = [
+        Config.Dump.DUMP_COMMAND,
+        "--archive",
+        "--gzip",
+        f"--db={database}",
+        f"--numParallelCollections={parallel_collections}",
+        "--readPreference=secondaryPreferred",
+    ]
+    # mongodump selects a single collection or excludes the other ones
+    if len(collections) == 1:
+        command.append(f"--collection={collections[0]}")
+    elif collections:
+        command += [
+            f"--excludeCollection={collection}"
+            for collection in sorted(set(existing_collections) - set(collections))
+        ]
+
+    return command
+
+
+def stream_to_file(source: BinaryIO, path: Path, max_rate: int = 0) -> int:
+    """Copies a stream to a file, at most `max_rate` bytes per second if set.
+
+    Throttling the copy throttles the process writing to the stream once the pipe is full.
+
+    Returns:
+        The number of bytes written.
+
+    Raises:
+        OSError if the file cannot be written, e.g. the storage is full.
+    """
+    written = 0
+    started = time.monotonic()
+    with open(path, "wb") as file:
+        while chunk := source.read(Config.Dump.CHUNK_SIZE):
+            file.write(chunk)
+            written += len(chunk)
+            if max_rate and (ahead := written / max_rate - (time.monotonic() - started)) > 0:
+                time.sleep(ahead)
+
+    return written
+
+
+def get_tool_error(stderr: str) -> str:
+    """Returns the cause of the failure of a database tool, which it logs last."""
+    lines = stderr.strip().splitlines()
+    return lines[-1] if lines else "no output"
+
+
+def parse_restore_output(output: str) -> Tuple[int, int]:
+    """Returns the number of documents restored and failed to restore by mongorestore."""
+    if not (match := RESTORED_DOCUMENTS_PATTERN.search(output)):
+        return 0, 0
+
+    return int(match.group(1)), int(match.group(2))
+
+
+def get_dump_size(path: Path) -> int:
+    """Returns the size in bytes of a dump directory or archive."""
+    if path.is_file():
+        return path.stat().st_size
+
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def get_dump_indexes(path: Path) -> Dict[str, List[Dict]]:
+    """Returns the secondary indexes of the collections of a dump directory, by namespace."""
+    indexes = {}
+    for metadata_file in sorted(path.glob("*/*.metadata.json*")):
+        open_metadata = gzip.open if metadata_file.suffix == ".gz" else open
+        with open_metadata(metadata_file, "rt") as file:
+            metadata = json_util.loads(file.read())
+
+        collection = (
+            metadata.get("collectionName") or metadata_file.name.partition(".metadata.json")[0]
+        )
+        # the _id index is built with the collection, the others as they are in the source
+        specs = [
+            {name: value for name, value in index.items() if name not in ("v", "ns")}
+            for index in metadata.get("indexes", [])
+            if index["name"] != "_id_"
+        ]
+        if specs:
+            indexes[f"{metadata_file.parent.name}.{collection}"] = specs
+
+    return indexes
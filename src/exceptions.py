@@ -34,3 +34,15 @@ class SecretAlreadyExistsError(MongoSecretError):
 
 class NotConfigServerError(Exception):
     """Raised when an operation is performed on a component that is not a config server."""
+
+
+class InvalidParametersError(Exception):
+    """Raised when the configured server parameters are not valid."""
+
+
+class InvalidDumpError(Exception):
+    """Raised when a dump to import is not valid."""
+
+
+class MemberNotCaughtUpError(Exception):
+    """Raised when a member has not yet caught up with the primary."""
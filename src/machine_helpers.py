@@ -2,15 +2,24 @@
 
 # Copyright 2024 Canonical Ltd.
 # See LICENSE file for licensing details.
+import hashlib
 import logging
+import os
+from typing import Dict, List, Optional
 
 import jinja2
+import yaml
 from charms.mongodb.v1.helpers import (
+    KEY_FILE,
     LOG_DIR,
     MONGODB_COMMON_DIR,
+    TLS_EXT_CA_FILE,
+    TLS_EXT_PEM_FILE,
+    TLS_INT_CA_FILE,
+    TLS_INT_PEM_FILE,
     add_args_to_env,
-    get_mongod_args,
-    get_mongos_args,
+    get_mongod_config,
+    get_mongos_config,
 )
 from charms.mongodb.v1.mongodb import MongoConfiguration
 
@@ -24,17 +33,133 @@ MONGO_USER = "snap_daemon"
 
 
 def update_mongod_service(
-    machine_ip: str, config: MongoConfiguration, role: str = "replication"
-) -> None:
-    """Updates the mongod service file with the new options for starting."""
-    # write our arguments and write them to /etc/environment - the environment variable here is
-    # read in in the charmed-mongob.mongod.service file.
-    mongod_start_args = get_mongod_args(config, auth=True, role=role, snap_install=True)
-    add_args_to_env("MONGOD_ARGS", mongod_start_args)
+    machine_ip: str,
+    config: MongoConfiguration,
+    role: str = "replication",
+    mongod_parameters: Optional[Dict] = None,
+    mongos_parameters: Optional[Dict] = None,
+    mongod_max_connections: Optional[int] = None,
+    mongos_max_connections: Optional[int] = None,
+    oplog_size_mb: Optional[int] = None,
+    oplog_min_retention_hours: Optional[float] = None,
+) -> List[str]:
+    """Updates the mongod and mongos configuration files with the new options for starting.
+
+    Returns:
+        The sorted names of the options that changed, mongos options are prefixed with `mongos.`.
+    """
+    mongod_config = get_mongod_config(
+        config,
+        auth=True,
+        role=role,
+        snap_install=True,
+        parameters=mongod_parameters,
+        max_connections=mongod_max_connections,
+        oplog_size_mb=oplog_size_mb,
+        oplog_min_retention_hours=oplog_min_retention_hours,
+    )
+    changed_options = _write_config_file(Config.MONGOD_CONF_FILE_PATH, mongod_config)
+    # the environment variable here is read in in the charmed-mongob.mongod.service file.
+    add_args_to_env("MONGOD_ARGS", f"--config {Config.MONGOD_CONF_FILE_PATH}")
+
+    if role == Config.Role.CONFIG_SERVER:
+        mongos_config = get_mongos_config(
+            config,
+            snap_install=True,
+            parameters=mongos_parameters,
+            max_connections=mongos_max_connections,
+        )
+        changed_options += [
+            f"mongos.{option}"
+            for option in _write_config_file(Config.MONGOS_CONF_FILE_PATH, mongos_config)
+        ]
+        add_args_to_env("MONGOS_ARGS", f"--config {Config.MONGOS_CONF_FILE_PATH}")
+
+    if changed_options:
+        logger.debug("Updated service options: %s", ", ".join(changed_options))
 
+    return sorted(changed_options)
+
+
+def get_services_fingerprint(role: str = "replication") -> str:
+    """Returns a digest of the startup options and files the services are started with.
+
+    Server parameters that can be changed on the running services are left out, so that a
+    change of those alone does not require a restart.
+    """
+    digest = hashlib.sha256()
+    config_files = [(Config.MONGOD_CONF_FILE_PATH, Config.Parameters.MONGOD_RUNTIME)]
     if role == Config.Role.CONFIG_SERVER:
-        mongos_start_args = get_mongos_args(config, snap_install=True)
-        add_args_to_env("MONGOS_ARGS", mongos_start_args)
+        config_files.append((Config.MONGOS_CONF_FILE_PATH, Config.Parameters.MONGOS_RUNTIME))
+
+    for path, runtime_parameters in config_files:
+        startup_config = _read_config_file(path)
+        parameters = startup_config.get("setParameter", {})
+        for name in runtime_parameters & parameters.keys():
+            del parameters[name]
+
+        # the oplog is resized at runtime
+        startup_config.get("replication", {}).pop("oplogSizeMB", None)
+        startup_config.get("storage", {}).pop("oplogMinRetentionHours", None)
+
+        digest.update(yaml.safe_dump(startup_config, sort_keys=True).encode())
+
+    for file_name in [
+        KEY_FILE,
+        TLS_EXT_PEM_FILE,
+        TLS_EXT_CA_FILE,
+        TLS_INT_PEM_FILE,
+        TLS_INT_CA_FILE,
+    ]:
+        path = f"{Config.MONGOD_CONF_DIR}/{file_name}"
+        if os.path.exists(path):
+            with open(path, "rb") as file:
+                digest.update(file_name.encode() + file.read())
+
+    return digest.hexdigest()
+
+
+def _read_config_file(path: str) -> Dict:
+    """Returns the options of a mongod or mongos configuration file."""
+    try:
+        with open(path, "r") as file:
+            return yaml.safe_load(file) or {}
+    except FileNotFoundError:
+        return {}
+
+
+def _write_config_file(path: str, options: Dict) -> List[str]:
+    """Atomically writes a mongod or mongos configuration file.
+
+    Returns:
+        The dotted names of the options that differ from the previous file.
+    """
+    old_options = _flatten_options(_read_config_file(path))
+    new_options = _flatten_options(options)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        yaml.safe_dump(options, file, sort_keys=True)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+    return [
+        option
+        for option in old_options.keys() | new_options.keys()
+        if old_options.get(option) != new_options.get(option)
+    ]
+
+
+def _flatten_options(options: Dict, prefix: str = "") -> Dict:
+    """Returns the nested options keyed by their dotted names."""
+    flattened = {}
+    for name, value in options.items():
+        if isinstance(value, dict):
+            flattened.update(_flatten_options(value, f"{prefix}{name}."))
+        else:
+            flattened[f"{prefix}{name}"] = value
+
+    return flattened
 
 
 def setup_logrotate_and_cron() -> None:
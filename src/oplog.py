@@ -0,0 +1,44 @@
+# Copyright 2024 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Sizing of the oplog for a target recovery window."""
+
+from math import ceil
+from typing import Dict, Optional
+
+from config import Config
+
+MB = 1024**2
+
+
+def get_target_oplog_size(stats: Dict, target_window_hours: float) -> Optional[int]:
+    """Returns the oplog size in megabytes holding `target_window_hours` of writes.
+
+    The write rate is measured from the entries currently in the oplog.
+
+    Args:
+        stats: oplog statistics, as returned by `MongoDBConnection.get_oplog_stats`.
+        target_window_hours: time the oplog should cover for members to recover from an outage.
+
+    Returns:
+        The oplog size or None if the oplog does not hold enough entries to measure the write
+        rate.
+    """
+    if stats["window"] < Config.Oplog.MIN_MEASURED_WINDOW or not stats["size"]:
+        return None
+
+    write_rate = stats["size"] / stats["window"]
+    size = write_rate * target_window_hours * 3600 * Config.Oplog.AUTO_SIZE_HEADROOM / MB
+    return max(Config.Oplog.MIN_SIZE_MB, ceil(size))
+
+
+def is_oplog_resize_needed(max_size: int, size_mb: int, threshold: float = 0) -> bool:
+    """Returns true if the oplog size differs from `size_mb` by more than `threshold`.
+
+    Args:
+        max_size: current maximum size of the oplog in bytes.
+        size_mb: expected size of the oplog in megabytes.
+        threshold: tolerated difference, as a ratio of the current size.
+    """
+    current_size_mb = max_size / MB
+    return abs(size_mb - current_size_mb) > max(1, current_size_mb * threshold)
@@ -0,0 +1,233 @@
+# Copyright 2024 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Parsing and classification of the server parameters set through the charm config."""
+
+from typing import Dict, FrozenSet, List, Union
+
+from config import Config
+from exceptions import InvalidParametersError
+
+ParameterValue = Union[bool, int, float, str]
+
+
+def _parse_value(value: str) -> ParameterValue:
+    """Returns the typed value of a parameter."""
+    if value.lower() in ["true", "false"]:
+        return value.lower() == "true"
+
+    for value_type in [int, float]:
+        try:
+            return value_type(value)
+        except ValueError:
+            pass
+
+    return value
+
+
+def parse_parameters(
+    raw_parameters: str, runtime: FrozenSet[str], startup: FrozenSet[str]
+) -> Dict[str, ParameterValue]:
+    """Parses a comma separated list of `name=value` server parameters.
+
+    Args:
+        raw_parameters: parameters as provided in the charm config.
+        runtime: names of the parameters that can be changed on the running process.
+        startup: names of the parameters that can only be set when the process starts.
+
+    Raises:
+        InvalidParametersError if a parameter is malformed, unknown, denied or set more than once.
+    """
+    parameters = {}
+    for raw_parameter in raw_parameters.split(","):
+        if not raw_parameter.strip():
+            continue
+
+        name, separator, value = raw_parameter.partition("=")
+        name, value = name.strip(), value.strip()
+        if not separator or not name or not value:
+            raise InvalidParametersError(f"expected name=value, got {raw_parameter.strip()}")
+
+        if name in Config.Parameters.DENIED:
+            raise InvalidParametersError(f"parameter {name} is not allowed")
+
+        if name not in runtime | startup:
+            raise InvalidParametersError(f"unsupported parameter {name}")
+
+        if name in parameters:
+            raise InvalidParametersError(f"parameter {name} set more than once")
+
+        parameters[name] = _parse_value(value)
+
+    return parameters
+
+
+def get_runtime_parameters(
+    parameters: Dict[str, ParameterValue], runtime: FrozenSet[str]
+) -> Dict[str, ParameterValue]:
+    """Returns the parameters that can be applied to the running process."""
+    return {name: value for name, value in parameters.items() if name in runtime}
+
+
+def get_pending_restart_parameters(
+    parameters: Dict[str, ParameterValue],
+    applied_parameters: Dict[str, ParameterValue],
+    runtime: FrozenSet[str],
+) -> List[str]:
+    """Returns the names of the parameters that only take effect after a restart.
+
+    Args:
+        parameters: configured parameters.
+        applied_parameters: parameters the process was started with.
+        runtime: names of the parameters that can be changed on the running process.
+    """
+    pending = []
+    for name in sorted(parameters.keys() | applied_parameters.keys()):
+        if parameters.get(name) == applied_parameters.get(name):
+            continue
+
+        # runtime parameters can be changed but not reset to their default without a restart
+        if name in runtime and name in parameters:
+            continue
+
+        pending.append(name)
+
+    return pending
+
+
+def parse_default_rw_concern(read_concern: str, write_concern: str) -> Dict:
+    """Returns the arguments of `setDefaultRWConcern` for the configured defaults.
+
+    Args:
+        read_concern: default read concern level, empty to unset the default.
+        write_concern: comma separated `w`, `j` and `wtimeout` of the default write concern,
+            empty to keep the current default.
+
+    Raises:
+        InvalidParametersError if the read concern level or the write concern is invalid.
+    """
+    read_concern = read_concern.strip()
+    if read_concern and read_concern not in Config.DefaultRWConcern.READ_CONCERN_LEVELS:
+        raise InvalidParametersError(f"unsupported read concern level {read_concern}")
+
+    defaults = {"defaultReadConcern": {"level": read_concern} if read_concern else {}}
+
+    fields = parse_parameters(
+        write_concern, runtime=Config.DefaultRWConcern.WRITE_CONCERN_FIELDS, startup=frozenset()
+    )
+    if not fields:
+        return defaults
+
+    if "w" not in fields:
+        raise InvalidParametersError("write concern requires w")
+
+    # bool is a subclass of int
+    if isinstance(fields["w"], (bool, float)) or (
+        isinstance(fields["w"], int) and fields["w"] < 0
+    ):
+        raise InvalidParametersError(f"invalid write concern w={fields['w']}")
+
+    if not isinstance(fields.get("j", False), bool):
+        raise InvalidParametersError(f"invalid write concern j={fields['j']}")
+
+    wtimeout = fields.get("wtimeout", 0)
+    if isinstance(wtimeout, bool) or not isinstance(wtimeout, int) or wtimeout < 0:
+        raise InvalidParametersError(f"invalid write concern wtimeout={wtimeout}")
+
+    defaults["defaultWriteConcern"] = fields
+    return defaults
+
+
+def parse_initial_sync_parameters(
+    method: str, source: str, chaining_allowed: bool = True
+) -> Dict[str, str]:
+    """Returns the server parameters selecting how new members sync their data.
+
+    Args:
+        method: `logical` to copy the documents, `file-copy` to copy the data files of the sync
+            source.
+        source: member to sync from, `primary`, `secondary`, `nearest` for the member with the
+            lowest latency, or empty for the MongoDB default. The read preference of the source
+            takes no tags.
+        chaining_allowed: whether secondaries can replicate from other secondaries.
+
+    Raises:
+        InvalidParametersError if the method or the source is unsupported.
+    """
+    if method not in Config.InitialSync.METHODS:
+        raise InvalidParametersError(f"unsupported initial sync method {method}")
+
+    if source not in Config.InitialSync.SOURCES:
+        raise InvalidParametersError(f"unsupported initial sync source {source}")
+
+    # without chaining, members only replicate from the primary
+    if not chaining_allowed and source not in ("", "primary"):
+        raise InvalidParametersError(f"initial sync from {source} requires chaining")
+
+    parameters = {
+        "initialSyncMethod": Config.InitialSync.METHODS[method],
+        "initialSyncSourceReadPreference": Config.InitialSync.SOURCES[source],
+    }
+    return {name: value for name, value in parameters.items() if value}
+
+
+def parse_flow_control_parameters(enabled: bool, target_lag: int) -> Dict[str, Union[bool, int]]:
+    """Returns the server parameters throttling the writes when the majority commit point lags.
+
+    Args:
+        enabled: whether the primary throttles the writes.
+        target_lag: seconds the majority commit point can lag behind before writes are throttled.
+
+    Raises:
+        InvalidParametersError if the target lag is not positive.
+    """
+    if target_lag < 1:
+        raise InvalidParametersError("flow control target lag must be at least 1s")
+
+    # always set, so that the options can be changed back without a restart
+    return {"enableFlowControl": enabled, "flowControlTargetLagSeconds": target_lag}
+
+
+def parse_replset_settings(
+    election_timeout: int,
+    heartbeat_interval: int,
+    catch_up_timeout: int,
+    chaining_allowed: bool = True,
+) -> Dict[str, Union[bool, int]]:
+    """Returns the election, heartbeat and chaining settings of the replica set config.
+
+    Args:
+        election_timeout: milliseconds without reaching the primary before calling an election.
+        heartbeat_interval: milliseconds between heartbeats of the members.
+        catch_up_timeout: milliseconds a new primary catches up with the other members, -1 for
+            no limit.
+        chaining_allowed: whether secondaries can replicate from other secondaries.
+
+    Raises:
+        InvalidParametersError if the settings are out of bounds or inconsistent.
+    """
+    if election_timeout < Config.Replication.MIN_ELECTION_TIMEOUT:
+        raise InvalidParametersError(
+            f"election timeout must be at least {Config.Replication.MIN_ELECTION_TIMEOUT}ms"
+        )
+
+    if heartbeat_interval < Config.Replication.MIN_HEARTBEAT_INTERVAL:
+        raise InvalidParametersError(
+            f"heartbeat interval must be at least {Config.Replication.MIN_HEARTBEAT_INTERVAL}ms"
+        )
+
+    # a single lost heartbeat should not trigger an election
+    if heartbeat_interval * 2 > election_timeout:
+        raise InvalidParametersError(
+            "heartbeat interval must be at most half of the election timeout"
+        )
+
+    if catch_up_timeout < -1:
+        raise InvalidParametersError("catch up timeout must be -1 or positive")
+
+    return {
+        "electionTimeoutMillis": election_timeout,
+        "heartbeatIntervalMillis": heartbeat_interval,
+        "catchUpTimeoutMillis": catch_up_timeout,
+        "chainingAllowed": chaining_allowed,
+    }
@@ -0,0 +1,71 @@
+# Copyright 2024 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Conversion of the primary placement policy into replica set member priorities."""
+
+from typing import Dict, FrozenSet, Optional
+
+from config import Config
+from exceptions import InvalidParametersError
+
+
+def parse_unit_names(raw_units: str, app_name: str) -> FrozenSet[str]:
+    """Parses a comma separated list of unit names of the application.
+
+    Raises:
+        InvalidParametersError if a name is not a unit of the application.
+    """
+    units = set()
+    for unit in raw_units.split(","):
+        unit = unit.strip()
+        if not unit:
+            continue
+
+        name, _, number = unit.partition("/")
+        if name != app_name or not number.isdigit():
+            raise InvalidParametersError(f"{unit} is not a unit of {app_name}")
+
+        units.add(unit)
+
+    return frozenset(units)
+
+
+def get_member_priorities(
+    units_az: Dict[str, Optional[str]],
+    preferred_units: FrozenSet[str],
+    preferred_az: str,
+    avoid_units: FrozenSet[str],
+    prewarming_units: FrozenSet[str] = frozenset(),
+) -> Dict[str, float]:
+    """Returns the election priority of each unit for the placement policy.
+
+    Args:
+        units_az: availability zone of each unit, by unit name.
+        preferred_units: units that should hold the primary.
+        preferred_az: availability zone that should hold the primary when no preferred unit is
+            available, empty for any zone.
+        avoid_units: units that should only hold the primary if no other member is electable.
+        prewarming_units: units that must not hold the primary until their cache is warm.
+
+    Raises:
+        InvalidParametersError if a unit is both preferred and avoided.
+    """
+    if conflicting := preferred_units & avoid_units:
+        raise InvalidParametersError(
+            f"{', '.join(sorted(conflicting))} both preferred and avoided"
+        )
+
+    priorities = {}
+    for unit, az in units_az.items():
+        if unit in prewarming_units:
+            priorities[unit] = 0
+        elif unit in avoid_units:
+            priorities[unit] = Config.Placement.AVOIDED_PRIORITY
+        elif unit in preferred_units:
+            priorities[unit] = Config.Placement.PREFERRED_UNIT_PRIORITY
+        elif preferred_az and az == preferred_az:
+            priorities[unit] = Config.Placement.PREFERRED_AZ_PRIORITY
+        else:
+            priorities[unit] = Config.Placement.DEFAULT_PRIORITY
+
+    return priorities
@@ -0,0 +1,219 @@
+# Copyright 2024 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Pre-warming of the cache of restarted replica set members."""
+
+import json
+import logging
+import time
+from typing import TYPE_CHECKING, Optional
+
+from charms.mongodb.v1.mongodb import MongoDBConnection, NotReadyError
+from ops.charm import UpdateStatusEvent
+from ops.framework import Object
+from pymongo.errors import PyMongoError
+from tenacity import Retrying, stop_after_delay, wait_fixed
+
+from config import Config
+from exceptions import InvalidParametersError
+from oplog import MB
+
+if TYPE_CHECKING:
+    from charm import MongodbOperatorCharm
+
+logger = logging.getLogger(__name__)
+
+# replica set member state of a secondary
+SECONDARY_STATE = 2
+
+
+class Prewarm(Object):
+    """Loads the hottest collections and indexes in the cache of a restarted member.
+
+    The most used collections and indexes are sampled on update-status. Before a restart the unit
+    flags itself as pre-warming in its peer databag and sets its election priority to 0, so that
+    it cannot become primary with a cold cache. Once restarted and a secondary, it loads the
+    sampled collections and indexes within the configured time and size budget and restores its
+    placement priority. Restarts that did not go through the charm are detected with the process
+    id of mongod.
+    """
+
+    def __init__(self, charm: "MongodbOperatorCharm"):
+        super().__init__(charm, "prewarm")
+        self.charm = charm
+
+        self.framework.observe(charm.on.update_status, self._on_update_status)
+
+    # BEGIN: properties
+    @property
+    def enabled(self) -> bool:
+        """Returns true if restarted members are pre-warmed."""
+        return self.charm.model.config[Config.Prewarm.TIMEOUT_CONFIG] > 0
+
+    @property
+    def is_prewarming(self) -> bool:
+        """Returns true if this unit must not become primary before being pre-warmed."""
+        return Config.Prewarm.STATE_KEY in self.charm.unit_peer_data
+
+    # END: properties
+
+    # BEGIN: event handlers
+    def _on_update_status(self, _: UpdateStatusEvent) -> None:
+        """Samples the hottest collections and pre-warms mongod if it restarted on its own."""
+        if not self.enabled or not self.charm.db_initialised:
+            return
+
+        last_pid = self.charm.unit_peer_data.get(Config.Prewarm.PID_KEY)
+        pid = self.record_pid()
+        if pid is None:
+            return
+
+        if last_pid and last_pid != pid and not self.is_prewarming:
+            # the usage statistics restarted with mongod, keep the ones sampled before
+            logger.info("mongod restarted outside of the charm, pre-warming its cache.")
+            if self.prepare(sample=False):
+                self.run()
+            return
+
+        self.sample_hot_collections()
+
+    # END: event handlers
+
+    # BEGIN: helpers
+    def record_pid(self) -> Optional[str]:
+        """Stores the process id of the running mongod, to detect restarts outside of the charm.
+
+        Returns:
+            The process id of mongod, None if mongod is not reachable. The stored process id is
+            then removed, so that the next mongod started is not mistaken for a restart.
+        """
+        try:
+            with MongoDBConnection(
+                self.charm.mongodb_config, "localhost", direct=True
+            ) as direct_mongo:
+                pid = str(direct_mongo.client.admin.command("serverStatus")["pid"])
+        except PyMongoError as e:
+            logger.debug("Failed to get the process id of mongod, error: %r", e)
+            self.charm.unit_peer_data.pop(Config.Prewarm.PID_KEY, None)
+            return None
+
+        self.charm.unit_peer_data[Config.Prewarm.PID_KEY] = pid
+        return pid
+
+    def sample_hot_collections(self) -> None:
+        """Stores the most used collections and indexes of mongod in the unit databag."""
+        try:
+            with MongoDBConnection(
+                self.charm.mongodb_config, "localhost", direct=True
+            ) as direct_mongo:
+                hot_collections = direct_mongo.get_hot_collections(Config.Prewarm.MAX_COLLECTIONS)
+        except PyMongoError as e:
+            logger.debug("Failed to sample the hottest collections, error: %r", e)
+            return
+
+        # a freshly started mongod has no usage statistics yet
+        if hot_collections:
+            self.charm.unit_peer_data[Config.Prewarm.COLLECTIONS_KEY] = json.dumps(hot_collections)
+
+    def prepare(self, sample: bool = True) -> bool:
+        """Prevents this unit from becoming primary until it is pre-warmed.
+
+        Args:
+            sample: sample the hottest collections before the restart.
+
+        Returns:
+            True if the unit should be pre-warmed once restarted.
+        """
+        if not self.enabled or not self.charm.db_initialised or not self.charm.peers_units:
+            return False
+
+        if sample:
+            self.sample_hot_collections()
+
+        self.charm.unit_peer_data[Config.Prewarm.STATE_KEY] = "true"
+        try:
+            self._set_priority(0)
+        except PyMongoError as e:
+            # e.g. the primary cannot become unelectable
+            logger.warning("Not pre-warming, failed to make the member unelectable: %r", e)
+            del self.charm.unit_peer_data[Config.Prewarm.STATE_KEY]
+            return False
+
+        return True
+
+    def run(self) -> None:
+        """Pre-warms the restarted mongod and restores its election priority.
+
+        Waiting for the member to become a secondary and loading the collections together take
+        at most `prewarm-timeout` seconds.
+        """
+        if not self.is_prewarming:
+            return
+
+        timeout = self.charm.model.config[Config.Prewarm.TIMEOUT_CONFIG]
+        max_bytes = self.charm.model.config[Config.Prewarm.MAX_SIZE_CONFIG] * MB
+        collections = json.loads(
+            self.charm.unit_peer_data.get(Config.Prewarm.COLLECTIONS_KEY, "[]")
+        )
+        started = time.monotonic()
+        deadline = started + timeout
+        try:
+            with MongoDBConnection(
+                self.charm.mongodb_config, "localhost", direct=True
+            ) as direct_mongo:
+                # secondaries only serve reads once recovered
+                for attempt in Retrying(
+                    stop=stop_after_delay(timeout), wait=wait_fixed(1), reraise=True
+                ):
+                    with attempt:
+                        status = direct_mongo.client.admin.command("replSetGetStatus")
+                        if status["myState"] != SECONDARY_STATE:
+                            raise NotReadyError
+
+                loaded = direct_mongo.prewarm_collections(
+                    collections, max(0, deadline - time.monotonic()), max_bytes
+                )
+            logger.info(
+                "Pre-warmed %d MB of %d collections in %.1fs",
+                loaded // MB,
+                len(collections),
+                time.monotonic() - started,
+            )
+        except (NotReadyError, PyMongoError) as e:
+            logger.warning("Pre-warming interrupted, error: %r", e)
+
+        self.release()
+
+    def release(self) -> None:
+        """Makes this unit electable again, e.g. once pre-warmed or when its restart failed."""
+        if not self.is_prewarming:
+            return
+
+        del self.charm.unit_peer_data[Config.Prewarm.STATE_KEY]
+        self._restore_priority()
+
+    def _restore_priority(self) -> None:
+        """Restores the placement priority of this unit."""
+        try:
+            priority = self.charm.get_member_priorities()[self.charm.unit.name]
+        except InvalidParametersError:
+            priority = Config.Placement.DEFAULT_PRIORITY
+
+        try:
+            self._set_priority(priority)
+        except PyMongoError as e:
+            # the leader restores the priority on update-status
+            logger.warning("Failed to restore the election priority, error: %r", e)
+
+    def _set_priority(self, priority: float) -> None:
+        """Sets the election priority of this unit.
+
+        Raises:
+            PyMongoError
+        """
+        with MongoDBConnection(self.charm.mongodb_config) as mongod:
+            mongod.set_replicaset_member_priorities(
+                {self.charm.unit_host(self.charm.unit): priority}
+            )
+
+    # END: helpers
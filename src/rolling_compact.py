@@ -0,0 +1,242 @@
+# Copyright 2024 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Rolling compaction of the replica set members to reclaim disk space."""
+
+import json
+import logging
+from datetime import datetime, time, timezone
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from charms.mongodb.v1.mongodb import MongoDBConnection
+from ops.charm import ActionEvent
+from ops.framework import Object
+from pymongo.errors import PyMongoError
+from tenacity import RetryError, Retrying, stop_after_delay, wait_fixed
+
+from config import Config
+from exceptions import InvalidParametersError, MemberNotCaughtUpError
+
+if TYPE_CHECKING:
+    from charm import MongodbOperatorCharm
+
+logger = logging.getLogger(__name__)
+
+
+def parse_maintenance_window(raw_window: str) -> Optional[Tuple[time, time]]:
+    """Parses a daily `HH:MM-HH:MM` maintenance window in UTC.
+
+    Returns:
+        The start and end of the window, None if maintenance is allowed at any time.
+
+    Raises:
+        InvalidParametersError if the window is malformed.
+    """
+    if not raw_window.strip():
+        return None
+
+    try:
+        start, end = (time.fromisoformat(bound.strip()) for bound in raw_window.strip().split("-"))
+    except ValueError:
+        raise InvalidParametersError(f"expected HH:MM-HH:MM, got {raw_window.strip()}")
+
+    if start == end:
+        raise InvalidParametersError("maintenance window must not be empty")
+
+    return start, end
+
+
+def is_in_maintenance_window(window: Optional[Tuple[time, time]], now: datetime) -> bool:
+    """Returns true if `now` is within the maintenance window, which can span midnight."""
+    if window is None:
+        return True
+
+    start, end = window
+    current = now.astimezone(timezone.utc).time().replace(tzinfo=None)
+    if start < end:
+        return start <= current < end
+
+    return current >= start or current < end
+
+
+class RollingCompact(Object):
+    """Compacts the members of the replica set one at a time to reclaim disk space.
+
+    WiredTiger does not release the space of deleted documents to the filesystem. Secondaries
+    are compacted first, each one catching up with the primary before the next one. The primary
+    then steps down and is compacted last, as a secondary. No member is compacted once the
+    maintenance window closed.
+    """
+
+    def __init__(self, charm: "MongodbOperatorCharm"):
+        super().__init__(charm, "rolling-compact")
+        self.charm = charm
+
+        self.framework.observe(charm.on.rolling_compact_action, self._on_rolling_compact_action)
+
+    # BEGIN: event handlers
+    def _on_rolling_compact_action(self, event: ActionEvent) -> None:
+        """Compacts the secondaries, then the stepped down primary."""
+        if not self.pass_pre_compact_checks(event):
+            return
+
+        try:
+            window = parse_maintenance_window(
+                self.charm.model.config[Config.RollingCompact.MAINTENANCE_WINDOW_CONFIG]
+            )
+        except InvalidParametersError as e:
+            event.fail(f"Invalid maintenance window: {e}")
+            return
+
+        if not is_in_maintenance_window(window, datetime.now(timezone.utc)):
+            event.fail("Members can only be compacted during the maintenance window.")
+            return
+
+        units = {
+            self.charm.unit_host(unit): unit.name
+            for unit in [self.charm.unit, *self.charm.peers_units]
+        }
+        try:
+            with MongoDBConnection(self.charm.mongodb_config) as mongod:
+                primary = mongod.primary()
+        except PyMongoError as e:
+            event.fail(f"Failed to get the primary: {e}")
+            return
+
+        reclaimed = {}
+        # the primary is compacted last, once stepped down
+        for host in sorted(units, key=lambda host: (host == primary, units[host])):
+            if not is_in_maintenance_window(window, datetime.now(timezone.utc)):
+                self._fail(event, reclaimed, "The maintenance window closed.")
+                return
+
+            if error := self.compact(event, host, units[host], reclaimed, host == primary):
+                self._fail(event, reclaimed, error)
+                return
+
+            logger.info("Compacted %s, reclaimed %d bytes", units[host], reclaimed[units[host]])
+
+        event.set_results(self._get_results(reclaimed))
+
+    # END: event handlers
+
+    # BEGIN: helpers
+    def pass_pre_compact_checks(self, event: ActionEvent) -> bool:
+        """Checks conditions for compacting the members and fail if necessary."""
+        if not self.charm.unit.is_leader():
+            event.fail("The action can be run only on leader unit.")
+            return False
+
+        if not self.charm.db_initialised:
+            event.fail("Cannot compact the members before the replica set is initialised.")
+            return False
+
+        if self.charm.upgrade_in_progress or self.charm.rolling_restart.granted_unit:
+            event.fail("Cannot compact the members while they restart or refresh.")
+            return False
+
+        # the only member cannot step down before being compacted
+        if not self.charm.peers_units:
+            event.fail("Rolling compact requires at least two members.")
+            return False
+
+        return True
+
+    def compact(
+        self,
+        event: ActionEvent,
+        host: str,
+        unit_name: str,
+        reclaimed: Dict[str, int],
+        is_primary: bool = False,
+    ) -> Optional[str]:
+        """Compacts a member once it caught up, stepping it down first if it is the primary.
+
+        The stepped down primary is unelectable while compacted, so that a preferred member
+        cannot take the primary back once `stepDownSecs` elapsed.
+
+        Returns:
+            The reason the member was not compacted, None once compacted.
+        """
+        try:
+            if is_primary:
+                event.log(f"Stepping down {unit_name}")
+                with MongoDBConnection(self.charm.mongodb_config) as mongod:
+                    if mongod.step_down_primary() is None:
+                        return f"{unit_name} did not step down."
+
+                self._set_priority(host, 0)
+
+            event.log(f"Compacting {unit_name}")
+            reclaimed[unit_name] = self.compact_member(host)
+            self.wait_for_catch_up(host)
+        except PyMongoError as e:
+            logger.error("Failed to compact %s, error: %r", unit_name, e)
+            return f"Failed to compact {unit_name}: {e}"
+        except RetryError:
+            return f"{unit_name} did not catch up after compaction."
+        finally:
+            if is_primary:
+                self._restore_priority(host, unit_name)
+
+    def compact_member(self, host: str) -> int:
+        """Compacts the collections of a secondary and returns the bytes reclaimed.
+
+        Raises:
+            PyMongoError
+        """
+        with MongoDBConnection(self.charm.remote_mongodb_config({host}), direct=True) as member:
+            return member.compact_collections()
+
+    def wait_for_catch_up(self, host: str) -> None:
+        """Waits until a compacted member caught up with the primary.
+
+        Raises:
+            RetryError
+        """
+        for attempt in Retrying(
+            stop=stop_after_delay(Config.RollingCompact.CATCH_UP_TIMEOUT), wait=wait_fixed(5)
+        ):
+            with attempt:
+                with MongoDBConnection(self.charm.mongodb_config) as mongod:
+                    lag = mongod.get_replset_member_lag(host)
+
+                if lag is None or lag > Config.RollingCompact.MAX_CATCH_UP_LAG:
+                    raise MemberNotCaughtUpError(f"{host} lag: {lag}")
+
+    def _restore_priority(self, host: str, unit_name: str) -> None:
+        """Restores the placement priority of a compacted member."""
+        try:
+            priority = self.charm.get_member_priorities()[unit_name]
+        except InvalidParametersError:
+            priority = Config.Placement.DEFAULT_PRIORITY
+
+        try:
+            self._set_priority(host, priority)
+        except PyMongoError as e:
+            # the leader restores the priority on update-status
+            logger.warning("Failed to restore the election priority, error: %r", e)
+
+    def _set_priority(self, host: str, priority: float) -> None:
+        """Sets the election priority of a member.
+
+        Raises:
+            PyMongoError
+        """
+        with MongoDBConnection(self.charm.mongodb_config) as mongod:
+            mongod.set_replicaset_member_priorities({host: priority})
+
+    def _fail(self, event: ActionEvent, reclaimed: Dict[str, int], message: str) -> None:
+        """Fails the action, reporting the members compacted so far."""
+        event.set_results(self._get_results(reclaimed))
+        event.fail(f"{message} Compacted {len(reclaimed)} members.")
+
+    @staticmethod
+    def _get_results(reclaimed: Dict[str, int]) -> Dict:
+        """Returns the bytes reclaimed per member and in total as action results."""
+        return {
+            "reclaimed-bytes": json.dumps(reclaimed),
+            "total-reclaimed-bytes": sum(reclaimed.values()),
+        }
+
+    # END: helpers
@@ -0,0 +1,166 @@
+# Copyright 2024 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Leader coordinated rolling restarts of the replica set members."""
+
+import logging
+from typing import TYPE_CHECKING, List, Optional
+
+from charms.mongodb.v1.mongodb import MongoDBConnection
+from ops.framework import Object
+from ops.model import MaintenanceStatus, Unit, WaitingStatus
+from pymongo.errors import PyMongoError
+
+from config import Config
+
+if TYPE_CHECKING:
+    from charm import MongodbOperatorCharm
+
+logger = logging.getLogger(__name__)
+
+
+class RollingRestart(Object):
+    """Restarts the units of the replica set one at a time.
+
+    Units request a restart in their peer databag and the leader grants the restart to a single
+    unit at a time, secondaries first and the primary last. The unit holding the grant steps down
+    if it is the primary, restarts its services and releases the grant once it has caught up with
+    the primary, which is checked again on the following peer and update-status events.
+    """
+
+    def __init__(self, charm: "MongodbOperatorCharm"):
+        super().__init__(charm, "rolling-restart")
+        self.charm = charm
+
+        self.framework.observe(
+            charm.on[Config.Relations.PEERS].relation_changed, self._on_restart_state_changed
+        )
+        self.framework.observe(
+            charm.on[Config.Relations.PEERS].relation_departed, self._on_restart_state_changed
+        )
+        self.framework.observe(charm.on.leader_elected, self._on_restart_state_changed)
+        self.framework.observe(charm.on.update_status, self._on_restart_state_changed)
+
+    # BEGIN: properties
+    @property
+    def restart_state(self) -> Optional[str]:
+        """Returns the restart state of this unit, if it requested a restart."""
+        return self.charm.unit_peer_data.get(Config.RollingRestart.REQUEST_KEY)
+
+    @property
+    def granted_unit(self) -> Optional[str]:
+        """Returns the name of the unit allowed to restart."""
+        return self.charm.app_peer_data.get(Config.RollingRestart.GRANTED_KEY)
+
+    @property
+    def waiting_units(self) -> List[Unit]:
+        """Returns the units that requested a restart, in the order they should restart."""
+        units = [self.charm.unit, *self.charm.peers_units]
+        waiting = [
+            unit
+            for unit in units
+            if self.charm.peers.data[unit].get(Config.RollingRestart.REQUEST_KEY)
+        ]
+        if not waiting:
+            return []
+
+        # the primary restarts last, to avoid more than one election
+        primary = self.charm.primary
+        return sorted(waiting, key=lambda unit: (unit.name == primary, unit.name))
+
+    # END: properties
+
+    # BEGIN: event handlers
+    def _on_restart_state_changed(self, _=None) -> None:
+        """Grants the restart to the next unit and restarts this unit when granted."""
+        if not self.charm.peers:
+            return
+
+        if self.charm.unit.is_leader():
+            self.grant_restart()
+
+        if self.granted_unit != self.charm.unit.name or not self.restart_state:
+            return
+
+        self._restart()
+
+        # the leader does not receive a relation changed event for its own databag
+        if self.charm.unit.is_leader():
+            self.grant_restart()
+
+    # END: event handlers
+
+    # BEGIN: helpers
+    def request_restart(self) -> None:
+        """Requests a restart of this unit, once the leader grants it."""
+        if self.restart_state == Config.RollingRestart.REQUESTED:
+            return
+
+        logger.info("Requesting a rolling restart of %s", self.charm.unit.name)
+        self.charm.unit_peer_data[Config.RollingRestart.REQUEST_KEY] = (
+            Config.RollingRestart.REQUESTED
+        )
+        self.charm.status.set_and_share_status(WaitingStatus("Waiting to restart"))
+        self._on_restart_state_changed()
+
+    def grant_restart(self) -> None:
+        """Grants the restart to the next unit, once the previous unit released its grant."""
+        if self.charm.upgrade_in_progress:
+            logger.debug("Units restart as part of the refresh, not granting restarts.")
+            return
+
+        waiting_units = self.waiting_units
+        if self.granted_unit in [unit.name for unit in waiting_units]:
+            logger.debug("%s has not yet released its restart grant", self.granted_unit)
+            return
+
+        if not waiting_units:
+            self.charm.app_peer_data.pop(Config.RollingRestart.GRANTED_KEY, None)
+            return
+
+        logger.info("Granting restart to %s", waiting_units[0].name)
+        self.charm.app_peer_data[Config.RollingRestart.GRANTED_KEY] = waiting_units[0].name
+
+    def _restart(self) -> None:
+        """Restarts this unit and releases the grant once it caught up with the primary."""
+        if self.restart_state == Config.RollingRestart.REQUESTED:
+            try:
+                if self.charm.primary == self.charm.unit.name and self.charm.peers_units:
+                    logger.info("Stepping down primary before restarting.")
+                    with MongoDBConnection(self.charm.mongodb_config) as mongo:
+                        mongo.step_down_primary()
+            except PyMongoError as e:
+                logger.error("Failed to step down primary before restart, error: %r", e)
+                return
+
+            self.charm.status.set_and_share_status(MaintenanceStatus("restarting MongoDB"))
+            # restarts requested for options that were since reverted are not needed anymore
+            self.charm.restart_charm_services(skip_if_unchanged=True)
+            self.charm.unit_peer_data[Config.RollingRestart.REQUEST_KEY] = (
+                Config.RollingRestart.RESTARTED
+            )
+
+        if not self.has_caught_up():
+            logger.info("%s has not caught up after restart yet.", self.charm.unit.name)
+            self.charm.status.set_and_share_status(
+                WaitingStatus("Waiting to catch up after restart")
+            )
+            return
+
+        logger.info("%s restarted, releasing restart grant.", self.charm.unit.name)
+        del self.charm.unit_peer_data[Config.RollingRestart.REQUEST_KEY]
+        self.charm.status.set_and_share_status(self.charm.status.process_statuses())
+
+    def has_caught_up(self) -> bool:
+        """Returns true if this unit is a healthy member that caught up with the primary."""
+        unit_host = self.charm.unit_host(self.charm.unit)
+        try:
+            with MongoDBConnection(self.charm.mongodb_config) as mongo:
+                lag = mongo.get_replset_member_lag(unit_host)
+        except PyMongoError as e:
+            logger.debug("Failed to get the lag of %s, error: %r", unit_host, e)
+            return False
+
+        return lag is not None and lag <= Config.RollingRestart.MAX_CATCH_UP_LAG
+
+    # END: helpers
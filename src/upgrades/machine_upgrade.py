@@ -15,6 +15,7 @@ import ops
 from charms.mongodb.v0.upgrade_helpers import (
     AbstractUpgrade,
     FailedToElectNewPrimaryError,
+    PrecheckFailed,
     UnitState,
 )
 
@@ -128,31 +129,45 @@ class Upgrade(AbstractUpgrade):
 
         Only applies to machine charm.
 
+        Units upgrade from highest to lowest unit number. The highest unit upgrades alone, once the
+        config-server authorized the shard to refresh if applicable, and the upgrade needs to be
+        resumed by the user before the remaining units upgrade. Secondaries then upgrade in
+        batches of `refresh_batch_size` units, once all units of the previous batches are
+        upgraded and healthy. The lowest unit, which holds the primary, upgrades last and alone.
+        The refresh is refused if `refresh-min-secondaries` leaves no room for a batch.
+
         Raises:
             PrecheckFailed: App is not ready to upgrade
         """
         assert self._unit_workload_container_version != self._app_workload_container_version
         assert self.versions_set
-        for index, unit in enumerate(self._sorted_units):
-            # Higher number units have already upgraded
-            if unit.name == self._unit.name:
-                if index == 0:
-                    if (
-                        json.loads(self._app_databag["versions"])["charm"]
-                        == self._current_versions["charm"]
-                    ):
-                        # Assumes charm version uniquely identifies charm revision
-                        logger.debug("Rollback detected. Skipping pre-refresh check")
-                    else:
-                        # Run pre-upgrade check
-                        # (in case user forgot to run pre-upgrade-check action)
-                        self.pre_upgrade_check()
-                        logger.debug("Pre-refresh check after `juju refresh` successful")
-                elif index == 1:
-                    # User confirmation needed to resume upgrade (i.e. upgrade second unit)
-                    logger.debug(f"Second unit authorized to refresh if {self.upgrade_resumed=}")
-                    return self.upgrade_resumed
-                return True
+        sorted_units = self._sorted_units
+        index = [unit.name for unit in sorted_units].index(self._unit.name)
+        if index == 0:
+            if not self._charm.upgrade.is_shard_refresh_authorized():
+                logger.debug("Waiting for the config-server to authorize the refresh of shard")
+                return False
+            if (
+                json.loads(self._app_databag["versions"])["charm"]
+                == self._current_versions["charm"]
+            ):
+                # Assumes charm version uniquely identifies charm revision
+                logger.debug("Rollback detected. Skipping pre-refresh check")
+            else:
+                # Run pre-upgrade check
+                # (in case user forgot to run pre-upgrade-check action)
+                self.pre_upgrade_check()
+                self.validate_refresh_batch_size()
+                logger.debug("Pre-refresh check after `juju refresh` successful")
+            return True
+
+        # User confirmation needed to resume upgrade (i.e. upgrade second unit)
+        if not self.upgrade_resumed:
+            logger.debug(f"Unit authorized to refresh if {self.upgrade_resumed=}")
+            return False
+
+        # Units of the previous batches have already upgraded
+        for unit in sorted_units[: self._batch_start(index, len(sorted_units))]:
             state = self._peer_relation.data[unit].get("state")
             if state:
                 state = UnitState(state)
@@ -161,9 +176,75 @@ class Upgrade(AbstractUpgrade):
                 != self._app_workload_container_version
                 or state is not UnitState.HEALTHY
             ):
-                # Waiting for higher number units to upgrade
+                # Waiting for units of previous batches to upgrade
                 return False
-        return False
+        return True
+
+    @property
+    def refresh_batch_size(self) -> int:
+        """Number of secondaries allowed to upgrade at the same time.
+
+        The configured batch size is reduced so that, while a batch is upgrading, a voting
+        majority of the replica set and the configured number of secondaries remain available.
+
+        Raises:
+            PrecheckFailed: No secondary can upgrade while keeping enough secondaries available
+        """
+        # the highest and the lowest units always upgrade alone
+        if len(self._sorted_units) < 3:
+            return 1
+
+        self.validate_refresh_batch_size()
+        return max(1, min(self._charm.config["refresh-batch-size"], self._max_refresh_batch_size))
+
+    @property
+    def _max_refresh_batch_size(self) -> int:
+        """Largest batch of secondaries that keeps a majority and enough secondaries available."""
+        units = len(self._sorted_units)
+        majority = units // 2 + 1
+        return min(
+            units - majority,
+            # the primary is not part of a batch
+            units - 1 - self._charm.config["refresh-min-secondaries"],
+        )
+
+    def validate_refresh_batch_size(self) -> None:
+        """Checks that secondaries can refresh while enough of them stay available.
+
+        Raises:
+            PrecheckFailed: No secondary can upgrade while keeping enough secondaries available
+        """
+        units = len(self._sorted_units)
+        if units >= 3 and self._max_refresh_batch_size < 1:
+            raise PrecheckFailed(
+                f"refresh-min-secondaries leaves no secondary to refresh out of {units} units"
+            )
+
+    @property
+    def refreshing_unit_names(self) -> typing.Set[str]:
+        """Names of the units of the batch this unit belongs to, this unit included."""
+        sorted_units = self._sorted_units
+        index = [unit.name for unit in sorted_units].index(self._unit.name)
+        try:
+            batch_start = self._batch_start(index, len(sorted_units))
+        except PrecheckFailed:
+            # the batches are no longer valid, the remaining secondaries are refused to refresh
+            return {self._unit.name}
+
+        return {
+            unit.name
+            for unit_index, unit in enumerate(sorted_units)
+            if self._batch_start(unit_index, len(sorted_units)) == batch_start
+        }
+
+    def _batch_start(self, index: int, units: int) -> int:
+        """Returns the position of the first unit of the batch the unit at `index` belongs to."""
+        # the highest unit and the lowest unit (which holds the primary) upgrade alone
+        if index in (0, units - 1):
+            return index
+
+        batch_size = self.refresh_batch_size
+        return 1 + (index - 1) // batch_size * batch_size
 
     def upgrade_unit(self, *, charm) -> None:
         """Runs the upgrade procedure.
@@ -184,10 +265,16 @@ class Upgrade(AbstractUpgrade):
 
         logger.debug(f"Upgrading {self.authorized=}")
         self.unit_state = UnitState.UPGRADING
-        charm.install_snap_packages(packages=Config.SNAP_PACKAGES)
-        self._unit_databag["snap_revision"] = _SNAP_REVISION
-        self._unit_workload_version = self._current_versions["workload"]
-        logger.debug(f"Saved {_SNAP_REVISION} in unit databag after refresh")
+        charm.prewarm.prepare()
+        try:
+            charm.install_snap_packages(packages=Config.SNAP_PACKAGES)
+            self._unit_databag["snap_revision"] = _SNAP_REVISION
+            self._unit_workload_version = self._current_versions["workload"]
+            logger.debug(f"Saved {_SNAP_REVISION} in unit databag after refresh")
+            charm.prewarm.run()
+        finally:
+            # a failed refresh must not leave the member unelectable
+            charm.prewarm.release()
 
         # post upgrade check should be retried in case of failure, for this it is necessary to
         # emit a separate event.
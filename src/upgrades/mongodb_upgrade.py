@@ -67,6 +67,14 @@ class MongoDBUpgrade(GenericMongoDBUpgrade):
         self.framework.observe(
             charm.on["force-refresh-start"].action, self._on_force_upgrade_action
         )
+        self.framework.observe(
+            charm.on[Config.Relations.CONFIG_SERVER_RELATIONS_NAME].relation_changed,
+            self._on_shard_refresh_state_changed,
+        )
+        self.framework.observe(
+            charm.on[Config.Relations.SHARDING_RELATIONS_NAME].relation_changed,
+            self._reconcile_upgrade,
+        )
         self.framework.observe(self.post_app_upgrade_event, self.run_post_app_upgrade_task)
         self.framework.observe(self.post_cluster_upgrade_event, self.run_post_cluster_upgrade_task)
 
@@ -97,6 +105,7 @@ class MongoDBUpgrade(GenericMongoDBUpgrade):
         if not self._upgrade.versions_set:
             logger.debug("Peer relation not ready")
             return
+        self.share_refresh_state_with_config_server()
         if self.charm.unit.is_leader() and not self._upgrade.in_progress:
             # Run before checking `self._upgrade.is_compatible` in case incompatible upgrade was
             # forced & completed on all units.
@@ -122,6 +131,14 @@ class MongoDBUpgrade(GenericMongoDBUpgrade):
                 return
         self._set_upgrade_status()
 
+    def _on_shard_refresh_state_changed(self, _) -> None:
+        """Authorizes the next wave of shards to refresh when the state of a shard changes."""
+        if not self._upgrade or not self._upgrade.versions_set:
+            return
+
+        self.reconcile_shard_refresh_waves()
+        self._set_upgrade_status()
+
     def _on_upgrade_charm(self, _):
         if self.charm.unit.is_leader():
             if not self._upgrade.in_progress:
@@ -258,6 +275,7 @@ class MongoDBUpgrade(GenericMongoDBUpgrade):
             )
             logger.info(ROLLBACK_INSTRUCTIONS)
             self.charm.status.set_and_share_status(Config.Status.UNHEALTHY_UPGRADE)
+            self.share_refresh_state_with_config_server()
             event.defer()
             return
 
@@ -268,6 +286,7 @@ class MongoDBUpgrade(GenericMongoDBUpgrade):
             )
             logger.info(ROLLBACK_INSTRUCTIONS)
             self.charm.status.set_and_share_status(Config.Status.UNHEALTHY_UPGRADE)
+            self.share_refresh_state_with_config_server()
             event.defer()
             return
 
@@ -275,13 +294,16 @@ class MongoDBUpgrade(GenericMongoDBUpgrade):
             self.charm.status.set_and_share_status(ActiveStatus())
 
         self._upgrade.unit_state = UnitState.HEALTHY
+        self.share_refresh_state_with_config_server()
 
     def _set_upgrade_status(self):
         # In the future if we decide to support app statuses, we will need to handle this
         # differently. Specifically ensuring that upgrade status for apps status has the lowest
         # priority
         if self.charm.unit.is_leader():
-            self.charm.app.status = self._upgrade.app_status or ActiveStatus()
+            self.charm.app.status = (
+                self._upgrade.app_status or self.get_shard_refresh_status() or ActiveStatus()
+            )
 
         # Set/clear upgrade unit status if no other unit status - upgrade status for units should
         # have the lowest priority.
@@ -1,18 +1,27 @@
 # Copyright 2024 Canonical Ltd.
 # See LICENSE file for licensing details.
 
+import io
 import logging
 import re
+import tempfile
 import unittest
+from pathlib import Path
 from unittest import mock
-from unittest.mock import MagicMock, call, patch
+from unittest.mock import MagicMock, PropertyMock, call, patch
 
 import pytest
 from charms.operator_libs_linux.v2 import snap
 from ops.model import ActiveStatus, BlockedStatus, MaintenanceStatus, WaitingStatus
 from ops.testing import Harness
 from parameterized import parameterized
-from pymongo.errors import ConfigurationError, ConnectionFailure, OperationFailure
+from pymongo.errors import (
+    ConfigurationError,
+    ConnectionFailure,
+    OperationFailure,
+    PyMongoError,
+    ServerSelectionTimeoutError,
+)
 from tenacity import stop_after_attempt
 
 from charm import MongodbOperatorCharm, NotReadyError, subprocess
@@ -61,8 +70,19 @@ class TestCharm(unittest.TestCase):
     @patch("charm.snap.SnapCache")
     @patch("charm.MongodbOperatorCharm.push_file_to_unit")
     @patch("builtins.open")
+    @patch("charm.get_services_fingerprint", return_value="fingerprint")
+    @patch("charm.update_mongod_service")
     def test_on_start_not_leader_doesnt_initialise_replica_set(
-        self, open, path, snap, _open_ports_tcp, init_admin, connection, get_secret
+        self,
+        update_mongod_service,
+        get_services_fingerprint,
+        open,
+        path,
+        snap,
+        _open_ports_tcp,
+        init_admin,
+        connection,
+        get_secret,
     ):
         """Tests that a non leader unit does not initialise the replica set."""
         # set snap data
@@ -88,8 +108,12 @@ class TestCharm(unittest.TestCase):
     @patch("charm.MongodbOperatorCharm._open_ports_tcp")
     @patch("charm.MongodbOperatorCharm.push_file_to_unit")
     @patch("builtins.open")
+    @patch("charm.get_services_fingerprint", return_value="fingerprint")
+    @patch("charm.update_mongod_service")
     def test_on_start_snap_failure_leads_to_blocked_status(
         self,
+        update_mongod_service,
+        get_services_fingerprint,
         open,
         path,
         _open_ports_tcp,
@@ -113,8 +137,12 @@ class TestCharm(unittest.TestCase):
     @patch("builtins.open")
     @patch("charm.MongoDBConnection")
     @patch("charm.MongodbOperatorCharm._init_operator_user")
+    @patch("charm.get_services_fingerprint", return_value="fingerprint")
+    @patch("charm.update_mongod_service")
     def test_on_start_mongod_not_ready_defer(
         self,
+        update_mongod_service,
+        get_services_fingerprint,
         init_admin,
         connection,
         open,
@@ -143,7 +171,11 @@ class TestCharm(unittest.TestCase):
     @patch("charm.snap.SnapCache")
     @patch("charm.MongodbOperatorCharm.push_file_to_unit")
     @patch("builtins.open")
-    def test_start_unable_to_open_tcp_moves_to_blocked(self, open, path, snap, _open_ports_tcp):
+    @patch("charm.get_services_fingerprint", return_value="fingerprint")
+    @patch("charm.update_mongod_service")
+    def test_start_unable_to_open_tcp_moves_to_blocked(
+        self, update_mongod_service, get_services_fingerprint, open, path, snap, _open_ports_tcp
+    ):
         """Test verifies that if TCP port cannot be opened we go to the blocked state."""
         # set snap data
         mock_mongodb_snap = mock.Mock()
@@ -320,8 +352,12 @@ class TestCharm(unittest.TestCase):
     @patch("builtins.open")
     @patch("charm.MongoDBConnection")
     @patch("charm.MongodbOperatorCharm._init_operator_user")
+    @patch("charm.get_services_fingerprint", return_value="fingerprint")
+    @patch("charm.update_mongod_service")
     def test_initialise_replica_failure_leads_to_waiting_state(
         self,
+        update_mongod_service,
+        get_services_fingerprint,
         init_admin,
         connection,
         open,
@@ -601,6 +637,9 @@ class TestCharm(unittest.TestCase):
         self.assertEqual(self.harness.charm.unit.status, WaitingStatus("Member is removing..."))
 
         # Case 3: Member is syncing to replica set
+        status_connection.return_value.__enter__.return_value.get_initial_sync_progress.return_value = (
+            None
+        )
         for syncing_status in ["STARTUP", "STARTUP2", "ROLLBACK", "RECOVERING"]:
             status_connection.return_value.__enter__.return_value.get_replset_status.return_value = {
                 "1.1.1.1": syncing_status
@@ -608,6 +647,16 @@ class TestCharm(unittest.TestCase):
             self.harness.charm.on.update_status.emit()
             self.assertEqual(self.harness.charm.unit.status, WaitingStatus("Member is syncing..."))
 
+        # the syncing member may refuse the direct connection, e.g. before it has the users
+        status_connection.return_value.__enter__.return_value.get_replset_status.return_value = {
+            "1.1.1.1": "STARTUP2"
+        }
+        status_connection.return_value.__enter__.return_value.get_initial_sync_progress.side_effect = OperationFailure(
+            "Authentication failed."
+        )
+        self.harness.charm.on.update_status.emit()
+        self.assertEqual(self.harness.charm.unit.status, WaitingStatus("Member is syncing..."))
+
         # Case 4: Unknown status
         status_connection.return_value.__enter__.return_value.get_replset_status.return_value = {
             "1.1.1.1": "unknown"
@@ -697,9 +746,11 @@ class TestCharm(unittest.TestCase):
             self.assertEqual(self.harness.charm.primary, None)
 
     @patch_network_get(private_address="1.1.1.1")
+    @patch("charm.service_running", return_value=False)
+    @patch("charm.snap.SnapCache")
     @patch("charm.MongoDBConnection")
     @patch("charm.stop_after_attempt")
-    def test_storage_detaching_failure_does_not_defer(self, retry_stop, connection):
+    def test_storage_detaching_failure_does_not_defer(self, retry_stop, connection, *unused):
         """Test that failure in removing replica does not defer the hook.
 
         Deferring Storage Detached hooks can result in un-predicable behavior and while it is
@@ -707,6 +758,7 @@ class TestCharm(unittest.TestCase):
         attempt to defer storage detached as made.
         """
         retry_stop.return_value = stop_after_attempt(1)
+        connection.return_value.__enter__.return_value.drain_operations.return_value = (0, 0)
         exceptions = PYMONGO_EXCEPTIONS
         exceptions.append(NotReadyError)
         for exception in exceptions:
@@ -1085,11 +1137,11 @@ class TestCharm(unittest.TestCase):
             action_event.fail.assert_called()
             self.assertEqual(current_password, original_password)
 
-    @patch("config.Config.ENV_VAR_PATH", "tests/unit/data/env.txt")
+    @patch("config.Config.MONGOD_CONF_FILE_PATH", "tests/unit/data/mongod.conf")
     def test_auth_not_enabled(self):
         self.assertEqual(self.harness.charm.auth_enabled(), False)
 
-    @patch("config.Config.ENV_VAR_PATH", "tests/unit/data/env_auth.txt")
+    @patch("config.Config.MONGOD_CONF_FILE_PATH", "tests/unit/data/mongod_auth.conf")
     def test_auth_enabled(self):
         self.assertEqual(self.harness.charm.auth_enabled(), True)
 
@@ -1111,3 +1163,731 @@ class TestCharm(unittest.TestCase):
     def test_unit_host(self):
         """Tests that get hosts returns the current unit hosts."""
         assert self.harness.charm.unit_host(self.harness.charm.unit) == "1.1.1.1"
+
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch("charm.MongoDBConnection")
+    def test_get_initial_sync_status_action(self, connection, get_secret):
+        """Tests that the progress of the initial sync is reported with an estimate."""
+        mongod = connection.return_value.__enter__.return_value
+        mongod.get_initial_sync_progress.return_value = {
+            "databases_cloned": 2,
+            "databases_to_clone": 3,
+            "bytes_copied": 3 * 1024**3,
+            "bytes_total": 12 * 1024**3,
+            "elapsed": 600.0,
+            "rate": 3 * 1024**3 / 600,
+            "eta": 1800.0,
+            "failed_attempts": 0,
+        }
+        action_event = mock.Mock()
+        self.harness.charm._on_get_initial_sync_status_action(action_event)
+
+        results = action_event.set_results.call_args.args[0]
+        self.assertEqual(results["eta-seconds"], 1800)
+        self.assertEqual(
+            results["summary"],
+            "2 databases cloned, 3 to clone, 3.0GiB/12.0GiB copied at 5.1MiB/s, ETA 0h30m",
+        )
+
+        mongod.get_initial_sync_progress.return_value = None
+        self.harness.charm._on_get_initial_sync_status_action(action_event)
+        action_event.set_results.assert_called_with({"syncing": False})
+
+    @patch("charm.MongodbOperatorCharm.primary", new_callable=PropertyMock)
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch("charm.MongoDBConnection")
+    def test_get_flow_control_status_action(self, connection, get_secret, primary):
+        """Tests that the flow control state of the primary is reported."""
+        primary.return_value = "mongodb/0"
+        mongod = connection.return_value.__enter__.return_value
+        mongod.get_flow_control_status.return_value = {
+            "enabled": True,
+            "is_lagged": True,
+            "is_lagged_count": 3,
+            "target_rate": 1000,
+            "time_acquiring": 2.5,
+        }
+        action_event = mock.Mock()
+        self.harness.charm._on_get_flow_control_status_action(action_event)
+        action_event.set_results.assert_called_with(
+            {
+                "primary": "mongodb/0",
+                "enabled": True,
+                "lagged": True,
+                "lagged-count": 3,
+                "target-lag-seconds": 10,
+                "target-rate-locks-per-second": 1000,
+                "time-acquiring-seconds": 2.5,
+            }
+        )
+
+        mongod.get_flow_control_status.side_effect = PyMongoError("error")
+        self.harness.charm._on_get_flow_control_status_action(action_event)
+        action_event.fail.assert_called()
+
+    @patch("charm.MongosConnection")
+    def test_shard_collection_not_config_server(self, mongos_connection):
+        """Tests that collections can only be sharded from the config-server."""
+        action_event = mock.Mock()
+        action_event.params = {"namespace": "db.coll", "key": "user_id"}
+        self.harness.charm._on_shard_collection_action(action_event)
+
+        action_event.fail.assert_called()
+        mongos_connection.assert_not_called()
+
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    @patch("charm.MongosConnection")
+    def test_shard_collection_hashed_presplit(self, mongos_connection, get_secret):
+        """Tests that hashed sharding presplits the collection into the requested chunks."""
+        self.harness.update_config({"role": "config-server"})
+        self.harness.charm.app_peer_data["db_initialised"] = "true"
+        mongos = mongos_connection.return_value.__enter__.return_value
+        mongos.get_chunk_distribution.return_value = {"shard-one": 4, "shard-two": 4}
+
+        action_event = mock.Mock()
+        action_event.params = {
+            "namespace": "db.coll",
+            "key": "user_id, ts",
+            "mode": "hashed",
+            "num-initial-chunks": 8,
+            "wait-for-balance": True,
+            "balance-timeout": 30,
+        }
+        self.harness.charm._on_shard_collection_action(action_event)
+
+        action_event.fail.assert_not_called()
+        mongos.shard_collection.assert_called_with("db.coll", {"user_id": "hashed", "ts": 1}, 8)
+        mongos.wait_for_collection_balanced.assert_called_with("db.coll", timeout=30)
+        action_event.set_results.assert_called_with(
+            {
+                "namespace": "db.coll",
+                "shard-key": '{"user_id": "hashed", "ts": 1}',
+                "chunks-per-shard": '{"shard-one": 4, "shard-two": 4}',
+            }
+        )
+
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    @patch("charm.MongosConnection")
+    def test_shard_collection_mongos_error(self, mongos_connection, get_secret):
+        """Tests that errors of mongos while balancing fail the action."""
+        self.harness.update_config({"role": "config-server"})
+        self.harness.charm.app_peer_data["db_initialised"] = "true"
+        mongos = mongos_connection.return_value.__enter__.return_value
+        mongos.wait_for_collection_balanced.side_effect = ServerSelectionTimeoutError("timeout")
+
+        action_event = mock.Mock()
+        action_event.params = {"namespace": "db.coll", "key": "user_id", "wait-for-balance": True}
+        self.harness.charm._on_shard_collection_action(action_event)
+
+        action_event.fail.assert_called_with("Failed to shard collection db.coll: timeout")
+        mongos.get_chunk_distribution.assert_not_called()
+        action_event.set_results.assert_not_called()
+
+    @parameterized.expand(
+        [
+            [{"namespace": "db", "key": "user_id"}],
+            [{"namespace": "db.coll", "key": " , "}],
+            [{"namespace": "db.coll", "key": "user_id,user_id"}],
+            [
+                {
+                    "namespace": "db.coll",
+                    "key": "user_id",
+                    "mode": "ranged",
+                    "num-initial-chunks": 4,
+                }
+            ],
+        ]
+    )
+    @patch("charm.MongosConnection")
+    def test_shard_collection_invalid_params(self, params, mongos_connection):
+        """Tests that invalid namespaces, shard keys and presplit options fail the action."""
+        self.harness.update_config({"role": "config-server"})
+        self.harness.charm.app_peer_data["db_initialised"] = "true"
+
+        action_event = mock.Mock()
+        action_event.params = params
+        self.harness.charm._on_shard_collection_action(action_event)
+
+        action_event.fail.assert_called()
+        mongos_connection.assert_not_called()
+
+    @patch("charm.subprocess.run")
+    @patch("charm.MongosConnection")
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_import_dump(self, get_secret, mongos_connection, run):
+        """Tests that dumps are restored through mongos and their indexes built afterwards."""
+        get_secret.return_value = "password"
+        self.harness.update_config({"role": "config-server"})
+        self.harness.charm.app_peer_data["db_initialised"] = "true"
+        mongos = mongos_connection.return_value.__enter__.return_value
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        common_path = Path(tmp_dir.name).resolve()
+        (common_path / "dump" / "app").mkdir(parents=True)
+        (common_path / "dump" / "app" / "users.metadata.json").write_text(
+            '{"indexes":[{"v":2,"key":{"_id":1},"name":"_id_"},'
+            '{"v":2,"key":{"email":1},"name":"email_1"}],"collectionName":"users"}'
+        )
+        run.return_value = subprocess.CompletedProcess(
+            [], 0, "", "10 document(s) restored successfully. 0 document(s) failed to restore."
+        )
+
+        action_event = mock.Mock()
+        action_event.params = {"path": "dump", "defer-index-builds": True}
+        with (
+            patch("config.Config.MONGODB_COMMON_PATH", common_path),
+            patch("config.Config.MONGOD_CONF_DIR", tmp_dir.name),
+        ):
+            self.harness.charm._on_import_action(action_event)
+
+        action_event.fail.assert_not_called()
+        command = run.call_args.args[0]
+        self.assertIn("--noIndexRestore", command)
+        self.assertIn("--host=1.1.1.1:27018", command)
+        # the password is only readable during the restore
+        self.assertNotIn("password", " ".join(command))
+        self.assertFalse((common_path / "database-tools.yaml").exists())
+        mongos.create_indexes.assert_called_once_with(
+            "app.users", [{"key": {"email": 1}, "name": "email_1"}]
+        )
+        results = action_event.set_results.call_args.args[0]
+        self.assertEqual(results["documents-restored"], 10)
+        self.assertEqual(results["indexes-built"], 1)
+        self.assertIn("dump-mb-per-second", results)
+
+        # a failed index build is reported after the data was imported
+        mongos.create_indexes.side_effect = OperationFailure("index build failed")
+        with (
+            patch("config.Config.MONGODB_COMMON_PATH", common_path),
+            patch("config.Config.MONGOD_CONF_DIR", tmp_dir.name),
+        ):
+            self.harness.charm._on_import_action(action_event)
+
+        action_event.fail.assert_called_with(
+            f"Imported {common_path / 'dump'} but failed to build its indexes: index build failed"
+        )
+
+        run.side_effect = subprocess.CalledProcessError(
+            1, [], stderr="connecting\nFailed: error connecting to db server\n"
+        )
+        with (
+            patch("config.Config.MONGODB_COMMON_PATH", common_path),
+            patch("config.Config.MONGOD_CONF_DIR", tmp_dir.name),
+        ):
+            self.harness.charm._on_import_action(action_event)
+
+        action_event.fail.assert_called_with(
+            f"Failed to import {common_path / 'dump'}: Failed: error connecting to db server"
+        )
+
+    @patch("charm.subprocess.Popen")
+    @patch("charm.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_export_dump(self, get_secret, connection, popen):
+        """Tests that the archive streamed by mongodump is written to the unit storage."""
+        get_secret.return_value = "password"
+        self.harness.charm.app_peer_data["db_initialised"] = "true"
+        mongod = connection.return_value.__enter__.return_value
+        mongod.client.__getitem__.return_value.list_collection_names.return_value = [
+            "users",
+            "orders",
+        ]
+        popen.return_value.stdout = io.BytesIO(b"archive")
+        popen.return_value.wait.return_value = 0
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        common_path = Path(tmp_dir.name).resolve()
+        action_event = mock.Mock()
+        action_event.params = {"database": "app", "collections": "users", "path": "app.gz"}
+        with (
+            patch("config.Config.MONGODB_COMMON_PATH", common_path),
+            patch("config.Config.MONGOD_CONF_DIR", tmp_dir.name),
+        ):
+            self.harness.charm._on_export_action(action_event)
+
+        action_event.fail.assert_not_called()
+        command = popen.call_args.args[0]
+        self.assertIn("--collection=users", command)
+        self.assertIn("--host=mongodb/1.1.1.1:27017", command)
+        self.assertEqual((common_path / "app.gz").read_bytes(), b"archive")
+        results = action_event.set_results.call_args.args[0]
+        self.assertEqual(results["bytes"], 7)
+
+        # failed exports do not leave a partial archive behind
+        popen.return_value.stdout = io.BytesIO(b"arch")
+        popen.return_value.wait.return_value = 1
+        action_event.params["path"] = "failed.gz"
+        with (
+            patch("config.Config.MONGODB_COMMON_PATH", common_path),
+            patch("config.Config.MONGOD_CONF_DIR", tmp_dir.name),
+        ):
+            self.harness.charm._on_export_action(action_event)
+
+        action_event.fail.assert_called()
+        self.assertFalse((common_path / "failed.gz").exists())
+
+        # a full storage stops mongodump instead of leaving it blocked on the pipe
+        popen.reset_mock()
+        popen.return_value.stdout = io.BytesIO(b"archive")
+        popen.return_value.wait.return_value = 0
+        action_event.params["path"] = "full.gz"
+        with (
+            patch("config.Config.MONGODB_COMMON_PATH", common_path),
+            patch("config.Config.MONGOD_CONF_DIR", tmp_dir.name),
+            patch("charm.stream_to_file", side_effect=OSError(28, "No space left on device")),
+        ):
+            self.harness.charm._on_export_action(action_event)
+
+        popen.return_value.kill.assert_called_once()
+        popen.return_value.wait.assert_called()
+        action_event.fail.assert_called_with(
+            f"Failed to write {common_path / 'full.gz'}: No space left on device"
+        )
+        self.assertFalse((common_path / "full.gz").exists())
+
+    @patch("charm.MongodbOperatorCharm.are_charm_services_running")
+    @patch("charm.get_services_fingerprint")
+    @patch("charm.update_mongod_service")
+    @patch("charm.snap.SnapCache")
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_restart_charm_services_unchanged(
+        self, get_secret, snap_cache, update_mongod_service, fingerprint, services_running
+    ):
+        """Tests that restarts can be skipped when the startup options did not change."""
+        mongodb_snap = snap_cache.return_value.__getitem__.return_value
+        fingerprint.return_value = "fingerprint"
+        services_running.return_value = True
+
+        self.harness.charm.restart_charm_services(skip_if_unchanged=True)
+        mongodb_snap.stop.assert_called()
+        mongodb_snap.start.assert_called()
+        self.assertEqual(self.harness.charm.unit_peer_data["services-fingerprint"], "fingerprint")
+
+        mongodb_snap.reset_mock()
+        self.harness.charm.restart_charm_services(skip_if_unchanged=True)
+        update_mongod_service.assert_called()
+        mongodb_snap.stop.assert_not_called()
+
+        # the services are restarted unless skipping is requested
+        self.harness.charm.restart_charm_services()
+        mongodb_snap.stop.assert_called()
+
+        # stopped services are started even if their options did not change
+        mongodb_snap.reset_mock()
+        services_running.return_value = False
+        self.harness.charm.restart_charm_services(skip_if_unchanged=True)
+        mongodb_snap.start.assert_called()
+
+    @patch("rolling_restart.RollingRestart.request_restart")
+    @patch("charm.update_mongod_service")
+    @patch("charm.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_reconcile_parameters(
+        self, get_secret, connection, update_mongod_service, request_restart
+    ):
+        """Tests that runtime parameters are applied live and others with a rolling restart."""
+        self.harness.charm.app_peer_data["db_initialised"] = "true"
+        mongod = connection.return_value.__enter__.return_value
+
+        self.harness.update_config({"mongod-parameters": "cursorTimeoutMillis=1000"})
+        mongod.set_parameters.assert_called_with(
+            {
+                "cursorTimeoutMillis": 1000,
+                "enableFlowControl": True,
+                "flowControlTargetLagSeconds": 10,
+            }
+        )
+        update_mongod_service.assert_called()
+        request_restart.assert_not_called()
+        self.assertIsNone(self.harness.charm.get_parameters_status())
+
+        self.harness.update_config(
+            {"mongod-parameters": "cursorTimeoutMillis=1000,replWriterThreadCount=32"}
+        )
+        request_restart.assert_called()
+        self.assertEqual(
+            self.harness.charm.get_parameters_status(),
+            WaitingStatus("Restart pending to apply replWriterThreadCount"),
+        )
+
+        # once restarted with the new parameters, nothing is pending anymore
+        self.harness.charm.set_applied_parameters(self.harness.charm.get_parameters(), {})
+        self.assertIsNone(self.harness.charm.get_parameters_status())
+
+    @patch("rolling_restart.RollingRestart.request_restart")
+    @patch("charm.update_mongod_service")
+    @patch("charm.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_initial_sync_options(
+        self, get_secret, connection, update_mongod_service, request_restart
+    ):
+        """Tests that the initial sync options only apply to members that did not sync yet."""
+        self.harness.charm.app_peer_data["db_initialised"] = "true"
+        self.harness.charm.set_applied_parameters(self.harness.charm.get_parameters(), {})
+
+        self.harness.update_config(
+            {"initial-sync-method": "file-copy", "initial-sync-source": "secondary"}
+        )
+        self.assertEqual(
+            self.harness.charm.get_start_parameters()[0],
+            {
+                "initialSyncMethod": "fileCopyBased",
+                "initialSyncSourceReadPreference": "secondaryPreferred",
+                "enableFlowControl": True,
+                "flowControlTargetLagSeconds": 10,
+            },
+        )
+        request_restart.assert_not_called()
+        self.assertIsNone(self.harness.charm.get_parameters_status())
+
+        self.harness.update_config({"mongod-parameters": "initialSyncMethod=logical"})
+        self.assertEqual(
+            self.harness.charm.get_parameters_status(),
+            BlockedStatus(
+                "Invalid server parameters: parameter initialSyncMethod is also set by the "
+                "initial sync options"
+            ),
+        )
+
+    @patch("rolling_restart.RollingRestart.request_restart")
+    @patch("charm.update_mongod_service")
+    @patch("charm.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_flow_control_options(
+        self, get_secret, connection, update_mongod_service, request_restart
+    ):
+        """Tests that the flow control options are applied live, including back to defaults."""
+        self.harness.charm.app_peer_data["db_initialised"] = "true"
+        self.harness.charm.set_applied_parameters(self.harness.charm.get_parameters(), {})
+        mongod = connection.return_value.__enter__.return_value
+
+        self.harness.update_config({"flow-control": False, "flow-control-target-lag": 30})
+        mongod.set_parameters.assert_called_with(
+            {"enableFlowControl": False, "flowControlTargetLagSeconds": 30}
+        )
+        self.harness.charm.set_applied_parameters(self.harness.charm.get_parameters(), {})
+
+        self.harness.update_config({"flow-control": True, "flow-control-target-lag": 10})
+        mongod.set_parameters.assert_called_with(
+            {"enableFlowControl": True, "flowControlTargetLagSeconds": 10}
+        )
+        request_restart.assert_not_called()
+
+        self.harness.update_config({"flow-control-target-lag": 0})
+        self.assertEqual(
+            self.harness.charm.get_parameters_status(),
+            BlockedStatus(
+                "Invalid server parameters: flow control target lag must be at least 1s"
+            ),
+        )
+
+        self.harness.update_config(
+            {"flow-control-target-lag": 10, "mongod-parameters": "enableFlowControl=false"}
+        )
+        self.assertEqual(
+            self.harness.charm.get_parameters_status(),
+            BlockedStatus(
+                "Invalid server parameters: parameter enableFlowControl is also set by the "
+                "flow control options"
+            ),
+        )
+
+    @patch("rolling_restart.RollingRestart.request_restart")
+    @patch("charm.update_mongod_service")
+    @patch("charm.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_reconcile_limits(
+        self, get_secret, connection, update_mongod_service, request_restart
+    ):
+        """Tests that tickets are applied live and connection limits with a rolling restart."""
+        self.harness.charm.app_peer_data["db_initialised"] = "true"
+        self.harness.charm.set_applied_parameters(
+            self.harness.charm.get_parameters(), self.harness.charm.get_parameters(mongos=True)
+        )
+        mongod = connection.return_value.__enter__.return_value
+        # options left to 0 keep the MongoDB defaults, so existing units do not need a restart
+        self.assertIsNone(self.harness.charm.get_max_incoming_connections())
+        self.assertEqual(self.harness.charm.get_parameters(mongos=True), {})
+        self.assertIsNone(self.harness.charm.get_parameters_status())
+
+        self.harness.update_config({"storage-read-tickets": 64})
+        mongod.set_parameters.assert_called_with(
+            {
+                "wiredTigerConcurrentReadTransactions": 64,
+                "enableFlowControl": True,
+                "flowControlTargetLagSeconds": 10,
+            }
+        )
+        request_restart.assert_not_called()
+
+        self.harness.update_config({"max-incoming-connections": 1000})
+        self.assertEqual(update_mongod_service.call_args.kwargs["mongod_max_connections"], 1000)
+        request_restart.assert_called()
+        self.assertEqual(
+            self.harness.charm.get_parameters_status(),
+            WaitingStatus("Restart pending to apply maxIncomingConnections"),
+        )
+
+        self.harness.update_config(
+            {"mongod-parameters": "wiredTigerConcurrentReadTransactions=32"}
+        )
+        self.assertEqual(
+            self.harness.charm.unit.status,
+            BlockedStatus(
+                "Invalid server parameters: parameter wiredTigerConcurrentReadTransactions is "
+                "also set by storage-read-tickets"
+            ),
+        )
+
+    @patch("charm.update_mongod_service")
+    @patch("charm.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_reconcile_replset_settings(self, get_secret, connection, update_mongod_service):
+        """Tests that the leader applies valid replica set settings once."""
+        self.harness.set_leader(True)
+        self.harness.charm.app_peer_data["db_initialised"] = "true"
+        mongod = connection.return_value.__enter__.return_value
+
+        self.harness.update_config({"election-timeout-ms": 2000, "heartbeat-interval-ms": 500})
+        mongod.set_replicaset_settings.assert_called_once_with(
+            {
+                "electionTimeoutMillis": 2000,
+                "heartbeatIntervalMillis": 500,
+                "catchUpTimeoutMillis": -1,
+                "chainingAllowed": True,
+            }
+        )
+
+        self.harness.charm.reconcile_replset_settings()
+        mongod.set_replicaset_settings.assert_called_once()
+
+        self.harness.update_config({"heartbeat-interval-ms": 1500})
+        mongod.set_replicaset_settings.assert_called_once()
+        self.assertEqual(
+            self.harness.charm.get_replset_settings_status(),
+            BlockedStatus(
+                "Invalid replica set settings: heartbeat interval must be at most half of the "
+                "election timeout"
+            ),
+        )
+
+    @patch("charm.update_mongod_service")
+    @patch("charm.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_shutdown_mongod_gracefully(self, get_secret, connection, update_mongod_service):
+        """Tests that the primary steps down and drains its operations before shutting down."""
+        self.harness.charm.app_peer_data["db_initialised"] = "true"
+        rel_id = self.harness.charm.model.get_relation("database-peers").id
+        self.harness.add_relation_unit(rel_id, "mongodb/1")
+        mongod = connection.return_value.__enter__.return_value
+        mongod.primary.return_value = "1.1.1.1"
+        mongod.drain_operations.return_value = (3, 1)
+
+        self.harness.update_config({"shutdown-timeout": 10})
+        self.harness.charm.shutdown_mongod_gracefully()
+
+        mongod.step_down_primary.assert_called_once()
+        mongod.drain_operations.assert_called_once_with(10)
+        mongod.shutdown.assert_called_once_with(5)
+
+        # secondaries do not step down
+        mongod.reset_mock()
+        mongod.primary.return_value = "1.1.1.2"
+        self.harness.charm.shutdown_mongod_gracefully()
+        mongod.step_down_primary.assert_not_called()
+        mongod.shutdown.assert_called_once_with(5)
+
+    @patch("charm.service_running")
+    @patch("charm.snap.SnapCache")
+    @patch("charm.MongodbOperatorCharm.shutdown_mongod_gracefully")
+    @patch("charm.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_stop_shuts_down_once(
+        self, get_secret, connection, shutdown, snap_cache, service_running
+    ):
+        """Tests that mongod is shut down gracefully once when the unit is removed."""
+        mongodb_snap = snap_cache.return_value["charmed-mongodb"]
+        service_running.return_value = True
+
+        # storage-detaching stops the services once the member is removed from the replica set
+        self.harness.charm.on.mongodb_storage_detaching.emit(mock.Mock())
+        connection.return_value.__enter__.return_value.remove_replset_member.assert_called()
+        shutdown.assert_called_once()
+        mongodb_snap.stop.assert_called_with(services=["mongod"])
+
+        service_running.return_value = False
+        self.harness.charm.on.stop.emit()
+        shutdown.assert_called_once()
+        self.assertEqual(mongodb_snap.stop.call_count, 2)
+
+    @patch("charm.MongodbOperatorCharm.start_charm_services")
+    @patch("charm.snap.SnapCache")
+    @patch("charm.update_mongod_service")
+    @patch("charm.get_services_fingerprint")
+    @patch("charm.MongodbOperatorCharm.shutdown_mongod_gracefully")
+    def test_restart_does_not_drain(self, shutdown, fingerprint, *unused):
+        """Tests that restarts driven by the charm do not drain the client operations."""
+        fingerprint.return_value = "fingerprint"
+        self.harness.charm.restart_charm_services()
+        shutdown.assert_not_called()
+
+    @patch("charm.update_mongod_service")
+    @patch("charm.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_reconcile_primary_placement(self, get_secret, connection, update_mongod_service):
+        """Tests that the leader converts the placement policy into member priorities."""
+        self.harness.set_leader(True)
+        self.harness.charm.app_peer_data["db_initialised"] = "true"
+        rel_id = self.harness.charm.model.get_relation("database-peers").id
+        with self.harness.hooks_disabled():
+            for unit_id, az in [(1, "zone-a"), (2, "zone-b")]:
+                self.harness.add_relation_unit(rel_id, f"mongodb/{unit_id}")
+                self.harness.update_relation_data(
+                    rel_id,
+                    f"mongodb/{unit_id}",
+                    {"private-address": f"1.1.1.{unit_id + 1}", "availability-zone": az},
+                )
+        mongod = connection.return_value.__enter__.return_value
+        mongod.set_replicaset_member_priorities.reset_mock()
+
+        self.harness.update_config(
+            {"primary-preferred-az": "zone-a", "primary-avoid-units": "mongodb/2"}
+        )
+        mongod.set_replicaset_member_priorities.assert_called_once_with(
+            {"1.1.1.1": 1, "1.1.1.2": 2, "1.1.1.3": 0.5},
+            {
+                "1.1.1.2": {"availability-zone": "zone-a"},
+                "1.1.1.3": {"availability-zone": "zone-b"},
+            },
+        )
+
+        self.harness.update_config({"primary-preferred-units": "mongodb/0, mongodb/2"})
+        mongod.set_replicaset_member_priorities.assert_called_once()
+        self.assertEqual(
+            self.harness.charm.get_primary_placement_status(),
+            BlockedStatus("Invalid primary placement: mongodb/2 both preferred and avoided"),
+        )
+
+    @patch("charm.MongodbOperatorCharm.upgrade_in_progress", new_callable=PropertyMock)
+    @patch("charm.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_reconcile_primary_placement_during_upgrade(
+        self, get_secret, connection, upgrade_in_progress
+    ):
+        """Tests that the priorities set when moving the primary are kept during an upgrade."""
+        self.harness.set_leader(True)
+        self.harness.charm.app_peer_data["db_initialised"] = "true"
+        mongod = connection.return_value.__enter__.return_value
+        upgrade_in_progress.return_value = True
+
+        self.harness.charm.reconcile_primary_placement()
+        mongod.set_replicaset_member_priorities.assert_not_called()
+
+        upgrade_in_progress.return_value = False
+        self.harness.charm.reconcile_primary_placement()
+        mongod.set_replicaset_member_priorities.assert_called_once()
+
+    @patch("charm.update_mongod_service")
+    @patch("charm.MongosConnection")
+    @patch("charm.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_reconcile_default_rw_concern(
+        self, get_secret, connection, mongos_connection, update_mongod_service
+    ):
+        """Tests that the leader sets the defaults once and reports the effective ones."""
+        self.harness.set_leader(True)
+        self.harness.charm.app_peer_data["db_initialised"] = "true"
+        mongod = connection.return_value.__enter__.return_value
+        mongod.get_default_rw_concern.return_value = {
+            "defaultReadConcern": {"level": "majority"},
+            "defaultWriteConcern": {"w": "majority", "j": True},
+        }
+
+        self.harness.update_config(
+            {"default-read-concern": "majority", "default-write-concern": "w=majority,j=true"}
+        )
+        mongod.set_default_rw_concern.assert_called_once_with(
+            {
+                "defaultReadConcern": {"level": "majority"},
+                "defaultWriteConcern": {"w": "majority", "j": True},
+            }
+        )
+        mongos_connection.assert_not_called()
+        self.assertEqual(
+            self.harness.charm.get_default_rw_concern_status(ActiveStatus()),
+            ActiveStatus("default RW concern: readConcern=majority, w=majority, j=true"),
+        )
+
+        # defaults are not set again if unchanged
+        self.harness.update_config({"auto-delete": True})
+        mongod.set_default_rw_concern.assert_called_once()
+
+        self.harness.update_config({"default-write-concern": "j=true"})
+        mongod.set_default_rw_concern.assert_called_once()
+        self.assertEqual(
+            self.harness.charm.get_default_rw_concern_status(ActiveStatus()),
+            BlockedStatus("Invalid default read/write concern: write concern requires w"),
+        )
+
+    @patch("charm.update_mongod_service")
+    @patch("charm.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_reconcile_oplog(self, get_secret, connection, update_mongod_service):
+        """Tests that the oplog is resized live and its retention set once."""
+        self.harness.charm.app_peer_data["db_initialised"] = "true"
+        mongod = connection.return_value.__enter__.return_value
+        mongod.get_oplog_stats.return_value = {
+            "max_size": 990 * 1024**2,
+            "size": 10 * 1024**3,
+            "window": 7200,
+        }
+
+        self.harness.update_config({"oplog-size-mb": 4096, "oplog-min-retention-hours": 24.0})
+        mongod.resize_oplog.assert_called_once_with(size_mb=4096, min_retention_hours=24.0)
+        self.assertEqual(update_mongod_service.call_args.kwargs["oplog_min_retention_hours"], 24.0)
+
+        # the retention is not set again
+        mongod.get_oplog_stats.return_value["max_size"] = 4096 * 1024**2
+        self.harness.charm.reconcile_oplog()
+        mongod.resize_oplog.assert_called_once()
+
+        # sized for 4 hours of writes at the measured write rate
+        self.harness.update_config({"oplog-size-mb": 0, "oplog-target-window-hours": 4.0})
+        mongod.resize_oplog.assert_called_with(size_mb=24576, min_retention_hours=None)
+
+    @patch("rolling_restart.RollingRestart.request_restart")
+    @patch("charm.update_mongod_service")
+    @patch("charm.MongoDBConnection")
+    def test_reconcile_invalid_parameters(
+        self, connection, update_mongod_service, request_restart
+    ):
+        """Tests that unsupported parameters block the unit and are not applied."""
+        self.harness.charm.app_peer_data["db_initialised"] = "true"
+
+        self.harness.update_config({"mongod-parameters": "processUmask=000"})
+
+        self.assertEqual(
+            self.harness.charm.unit.status,
+            BlockedStatus("Invalid server parameters: unsupported parameter processUmask"),
+        )
+        connection.assert_not_called()
+        update_mongod_service.assert_not_called()
+        request_restart.assert_not_called()
@@ -262,3 +262,33 @@ class TestConfigServerInterface(unittest.TestCase):
         event.params = {}
         self.harness.charm.shard.pass_hook_checks(event)
         event.defer.assert_not_called()
+
+    @mock.patch("charms.mongodb.v1.shards_interface.ShardingProvider.is_shard_reachable")
+    @mock.patch("charms.mongodb.v1.shards_interface.ShardingProvider._get_shard_hosts")
+    @mock.patch("charms.mongodb.v1.shards_interface.ShardingProvider.get_related_shards")
+    def test_get_unreachable_shards(self, get_related_shards, get_shard_hosts, is_shard_reachable):
+        """Tests that all shards are probed and the unreachable ones are reported."""
+        with self.harness.hooks_disabled():
+            self.harness.add_relation("config-server", "shard")
+
+        get_related_shards.return_value = ["shard-one", "shard-two", "shard-three", "shard-four"]
+        shards_hosts = {
+            "shard-one": ["1.1.1.1"],
+            "shard-two": ["2.2.2.2"],
+            "shard-three": ["3.3.3.3"],
+            "shard-four": [],
+        }
+        get_shard_hosts.side_effect = lambda shard_name: shards_hosts[shard_name]
+
+        def reachable(shard_hosts):
+            if shard_hosts == ["3.3.3.3"]:
+                raise TimeoutError()
+            return shard_hosts == ["1.1.1.1"]
+
+        is_shard_reachable.side_effect = reachable
+        self.assertEqual(
+            sorted(self.harness.charm.config_server.get_unreachable_shards()),
+            ["shard-three", "shard-two"],
+        )
+        # shards that have not yet shared their hosts are not probed
+        self.assertEqual(is_shard_reachable.call_count, 3)
@@ -0,0 +1,144 @@
+# Copyright 2024 Canonical Ltd.
+# See LICENSE file for licensing details.
+import gzip
+import io
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import call, patch
+
+from dump import (
+    get_dump_command,
+    get_dump_indexes,
+    get_restore_command,
+    parse_restore_output,
+    resolve_dump_path,
+    resolve_export_path,
+    stream_to_file,
+)
+from exceptions import InvalidDumpError
+
+METADATA = (
+    '{"indexes":[{"v":{"$numberInt":"2"},"key":{"_id":{"$numberInt":"1"}},"name":"_id_"},'
+    '{"v":{"$numberInt":"2"},"key":{"email":{"$numberInt":"1"}},"name":"email_1","unique":true}],'
+    '"collectionName":"users","type":"collection"}'
+)
+
+
+class TestDump(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.common_path = Path(self.tmp_dir.name).resolve()
+        patcher = patch("config.Config.MONGODB_COMMON_PATH", self.common_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.dump_dir = self.common_path / "dump"
+        (self.dump_dir / "app").mkdir(parents=True)
+        (self.dump_dir / "app" / "users.bson.gz").write_bytes(gzip.compress(b""))
+        with gzip.open(self.dump_dir / "app" / "users.metadata.json.gz", "wt") as metadata:
+            metadata.write(METADATA)
+
+    def test_resolve_dump_path(self):
+        """Tests that dumps are resolved within the storage of the unit."""
+        self.assertEqual(resolve_dump_path("dump"), self.dump_dir)
+        self.assertEqual(resolve_dump_path(str(self.dump_dir)), self.dump_dir)
+
+        for raw_path in ["missing", "../dump", "/etc"]:
+            with self.assertRaises(InvalidDumpError):
+                resolve_dump_path(raw_path)
+
+    def test_get_restore_command(self):
+        """Tests that gzipped dumps are detected and index builds deferred."""
+        self.assertEqual(
+            get_restore_command(self.dump_dir, 4, 8, defer_index_builds=True),
+            [
+                "charmed-mongodb.mongorestore",
+                "--numParallelCollections=4",
+                "--numInsertionWorkersPerCollection=8",
+                "--noIndexRestore",
+                "--gzip",
+                f"--dir={self.dump_dir}",
+            ],
+        )
+
+        archive = self.common_path / "dump.archive"
+        archive.touch()
+        self.assertEqual(
+            get_restore_command(archive, 1, 1, drop=True)[3:],
+            ["--drop", f"--archive={archive}"],
+        )
+
+    def test_parse_restore_output(self):
+        """Tests that the documents restored are read from the mongorestore summary."""
+        output = (
+            "2024-05-01T10:00:00.000+0000\tfinished restoring app.users (1000 documents)\n"
+            "2024-05-01T10:00:00.000+0000\t1000 document(s) restored successfully. "
+            "2 document(s) failed to restore.\n"
+        )
+        self.assertEqual(parse_restore_output(output), (1000, 2))
+        self.assertEqual(parse_restore_output(""), (0, 0))
+
+    def test_get_dump_indexes(self):
+        """Tests that the secondary indexes are read from the collection metadata."""
+        self.assertEqual(
+            get_dump_indexes(self.dump_dir),
+            {"app.users": [{"key": {"email": 1}, "name": "email_1", "unique": True}]},
+        )
+
+    def test_resolve_export_path(self):
+        """Tests that archives are only exported to new files within the storage of the unit."""
+        self.assertEqual(
+            resolve_export_path("dumps/app.archive.gz"),
+            self.common_path / "dumps" / "app.archive.gz",
+        )
+
+        for raw_path in ["dump", "../app.archive.gz"]:
+            with self.assertRaises(InvalidDumpError):
+                resolve_export_path(raw_path)
+
+    def test_get_dump_command(self):
+        """Tests that collections are selected and the documents read from a secondary."""
+        command = get_dump_command("app", [], ["users", "orders"], 4)
+        self.assertEqual(
+            command,
+            [
+                "charmed-mongodb.mongodump",
+                "--archive",
+                "--gzip",
+                "--db=app",
+                "--numParallelCollections=4",
+                "--readPreference=secondaryPreferred",
+            ],
+        )
+        self.assertEqual(
+            get_dump_command("app", ["users"], ["users", "orders"], 4)[6:],
+            ["--collection=users"],
+        )
+        self.assertEqual(
+            get_dump_command("app", ["users", "orders"], ["users", "orders", "logs"], 4)[6:],
+            ["--excludeCollection=logs"],
+        )
+
+        with self.assertRaises(InvalidDumpError):
+            get_dump_command("app", [], [], 4)
+        with self.assertRaises(InvalidDumpError):
+            get_dump_command("app", ["carts"], ["users"], 4)
+
+    @patch("dump.time.sleep")
+    @patch("dump.time.monotonic")
+    @patch("config.Config.Dump.CHUNK_SIZE", 4)
+    def test_stream_to_file(self, monotonic, sleep):
+        """Tests that the stream is copied without exceeding the maximum rate."""
+        monotonic.return_value = 100
+        path = self.common_path / "app.archive.gz"
+
+        self.assertEqual(stream_to_file(io.BytesIO(b"12345678"), path, max_rate=2), 8)
+        self.assertEqual(path.read_bytes(), b"12345678")
+        # 4 bytes at 2 bytes per second take 2 seconds, 8 bytes 4 seconds
+        sleep.assert_has_calls([call(2), call(4)])
+
+        sleep.reset_mock()
+        stream_to_file(io.BytesIO(b"12345678"), path)
+        sleep.assert_not_called()
@@ -0,0 +1,91 @@
+# Copyright 2024 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+from unittest.mock import patch
+
+from machine_helpers import get_services_fingerprint, update_mongod_service
+
+
+class TestMachineHelpers(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.conf_dir = tmp_dir.name
+
+        env_file = f"{self.conf_dir}/environment"
+        with open(env_file, "w") as file:
+            file.write('PATH="no/yah/business"\n')
+
+        for attribute, value in [
+            ("ENV_VAR_PATH", env_file),
+            ("MONGOD_CONF_DIR", self.conf_dir),
+            ("MONGOD_CONF_FILE_PATH", f"{self.conf_dir}/mongod.conf"),
+            ("MONGOS_CONF_FILE_PATH", f"{self.conf_dir}/mongos.conf"),
+        ]:
+            patcher = patch(f"config.Config.{attribute}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.config = mock.Mock()
+        self.config.replset = "mongodb"
+        self.config.tls_external = False
+        self.config.tls_internal = False
+
+    def test_update_mongod_service_changed_options(self):
+        """Tests that only the options that differ from the previous files are reported."""
+        changed_options = update_mongod_service("1.1.1.1", self.config, role="config-server")
+        self.assertIn("security.authorization", changed_options)
+        self.assertIn("mongos.sharding.configDB", changed_options)
+
+        with open(f"{self.conf_dir}/environment") as file:
+            env_vars = file.read()
+        self.assertIn(f"MONGOD_ARGS=--config {self.conf_dir}/mongod.conf", env_vars)
+        self.assertIn(f"MONGOS_ARGS=--config {self.conf_dir}/mongos.conf", env_vars)
+
+        self.assertEqual(update_mongod_service("1.1.1.1", self.config, role="config-server"), [])
+
+        self.config.tls_external = True
+        self.assertEqual(
+            update_mongod_service(
+                "1.1.1.1",
+                self.config,
+                role="config-server",
+                mongod_parameters={"cursorTimeoutMillis": 1000},
+            ),
+            [
+                "mongos.net.tls.CAFile",
+                "mongos.net.tls.certificateKeyFile",
+                "mongos.net.tls.disabledProtocols",
+                "mongos.net.tls.mode",
+                "net.tls.CAFile",
+                "net.tls.certificateKeyFile",
+                "net.tls.disabledProtocols",
+                "net.tls.mode",
+                "setParameter.cursorTimeoutMillis",
+            ],
+        )
+
+    def test_services_fingerprint(self):
+        """Tests that only startup options and files change the services fingerprint."""
+        update_mongod_service("1.1.1.1", self.config)
+        fingerprint = get_services_fingerprint()
+
+        # runtime parameters are applied without a restart
+        update_mongod_service(
+            "1.1.1.1", self.config, mongod_parameters={"cursorTimeoutMillis": 1000}
+        )
+        self.assertEqual(get_services_fingerprint(), fingerprint)
+
+        update_mongod_service(
+            "1.1.1.1", self.config, mongod_parameters={"replWriterThreadCount": 32}
+        )
+        startup_fingerprint = get_services_fingerprint()
+        self.assertNotEqual(startup_fingerprint, fingerprint)
+
+        with open(os.path.join(self.conf_dir, "external-cert.pem"), "w") as file:
+            file.write("certificate")
+        self.assertNotEqual(get_services_fingerprint(), startup_fingerprint)
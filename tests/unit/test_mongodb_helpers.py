@@ -1,10 +1,18 @@
 # Copyright 2024 Canonical Ltd.
 # See LICENSE file for licensing details.
 
+import threading
+import time
 import unittest
 from unittest import mock
 
-from charms.mongodb.v1.helpers import get_mongod_args
+from charms.mongodb.v1.helpers import (
+    fan_out,
+    get_mongod_args,
+    get_mongod_config,
+    get_mongos_args,
+    get_mongos_config,
+)
 
 
 class TestMongoDBHelpers(unittest.TestCase):
@@ -83,3 +91,211 @@ class TestMongoDBHelpers(unittest.TestCase):
             get_mongod_args(config, auth=False, snap_install=False).split(),
             service_args,
         )
+
+        service_args[6:6] = [
+            "--setParameter",
+            "cursorTimeoutMillis=1000",
+            "--setParameter",
+            "notablescan=true",
+        ]
+        self.assertEqual(
+            get_mongod_args(
+                config,
+                auth=False,
+                snap_install=False,
+                parameters={"cursorTimeoutMillis": 1000, "notablescan": True},
+            ).split(),
+            service_args,
+        )
+
+    def test_get_mongod_config(self):
+        config = mock.Mock()
+        config.replset = "my_repl_set"
+        config.tls_external = False
+        config.tls_internal = False
+
+        mongod_config = get_mongod_config(
+            config,
+            auth=True,
+            snap_install=True,
+            role="shard",
+            parameters={"cursorTimeoutMillis": 1000},
+        )
+        self.assertEqual(
+            mongod_config,
+            {
+                "net": {"bindIpAll": True, "port": 27017},
+                "replication": {"replSetName": "my_repl_set"},
+                "storage": {"dbPath": "/var/snap/charmed-mongodb/common/var/lib/mongodb"},
+                "systemLog": {
+                    "destination": "file",
+                    "path": "/var/snap/charmed-mongodb/common/var/log/mongodb/mongodb.log",
+                    "logAppend": True,
+                    "logRotate": "reopen",
+                },
+                "auditLog": {
+                    "destination": "file",
+                    "format": "JSON",
+                    "path": "/var/snap/charmed-mongodb/common/var/log/mongodb/audit.log",
+                },
+                "setParameter": {"processUmask": "037", "cursorTimeoutMillis": 1000},
+                "security": {
+                    "authorization": "enabled",
+                    "clusterAuthMode": "keyFile",
+                    "keyFile": "/var/snap/charmed-mongodb/current/etc/mongod/keyFile",
+                },
+                "sharding": {"clusterRole": "shardsvr"},
+            },
+        )
+
+        config.tls_external = True
+        config.tls_internal = True
+        mongod_config = get_mongod_config(
+            config, auth=True, snap_install=False, max_connections=20000
+        )
+        self.assertEqual(mongod_config["net"]["maxIncomingConnections"], 20000)
+        self.assertEqual(
+            mongod_config["net"]["tls"],
+            {
+                "CAFile": "/etc/mongod/external-ca.crt",
+                "certificateKeyFile": "/etc/mongod/external-cert.pem",
+                "mode": "preferTLS",
+                "disabledProtocols": "TLS1_0,TLS1_1",
+                "allowInvalidCertificates": True,
+                "clusterCAFile": "/etc/mongod/internal-ca.crt",
+                "clusterFile": "/etc/mongod/internal-cert.pem",
+            },
+        )
+        self.assertEqual(
+            mongod_config["security"], {"authorization": "enabled", "clusterAuthMode": "x509"}
+        )
+        self.assertNotIn("sharding", mongod_config)
+
+    def test_get_mongos_config(self):
+        config = mock.Mock()
+        config.replset = "my_repl_set"
+        config.tls_external = False
+        config.tls_internal = False
+
+        self.assertEqual(
+            get_mongos_config(config, snap_install=True),
+            {
+                "net": {"bindIpAll": True, "port": 27018},
+                "sharding": {"configDB": "my_repl_set/localhost:27017"},
+                "systemLog": {"logAppend": True, "logRotate": "reopen"},
+                "security": {
+                    "clusterAuthMode": "keyFile",
+                    "keyFile": "/var/snap/charmed-mongodb/current/etc/mongod/keyFile",
+                },
+            },
+        )
+
+        mongos_config = get_mongos_config(
+            config,
+            external_connectivity=False,
+            parameters={"ShardingTaskExecutorPoolMaxSize": 64},
+            max_connections=1000,
+        )
+        self.assertEqual(
+            mongos_config["net"],
+            {
+                "bindIp": "/var/snap/charmed-mongodb/common/var/mongodb-27018.sock",
+                "unixDomainSocket": {"filePermissions": "0766"},
+                "port": 27018,
+                "maxIncomingConnections": 1000,
+            },
+        )
+        self.assertEqual(mongos_config["setParameter"], {"ShardingTaskExecutorPoolMaxSize": 64})
+
+    def test_get_mongos_args(self):
+        config = mock.Mock()
+        config.replset = "my_repl_set"
+        config.tls_external = True
+        config.tls_internal = True
+
+        self.assertEqual(
+            get_mongos_args(config, external_connectivity=False, max_connections=1000).split(),
+            [
+                "--bind_ip",
+                "/var/snap/charmed-mongodb/common/var/mongodb-27018.sock",
+                "--filePermissions",
+                "0766",
+                "--configdb",
+                "my_repl_set/localhost:27017",
+                "--port=27018",
+                "--logRotate",
+                "reopen",
+                "--logappend",
+                "--maxConns=1000",
+                "--clusterAuthMode=x509",
+                "--tlsCAFile=/etc/mongod/external-ca.crt",
+                "--tlsCertificateKeyFile=/etc/mongod/external-cert.pem",
+                "--tlsMode=preferTLS",
+                "--tlsDisabledProtocols=TLS1_0,TLS1_1",
+                "--tlsAllowInvalidCertificates",
+                "--tlsClusterCAFile=/etc/mongod/internal-ca.crt",
+                "--tlsClusterFile=/etc/mongod/internal-cert.pem",
+            ],
+        )
+
+    def test_fan_out_collects_results_and_errors(self):
+        """Tests that each target is reported with either its result or the error it raised."""
+
+        def probe(target):
+            if target == "shard-two":
+                raise ConnectionError("unreachable")
+            return target.upper()
+
+        results = fan_out(probe, ["shard-one", "shard-two", "shard-three"])
+
+        self.assertEqual(results["shard-one"], "SHARD-ONE")
+        self.assertEqual(results["shard-three"], "SHARD-THREE")
+        self.assertIsInstance(results["shard-two"], ConnectionError)
+
+    def test_fan_out_probes_concurrently(self):
+        """Tests that targets are probed at the same time, bounded by the number of workers."""
+        barrier = threading.Barrier(4, timeout=5)
+
+        def probe(target):
+            # fails with BrokenBarrierError unless all four targets are probed at once
+            barrier.wait()
+            return True
+
+        results = fan_out(probe, range(4), max_workers=4)
+        self.assertEqual(results, {0: True, 1: True, 2: True, 3: True})
+
+    def test_fan_out_deadline(self):
+        """Tests that a target exceeding the deadline does not hold up the other targets."""
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def probe(target):
+            if target == "hanging":
+                release.wait(10)
+            return "ok"
+
+        start = time.monotonic()
+        results = fan_out(probe, ["hanging", "healthy"], max_workers=2, deadline=0.5)
+
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(results["healthy"], "ok")
+        self.assertIsInstance(results["hanging"], TimeoutError)
+
+    def test_fan_out_single_deadline(self):
+        """Tests that the deadline bounds the whole fan-out, not each batch of targets."""
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def probe(target):
+            release.wait(10)
+            return "ok"
+
+        start = time.monotonic()
+        results = fan_out(probe, range(4), max_workers=1, deadline=0.5)
+
+        # the queued targets are cancelled rather than given a deadline each
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertTrue(all(isinstance(result, TimeoutError) for result in results.values()))
+
+    def test_fan_out_no_targets(self):
+        self.assertEqual(fan_out(mock.Mock(), []), {})
@@ -2,6 +2,8 @@
 # See LICENSE file for licensing details.
 
 import unittest
+from datetime import datetime, timedelta
+from typing import Dict, List
 from unittest.mock import call, patch
 
 import tenacity
@@ -209,3 +211,389 @@ class TestMongo(unittest.TestCase):
 
             # verify we close connection
             (mock_client.return_value.close).assert_called()
+
+    @patch("charms.mongodb.v0.mongo.MongoClient")
+    @patch("charms.mongodb.v1.mongodb.MongoConfiguration")
+    def test_get_replset_member_lag(self, config, mock_client):
+        """Test that the lag of a member is measured against the optime of the primary."""
+        now = datetime.now()
+        mock_client.return_value.admin.command.return_value = {
+            "members": [
+                {"name": "1.1.1.1:27017", "stateStr": "PRIMARY", "optimeDate": now},
+                {
+                    "name": "2.2.2.2:27017",
+                    "stateStr": "SECONDARY",
+                    "optimeDate": now - timedelta(seconds=12),
+                },
+                {"name": "3.3.3.3:27017", "stateStr": "STARTUP2", "optimeDate": now},
+            ]
+        }
+        with MongoDBConnection(config) as mongo:
+            self.assertEqual(mongo.get_replset_member_lag("1.1.1.1"), 0)
+            self.assertEqual(mongo.get_replset_member_lag("2.2.2.2"), 12)
+            # members that are not healthy have no lag to report
+            self.assertIsNone(mongo.get_replset_member_lag("3.3.3.3"))
+            self.assertIsNone(mongo.get_replset_member_lag("4.4.4.4"))
+
+    def test_get_step_down_candidate(self):
+        """Test that the most caught up electable secondary is the step down candidate."""
+        now = datetime.now()
+        rs_status = {
+            "members": [
+                {"name": "1.1.1.1:27017", "stateStr": "PRIMARY", "optimeDate": now},
+                {
+                    "name": "2.2.2.2:27017",
+                    "stateStr": "SECONDARY",
+                    "optimeDate": now - timedelta(seconds=5),
+                },
+                {
+                    "name": "3.3.3.3:27017",
+                    "stateStr": "SECONDARY",
+                    "optimeDate": now - timedelta(seconds=1),
+                },
+                {"name": "4.4.4.4:27017", "stateStr": "SECONDARY", "optimeDate": now},
+            ]
+        }
+        rs_config = {
+            "members": [
+                {"host": "1.1.1.1:27017", "priority": 1},
+                {"host": "2.2.2.2:27017", "priority": 1},
+                {"host": "3.3.3.3:27017", "priority": 0.5},
+                {"host": "4.4.4.4:27017", "priority": 0},
+            ]
+        }
+        self.assertEqual(
+            MongoDBConnection._get_step_down_candidate(rs_status, rs_config), ("3.3.3.3", 1)
+        )
+        self.assertEqual(
+            MongoDBConnection._get_step_down_candidate(rs_status, rs_config, "2.2.2.2"),
+            ("2.2.2.2", 5),
+        )
+        # members with priority 0 are never elected
+        self.assertEqual(
+            MongoDBConnection._get_step_down_candidate(rs_status, rs_config, "4.4.4.4"),
+            (None, None),
+        )
+
+    @patch("charms.mongodb.v0.mongo.MongoClient")
+    @patch("charms.mongodb.v1.mongodb.MongoConfiguration")
+    def test_step_down_primary(self, config, mock_client):
+        """Test that the primary steps down with a catch up period once a secondary caught up."""
+        now = datetime.now()
+        statuses = [
+            {
+                "members": [
+                    {"name": "1.1.1.1:27017", "stateStr": "PRIMARY", "optimeDate": now},
+                    {"name": "2.2.2.2:27017", "stateStr": "SECONDARY", "optimeDate": now},
+                ]
+            },
+            {
+                "members": [
+                    {"name": "1.1.1.1:27017", "stateStr": "SECONDARY", "optimeDate": now},
+                    {"name": "2.2.2.2:27017", "stateStr": "PRIMARY", "optimeDate": now},
+                ]
+            },
+        ]
+
+        def command(name, *args):
+            if name == "replSetGetStatus":
+                # the primary changes once it stepped down
+                return statuses[step_down.called]
+            if name == "replSetGetConfig":
+                return {"config": {"members": [{"host": "2.2.2.2:27017"}]}}
+            step_down(name, *args)
+
+        step_down = unittest.mock.Mock()
+        mock_client.return_value.admin.command.side_effect = command
+        with MongoDBConnection(config) as mongo:
+            self.assertIsNotNone(mongo.step_down_primary())
+
+        step_down.assert_called_once_with(
+            "replSetStepDown", {"stepDownSecs": 60, "secondaryCatchUpPeriodSecs": 10}
+        )
+
+    @patch("charms.mongodb.v1.mongodb.Retrying")
+    @patch("charms.mongodb.v0.mongo.MongoClient")
+    @patch("charms.mongodb.v1.mongodb.MongoConfiguration")
+    def test_drain_operations(self, config, mock_client, retrying):
+        """Test that client operations are counted until drained and the member shuts down."""
+        retrying.return_value = tenacity.Retrying(stop=tenacity.stop_after_attempt(3))
+        command = mock_client.return_value.admin.command
+        command.side_effect = [
+            {"inprog": [{"opid": 1}, {"opid": 2}, {"opid": 3}]},
+            {"inprog": [{"opid": 1}]},
+            {"inprog": []},
+            ConnectionFailure("connection closed"),
+        ]
+        with MongoDBConnection(config) as mongo:
+            self.assertEqual(mongo.drain_operations(timeout=30), (3, 0))
+            mongo.shutdown(timeout=5)
+
+        command.assert_called_with("shutdown", timeoutSecs=5)
+        # the awaitable commands drivers keep open are not waited for
+        current_op = command.call_args_list[0].args[0]
+        self.assertEqual(current_op["command.hello"], {"$exists": False})
+        self.assertEqual(current_op["command.maxAwaitTimeMS"], {"$exists": False})
+
+    @patch("charms.mongodb.v0.mongo.MongoClient")
+    @patch("charms.mongodb.v1.mongodb.MongoConfiguration")
+    def test_get_hot_collections(self, config, mock_client):
+        """Test that collections are ranked by usage, with their used indexes."""
+        client = mock_client.return_value
+        client.admin.command.return_value = {
+            "note": "all times in microseconds",
+            "totals": {
+                "app.orders": {"total": {"time": 10, "count": 500}},
+                "app.users": {"total": {"time": 10, "count": 900}},
+                "app.system.views": {"total": {"time": 10, "count": 1000}},
+                "admin.system.users": {"total": {"time": 10, "count": 1000}},
+                "local.oplog.rs": {"total": {"time": 10, "count": 1000}},
+            },
+        }
+        client.__getitem__.return_value.__getitem__.return_value.aggregate.return_value = [
+            {"name": "_id_", "accesses": {"ops": 10}},
+            {"name": "email_1", "accesses": {"ops": 100}},
+            {"name": "unused_1", "accesses": {"ops": 0}},
+        ]
+        with MongoDBConnection(config) as mongo:
+            self.assertEqual(
+                mongo.get_hot_collections(limit=1),
+                [{"ns": "app.users", "indexes": ["email_1", "_id_"]}],
+            )
+
+    @patch("charms.mongodb.v0.mongo.MongoClient")
+    @patch("charms.mongodb.v1.mongodb.MongoConfiguration")
+    def test_prewarm_collections(self, config, mock_client):
+        """Test that indexes then documents are loaded until the size budget is exhausted."""
+        database = mock_client.return_value.__getitem__.return_value
+        database.command.return_value = {"size": 300, "indexSizes": {"_id_": 100, "email_1": 50}}
+        collection = database.__getitem__.return_value
+        with MongoDBConnection(config) as mongo:
+            loaded = mongo.prewarm_collections(
+                [{"ns": "app.users", "indexes": ["email_1", "_id_"]}], timeout=60, max_bytes=200
+            )
+
+        # the documents do not fit in the remaining budget
+        self.assertEqual(loaded, 150)
+        self.assertEqual(
+            [aggregate.kwargs["hint"] for aggregate in collection.aggregate.call_args_list],
+            ["email_1", "_id_"],
+        )
+
+    @patch("charms.mongodb.v0.mongo.MongoClient")
+    @patch("charms.mongodb.v1.mongodb.MongoConfiguration")
+    def test_get_initial_sync_progress(self, config, mock_client):
+        """Test that the copy rate and the time remaining of an initial sync are estimated."""
+        command = mock_client.return_value.admin.command
+        command.return_value = {"members": []}
+        with MongoDBConnection(config) as mongo:
+            self.assertIsNone(mongo.get_initial_sync_progress())
+
+            command.return_value = {
+                "initialSyncStatus": {
+                    "totalInitialSyncElapsedMillis": 100000,
+                    "approxTotalDataSize": 3000,
+                    "approxTotalBytesCopied": 1000,
+                    "databases": {"databasesCloned": 1, "databasesToClone": 2},
+                }
+            }
+            progress = mongo.get_initial_sync_progress()
+            self.assertEqual(progress["rate"], 10)
+            self.assertEqual(progress["eta"], 200)
+            self.assertEqual(progress["databases_cloned"], 1)
+
+            # the estimate of mongod is preferred
+            command.return_value["initialSyncStatus"]["remainingInitialSyncEstimatedMillis"] = 5000
+            self.assertEqual(mongo.get_initial_sync_progress()["eta"], 5)
+
+    @patch("charms.mongodb.v0.mongo.MongoClient")
+    @patch("charms.mongodb.v1.mongodb.MongoConfiguration")
+    def test_compact_collections(self, config, mock_client):
+        """Test that the user collections are compacted and the bytes freed summed."""
+        client = mock_client.return_value
+        client.list_database_names.return_value = ["admin", "app", "local"]
+        database = client.__getitem__.return_value
+        database.list_collection_names.return_value = ["users", "system.views", "orders"]
+        database.command.side_effect = [{"bytesFreed": 100, "ok": 1}, {"bytesFreed": 50, "ok": 1}]
+        with MongoDBConnection(config) as mongo:
+            self.assertEqual(mongo.compact_collections(), 150)
+
+        client.__getitem__.assert_called_with("app")
+        database.command.assert_has_calls([call("compact", "users"), call("compact", "orders")])
+
+    @patch("charms.mongodb.v0.mongo.MongoClient")
+    @patch("charms.mongodb.v1.mongodb.MongoConfiguration")
+    def test_get_flow_control_status(self, config, mock_client):
+        """Test that the flow control state is read from the server status."""
+        command = mock_client.return_value.admin.command
+        command.return_value = {
+            "flowControl": {
+                "enabled": True,
+                "targetRateLimit": 1000,
+                "timeAcquiringMicros": 2500000,
+                "isLagged": True,
+                "isLaggedCount": 3,
+            }
+        }
+        with MongoDBConnection(config) as mongo:
+            self.assertEqual(
+                mongo.get_flow_control_status(),
+                {
+                    "enabled": True,
+                    "is_lagged": True,
+                    "is_lagged_count": 3,
+                    "target_rate": 1000,
+                    "time_acquiring": 2.5,
+                },
+            )
+
+    @patch("charms.mongodb.v0.mongo.MongoClient")
+    @patch("charms.mongodb.v1.mongodb.MongoConfiguration")
+    def test_set_replicaset_settings(self, config, mock_client):
+        """Test that the replica set is only reconfigured when its settings change."""
+        command = mock_client.return_value.admin.command
+        command.return_value = {
+            "config": {
+                "version": 3,
+                "members": [{"_id": 0, "host": "1.1.1.1:27017", "priority": 1}],
+                "settings": {"electionTimeoutMillis": 10000, "heartbeatIntervalMillis": 2000},
+            }
+        }
+        with MongoDBConnection(config) as mongo:
+            self.assertFalse(mongo.set_replicaset_settings({"electionTimeoutMillis": 10000}))
+            command.assert_called_once_with("replSetGetConfig")
+
+            self.assertTrue(mongo.set_replicaset_settings({"electionTimeoutMillis": 2000}))
+            command.assert_called_with(
+                "replSetReconfig",
+                {
+                    "version": 4,
+                    "members": [{"_id": 0, "host": "1.1.1.1:27017", "priority": 1}],
+                    "settings": {
+                        "electionTimeoutMillis": 2000,
+                        "heartbeatIntervalMillis": 2000,
+                    },
+                },
+            )
+
+    @patch("charms.mongodb.v0.mongo.MongoClient")
+    @patch("charms.mongodb.v1.mongodb.MongoConfiguration")
+    def test_set_replicaset_member_priorities(self, config, mock_client):
+        """Test that only the priorities and tags of the listed members are set."""
+        command = mock_client.return_value.admin.command
+        command.return_value = {
+            "config": {
+                "version": 3,
+                "members": [
+                    {"_id": 0, "host": "1.1.1.1:27017", "priority": 1},
+                    {"_id": 1, "host": "2.2.2.2:27017", "priority": 1},
+                    {"_id": 2, "host": "3.3.3.3:27017", "priority": 1},
+                ],
+            }
+        }
+        with MongoDBConnection(config) as mongo:
+            self.assertTrue(
+                mongo.set_replicaset_member_priorities(
+                    {"1.1.1.1": 3, "2.2.2.2": 0.5}, {"1.1.1.1": {"availability-zone": "a"}}
+                )
+            )
+            command.assert_called_with(
+                "replSetReconfig",
+                {
+                    "version": 4,
+                    "members": [
+                        {
+                            "_id": 0,
+                            "host": "1.1.1.1:27017",
+                            "priority": 3,
+                            "tags": {"availability-zone": "a"},
+                        },
+                        {"_id": 1, "host": "2.2.2.2:27017", "priority": 0.5},
+                        {"_id": 2, "host": "3.3.3.3:27017", "priority": 1},
+                    ],
+                },
+            )
+
+    def _move_primary(self, config, mock_client, primary, new_primary: str) -> List[Dict]:
+        """Moves the primary of a replica set with unequal priorities, returns the reconfigs."""
+        members = [
+            {"_id": 0, "host": "1.1.1.1:27017", "priority": 2},
+            {"_id": 1, "host": "2.2.2.2:27017", "priority": 1},
+            {"_id": 2, "host": "3.3.3.3:27017", "priority": 0},
+        ]
+        rs_config = {"version": 3, "members": members}
+        reconfigs = []
+
+        def command(name, *args):
+            if name == "replSetGetStatus":
+                return {"members": []}
+            if name == "replSetReconfig":
+                reconfigs.append({m["host"]: m["priority"] for m in args[0]["members"]})
+                rs_config["members"] = args[0]["members"]
+                return {}
+            return {"config": {"version": rs_config["version"], "members": rs_config["members"]}}
+
+        mock_client.return_value.admin.command.side_effect = command
+        primary.return_value = new_primary
+        with MongoDBConnection(config) as mongo:
+            mongo.move_primary(new_primary_ip=new_primary)
+
+        return reconfigs
+
+    @patch("charms.mongodb.v1.mongodb.MongoDBConnection.primary")
+    @patch("charms.mongodb.v1.mongodb.MongoDBConnection.step_down_primary")
+    @patch("charms.mongodb.v0.mongo.MongoClient")
+    @patch("charms.mongodb.v1.mongodb.MongoConfiguration")
+    def test_move_primary_restores_priorities(self, config, mock_client, step_down, primary):
+        """Test that the priorities are restored once moved to the highest priority member."""
+        self.assertEqual(
+            self._move_primary(config, mock_client, primary, "1.1.1.1"),
+            [
+                # pre-warming members keep their priority of 0
+                {"1.1.1.1:27017": 2, "2.2.2.2:27017": 0.5, "3.3.3.3:27017": 0},
+                {"1.1.1.1:27017": 2, "2.2.2.2:27017": 1, "3.3.3.3:27017": 0},
+            ],
+        )
+        step_down.assert_called_once_with(candidate="1.1.1.1")
+
+    @patch("charms.mongodb.v1.mongodb.MongoDBConnection.primary")
+    @patch("charms.mongodb.v1.mongodb.MongoDBConnection.step_down_primary")
+    @patch("charms.mongodb.v0.mongo.MongoClient")
+    @patch("charms.mongodb.v1.mongodb.MongoConfiguration")
+    def test_move_primary_keeps_lowered_priorities(self, config, mock_client, step_down, primary):
+        """Test that a higher priority member is not given the primary back once moved."""
+        self.assertEqual(
+            self._move_primary(config, mock_client, primary, "2.2.2.2"),
+            [{"1.1.1.1:27017": 0.5, "2.2.2.2:27017": 1, "3.3.3.3:27017": 0}],
+        )
+        step_down.assert_called_once_with(candidate="2.2.2.2")
+
+    @patch("charms.mongodb.v0.mongo.MongoClient")
+    @patch("charms.mongodb.v1.mongodb.MongoConfiguration")
+    def test_set_replicaset_election_priority(self, config, mock_client):
+        """Test that the priorities of the members are set, except for the ignored member."""
+        command = mock_client.return_value.admin.command
+        command.side_effect = lambda *args: {
+            "config": {
+                "version": 3,
+                "members": [
+                    {"_id": 0, "host": "1.1.1.1:27017", "priority": 1},
+                    {"_id": 1, "host": "2.2.2.2:27017", "priority": 1},
+                ],
+            }
+        }
+        with MongoDBConnection(config) as mongo:
+            mongo.set_replicaset_election_priority(priority=1)
+            command.assert_called_once_with("replSetGetConfig")
+
+            mongo.set_replicaset_election_priority(priority=0.5, ignore_member="2.2.2.2:27017")
+            command.assert_called_with(
+                "replSetReconfig",
+                {
+                    "version": 4,
+                    "members": [
+                        {"_id": 0, "host": "1.1.1.1:27017", "priority": 0.5},
+                        {"_id": 1, "host": "2.2.2.2:27017", "priority": 1},
+                    ],
+                },
+            )
@@ -0,0 +1,29 @@
+# Copyright 2024 Canonical Ltd.
+# See LICENSE file for licensing details.
+import unittest
+
+from oplog import MB, get_target_oplog_size, is_oplog_resize_needed
+
+
+class TestOplog(unittest.TestCase):
+    def test_get_target_oplog_size(self):
+        """Tests that the oplog is sized for the target window at the measured write rate."""
+        # 10GB written over 2 hours, sized for 4 hours with 20% headroom
+        stats = {"max_size": 20 * 1024 * MB, "size": 10 * 1024 * MB, "window": 7200}
+        self.assertEqual(get_target_oplog_size(stats, target_window_hours=4), 24576)
+
+        # never below the minimum oplog size
+        stats = {"max_size": 990 * MB, "size": 10 * MB, "window": 7200}
+        self.assertEqual(get_target_oplog_size(stats, target_window_hours=4), 990)
+
+    def test_get_target_oplog_size_not_measurable(self):
+        """Tests that no size is returned until the oplog holds enough entries."""
+        stats = {"max_size": 990 * MB, "size": MB, "window": 60}
+        self.assertIsNone(get_target_oplog_size(stats, target_window_hours=4))
+
+    def test_is_oplog_resize_needed(self):
+        """Tests that automatically sized oplogs are only resized past the threshold."""
+        self.assertFalse(is_oplog_resize_needed(2048 * MB, 2048))
+        self.assertTrue(is_oplog_resize_needed(2048 * MB, 2100))
+        self.assertFalse(is_oplog_resize_needed(2048 * MB, 2100, threshold=0.1))
+        self.assertTrue(is_oplog_resize_needed(2048 * MB, 4096, threshold=0.1))
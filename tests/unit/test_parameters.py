@@ -0,0 +1,161 @@
+# Copyright 2024 Canonical Ltd.
+# See LICENSE file for licensing details.
+import unittest
+
+from parameterized import parameterized
+
+from exceptions import InvalidParametersError
+from parameters import (
+    get_pending_restart_parameters,
+    get_runtime_parameters,
+    parse_default_rw_concern,
+    parse_flow_control_parameters,
+    parse_initial_sync_parameters,
+    parse_parameters,
+    parse_replset_settings,
+)
+
+RUNTIME = frozenset({"cursorTimeoutMillis", "notablescan"})
+STARTUP = frozenset({"replWriterThreadCount", "initialSyncMethod"})
+
+
+class TestParameters(unittest.TestCase):
+    def test_parse_parameters(self):
+        """Tests that parameters are parsed with their types."""
+        self.assertEqual(parse_parameters("", RUNTIME, STARTUP), {})
+        self.assertEqual(
+            parse_parameters(
+                "cursorTimeoutMillis=300000, notablescan=True,initialSyncMethod=fileCopyBased,",
+                RUNTIME,
+                STARTUP,
+            ),
+            {
+                "cursorTimeoutMillis": 300000,
+                "notablescan": True,
+                "initialSyncMethod": "fileCopyBased",
+            },
+        )
+
+    @parameterized.expand(
+        [
+            ("cursorTimeoutMillis",),
+            ("cursorTimeoutMillis=",),
+            ("=300000",),
+            ("processUmask=037",),
+            ("notablescan=true,notablescan=false",),
+        ]
+    )
+    def test_parse_invalid_parameters(self, raw_parameters):
+        """Tests that malformed, unknown and duplicated parameters are rejected."""
+        with self.assertRaises(InvalidParametersError):
+            parse_parameters(raw_parameters, RUNTIME, STARTUP)
+
+    def test_parse_denied_parameters(self):
+        """Tests that parameters weakening the access control are rejected."""
+        with self.assertRaisesRegex(InvalidParametersError, "not allowed"):
+            parse_parameters(
+                "enableLocalhostAuthBypass=true",
+                RUNTIME,
+                STARTUP | {"enableLocalhostAuthBypass"},
+            )
+
+    def test_get_runtime_parameters(self):
+        """Tests that only the parameters settable at runtime are applied live."""
+        parameters = {"cursorTimeoutMillis": 1000, "replWriterThreadCount": 32}
+        self.assertEqual(
+            get_runtime_parameters(parameters, RUNTIME), {"cursorTimeoutMillis": 1000}
+        )
+
+    def test_get_pending_restart_parameters(self):
+        """Tests that parameters which cannot be applied live are pending a restart."""
+        applied = {"cursorTimeoutMillis": 1000, "notablescan": True, "replWriterThreadCount": 16}
+        parameters = {
+            "cursorTimeoutMillis": 2000,
+            "replWriterThreadCount": 32,
+            "initialSyncMethod": "fileCopyBased",
+        }
+        self.assertEqual(
+            get_pending_restart_parameters(parameters, applied, RUNTIME),
+            # notablescan cannot be reset to its default value without a restart
+            ["initialSyncMethod", "notablescan", "replWriterThreadCount"],
+        )
+        self.assertEqual(get_pending_restart_parameters(applied, applied, RUNTIME), [])
+
+    def test_parse_default_rw_concern(self):
+        """Tests that the defaults are parsed into the setDefaultRWConcern arguments."""
+        self.assertEqual(parse_default_rw_concern("", ""), {"defaultReadConcern": {}})
+        self.assertEqual(
+            parse_default_rw_concern("majority", "w=majority,j=true,wtimeout=5000"),
+            {
+                "defaultReadConcern": {"level": "majority"},
+                "defaultWriteConcern": {"w": "majority", "j": True, "wtimeout": 5000},
+            },
+        )
+        self.assertEqual(
+            parse_default_rw_concern("", "w=1"),
+            {"defaultReadConcern": {}, "defaultWriteConcern": {"w": 1}},
+        )
+
+    @parameterized.expand(
+        [
+            ("linearizable", ""),
+            ("", "j=true"),
+            ("", "w=-1"),
+            ("", "w=majority,j=1"),
+            ("", "w=majority,wtimeout=-5"),
+            ("", "w=majority,fsync=true"),
+        ]
+    )
+    def test_parse_invalid_default_rw_concern(self, read_concern, write_concern):
+        """Tests that unsupported levels and malformed write concerns are rejected."""
+        with self.assertRaises(InvalidParametersError):
+            parse_default_rw_concern(read_concern, write_concern)
+
+    def test_parse_initial_sync_parameters(self):
+        """Tests that only the non default initial sync options set parameters."""
+        self.assertEqual(parse_initial_sync_parameters("logical", ""), {})
+        self.assertEqual(
+            parse_initial_sync_parameters("file-copy", "secondary"),
+            {
+                "initialSyncMethod": "fileCopyBased",
+                "initialSyncSourceReadPreference": "secondaryPreferred",
+            },
+        )
+
+        with self.assertRaises(InvalidParametersError):
+            parse_initial_sync_parameters("snapshot", "")
+        with self.assertRaises(InvalidParametersError):
+            parse_initial_sync_parameters("logical", "secondaryPreferred")
+        # secondaries can only be sync sources with chaining
+        with self.assertRaises(InvalidParametersError):
+            parse_initial_sync_parameters("logical", "nearest", chaining_allowed=False)
+
+    def test_parse_flow_control_parameters(self):
+        """Tests that the flow control parameters are always set and the target lag checked."""
+        self.assertEqual(
+            parse_flow_control_parameters(True, 10),
+            {"enableFlowControl": True, "flowControlTargetLagSeconds": 10},
+        )
+
+        with self.assertRaises(InvalidParametersError):
+            parse_flow_control_parameters(False, 0)
+
+    def test_parse_replset_settings(self):
+        """Tests that valid settings are mapped to the replica set config settings."""
+        self.assertEqual(
+            parse_replset_settings(2000, 500, 0, chaining_allowed=False),
+            {
+                "electionTimeoutMillis": 2000,
+                "heartbeatIntervalMillis": 500,
+                "catchUpTimeoutMillis": 0,
+                "chainingAllowed": False,
+            },
+        )
+
+    @parameterized.expand([(500, 200, -1), (2000, 50, -1), (2000, 1500, -1), (2000, 500, -2)])
+    def test_parse_invalid_replset_settings(
+        self, election_timeout, heartbeat_interval, catch_up_timeout
+    ):
+        """Tests that out of bounds and inconsistent settings are rejected."""
+        with self.assertRaises(InvalidParametersError):
+            parse_replset_settings(election_timeout, heartbeat_interval, catch_up_timeout)
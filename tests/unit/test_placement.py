@@ -0,0 +1,59 @@
+# Copyright 2024 Canonical Ltd.
+# See LICENSE file for licensing details.
+import unittest
+
+from exceptions import InvalidParametersError
+from placement import get_member_priorities, parse_unit_names
+
+
+class TestPlacement(unittest.TestCase):
+    def test_parse_unit_names(self):
+        """Tests that unit names of the application are parsed."""
+        self.assertEqual(parse_unit_names("", "mongodb"), frozenset())
+        self.assertEqual(
+            parse_unit_names(" mongodb/0, mongodb/3,", "mongodb"),
+            frozenset({"mongodb/0", "mongodb/3"}),
+        )
+
+        for raw_units in ["mongodb", "mongodb/a", "other/0"]:
+            with self.assertRaises(InvalidParametersError):
+                parse_unit_names(raw_units, "mongodb")
+
+    def test_get_member_priorities(self):
+        """Tests that preferred units rank above the preferred zone and avoided units last."""
+        units_az = {
+            "mongodb/0": "zone-a",
+            "mongodb/1": "zone-b",
+            "mongodb/2": "zone-b",
+            "mongodb/3": None,
+        }
+        self.assertEqual(
+            get_member_priorities(units_az, frozenset(), "", frozenset()),
+            {"mongodb/0": 1, "mongodb/1": 1, "mongodb/2": 1, "mongodb/3": 1},
+        )
+        self.assertEqual(
+            get_member_priorities(
+                units_az, frozenset({"mongodb/3"}), "zone-b", frozenset({"mongodb/2"})
+            ),
+            {"mongodb/0": 1, "mongodb/1": 2, "mongodb/2": 0.5, "mongodb/3": 3},
+        )
+
+    def test_get_member_priorities_prewarming(self):
+        """Tests that pre-warming units are not electable, whatever their placement."""
+        self.assertEqual(
+            get_member_priorities(
+                {"mongodb/0": None, "mongodb/1": None},
+                frozenset({"mongodb/0"}),
+                "",
+                frozenset(),
+                prewarming_units=frozenset({"mongodb/0"}),
+            ),
+            {"mongodb/0": 0, "mongodb/1": 1},
+        )
+
+    def test_get_member_priorities_conflict(self):
+        """Tests that a unit cannot be both preferred and avoided."""
+        with self.assertRaises(InvalidParametersError):
+            get_member_priorities(
+                {"mongodb/0": None}, frozenset({"mongodb/0"}), "", frozenset({"mongodb/0"})
+            )
@@ -0,0 +1,176 @@
+# Copyright 2024 Canonical Ltd.
+# See LICENSE file for licensing details.
+import json
+import unittest
+from unittest.mock import patch
+
+from charms.operator_libs_linux.v2.snap import SnapError
+from ops.model import BlockedStatus
+from ops.testing import Harness
+from pymongo.errors import OperationFailure
+
+from charm import MongodbOperatorCharm
+from config import Config
+
+from .helpers import patch_network_get
+
+PEER_RELATION_NAME = "database-peers"
+
+
+class TestPrewarm(unittest.TestCase):
+    @patch("charm.get_charm_revision")
+    @patch("charms.mongodb.v0.set_status.get_charm_revision")
+    @patch_network_get(private_address="1.1.1.1")
+    def setUp(self, *unused):
+        self.harness = Harness(MongodbOperatorCharm)
+        self.harness.begin()
+        with self.harness.hooks_disabled():
+            self.peer_rel_id = self.harness.add_relation(PEER_RELATION_NAME, "mongodb")
+            self.harness.add_relation_unit(self.peer_rel_id, "mongodb/1")
+            self.harness.update_relation_data(
+                self.peer_rel_id, "mongodb", {"db_initialised": "true"}
+            )
+            self.harness.update_config({"prewarm-timeout": 60})
+        self.charm = self.harness.charm
+        self.addCleanup(self.harness.cleanup)
+
+    @patch("prewarm.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_prewarm_after_restart(self, get_secret, connection):
+        """Tests that the member is unelectable until pre-warmed with the sampled collections."""
+        mongod = connection.return_value.__enter__.return_value
+        hot_collections = [{"ns": "app.users", "indexes": ["_id_"]}]
+        mongod.get_hot_collections.return_value = hot_collections
+        mongod.client.admin.command.return_value = {"myState": 2, "pid": 1234}
+        mongod.prewarm_collections.return_value = 1024
+
+        self.assertTrue(self.charm.prewarm.prepare())
+        mongod.set_replicaset_member_priorities.assert_called_once_with({"1.1.1.1": 0})
+        self.assertTrue(self.charm.prewarm.is_prewarming)
+        # the leader keeps the member unelectable while it pre-warms
+        self.assertEqual(self.charm.get_member_priorities()["mongodb/0"], 0)
+
+        self.charm.prewarm.run()
+        mongod.prewarm_collections.assert_called_once()
+        self.assertEqual(mongod.prewarm_collections.call_args.args[0], hot_collections)
+        mongod.set_replicaset_member_priorities.assert_called_with({"1.1.1.1": 1})
+        self.assertFalse(self.charm.prewarm.is_prewarming)
+        self.assertEqual(
+            json.loads(self.charm.unit_peer_data["prewarm-collections"]), hot_collections
+        )
+
+    @patch("prewarm.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_prepare_primary(self, get_secret, connection):
+        """Tests that a member that cannot become unelectable is not pre-warmed."""
+        mongod = connection.return_value.__enter__.return_value
+        mongod.set_replicaset_member_priorities.side_effect = OperationFailure("primary")
+
+        self.assertFalse(self.charm.prewarm.prepare(sample=False))
+        self.assertFalse(self.charm.prewarm.is_prewarming)
+
+    @patch("prewarm.Prewarm.run")
+    @patch("prewarm.Prewarm.prepare")
+    @patch("prewarm.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    def test_update_status_detects_restart(self, get_secret, connection, prepare, run):
+        """Tests that a mongod restarted outside of the charm is pre-warmed."""
+        mongod = connection.return_value.__enter__.return_value
+        mongod.client.admin.command.return_value = {"pid": 1234}
+        mongod.get_hot_collections.return_value = []
+
+        self.charm.prewarm._on_update_status(None)
+        prepare.assert_not_called()
+        self.assertEqual(self.charm.unit_peer_data["mongod-pid"], "1234")
+
+        mongod.client.admin.command.return_value = {"pid": 5678}
+        self.charm.prewarm._on_update_status(None)
+        prepare.assert_called_once_with(sample=False)
+        run.assert_called_once()
+
+    @patch("prewarm.Prewarm.run")
+    @patch("prewarm.Prewarm.prepare")
+    @patch("prewarm.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    def test_update_status_restart_not_prewarmed(self, get_secret, connection, prepare, run):
+        """Tests that a restart is only handled once, even if the member was not pre-warmed."""
+        mongod = connection.return_value.__enter__.return_value
+        mongod.client.admin.command.return_value = {"pid": 5678}
+        mongod.get_hot_collections.return_value = [{"ns": "app.users", "indexes": ["_id_"]}]
+        prepare.return_value = False
+        self.charm.unit_peer_data["mongod-pid"] = "1234"
+
+        # e.g. a single member or the primary cannot become unelectable
+        self.charm.prewarm._on_update_status(None)
+        prepare.assert_called_once_with(sample=False)
+        run.assert_not_called()
+        self.assertEqual(self.charm.unit_peer_data["mongod-pid"], "5678")
+
+        self.charm.prewarm._on_update_status(None)
+        prepare.assert_called_once()
+        mongod.get_hot_collections.assert_called_once()
+
+    @patch("prewarm.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    def test_record_pid_unreachable(self, get_secret, connection):
+        """Tests that a mongod that cannot be reached is not mistaken for a restart later."""
+        connection.return_value.__enter__.return_value.client.admin.command.side_effect = (
+            OperationFailure("not ready")
+        )
+        self.charm.unit_peer_data["mongod-pid"] = "1234"
+
+        self.assertIsNone(self.charm.prewarm.record_pid())
+        self.assertNotIn("mongod-pid", self.charm.unit_peer_data)
+
+    @patch("charm.MongodbOperatorCharm.start_charm_services")
+    @patch("charm.MongodbOperatorCharm.stop_charm_services")
+    @patch("charm.update_mongod_service")
+    @patch("charm.get_services_fingerprint")
+    @patch("prewarm.Prewarm.run")
+    @patch("prewarm.Prewarm.prepare")
+    @patch("prewarm.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_restart_records_pid(self, get_secret, connection, prepare, run, fingerprint, *unused):
+        """Tests that the pid is tracked on restarts, whether the member is pre-warmed or not."""
+        fingerprint.return_value = "fingerprint"
+        mongod = connection.return_value.__enter__.return_value
+        mongod.client.admin.command.return_value = {"pid": 5678}
+        self.charm.unit_peer_data["mongod-pid"] = "1234"
+        prepare.return_value = False
+
+        self.charm.restart_charm_services()
+        self.assertEqual(self.charm.unit_peer_data["mongod-pid"], "5678")
+
+        # the pid is recorded before pre-warming, which may fail
+        mongod.client.admin.command.return_value = {"pid": 9012}
+        run.side_effect = OperationFailure("interrupted")
+        with self.assertRaises(OperationFailure):
+            self.charm.restart_charm_services()
+        self.assertEqual(self.charm.unit_peer_data["mongod-pid"], "9012")
+
+    @patch("charm.MongodbOperatorCharm.start_charm_services")
+    @patch("charm.MongodbOperatorCharm.stop_charm_services")
+    @patch("charm.update_mongod_service")
+    @patch("charm.get_services_fingerprint")
+    @patch("prewarm.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_restart_fails_after_prepare(
+        self, get_secret, connection, fingerprint, update_mongod_service, stop, start
+    ):
+        """Tests that a failed restart makes the member electable again."""
+        mongod = connection.return_value.__enter__.return_value
+        mongod.get_hot_collections.return_value = []
+        start.side_effect = SnapError("failed to start")
+
+        self.charm.restart_charm_services()
+
+        self.assertFalse(self.charm.prewarm.is_prewarming)
+        self.assertEqual(
+            [call.args[0] for call in mongod.set_replicaset_member_priorities.call_args_list],
+            [{"1.1.1.1": 0}, {"1.1.1.1": Config.Placement.DEFAULT_PRIORITY}],
+        )
+        self.assertEqual(self.charm.unit.status, BlockedStatus("couldn't start MongoDB"))
@@ -0,0 +1,172 @@
+# Copyright 2024 Canonical Ltd.
+# See LICENSE file for licensing details.
+import json
+import unittest
+from datetime import datetime, time, timezone
+from unittest import mock
+from unittest.mock import PropertyMock, call, patch
+
+from ops.testing import Harness
+from tenacity import RetryError
+
+from charm import MongodbOperatorCharm
+from config import Config
+from exceptions import InvalidParametersError
+from rolling_compact import is_in_maintenance_window, parse_maintenance_window
+
+from .helpers import patch_network_get
+
+PEER_RELATION_NAME = "database-peers"
+
+
+class TestRollingCompact(unittest.TestCase):
+    @patch("charm.get_charm_revision")
+    @patch("charms.mongodb.v0.set_status.get_charm_revision")
+    @patch_network_get(private_address="1.1.1.1")
+    def setUp(self, *unused):
+        self.harness = Harness(MongodbOperatorCharm)
+        self.harness.begin()
+        with self.harness.hooks_disabled():
+            self.peer_rel_id = self.harness.add_relation(PEER_RELATION_NAME, "mongodb")
+            for unit_id in range(1, 3):
+                self.harness.add_relation_unit(self.peer_rel_id, f"mongodb/{unit_id}")
+                self.harness.update_relation_data(
+                    self.peer_rel_id,
+                    f"mongodb/{unit_id}",
+                    {"private-address": f"1.1.1.{unit_id + 1}"},
+                )
+            self.harness.set_leader(True)
+            self.harness.charm.app_peer_data["db_initialised"] = "true"
+        self.charm = self.harness.charm
+        self.addCleanup(self.harness.cleanup)
+
+    def test_parse_maintenance_window(self):
+        """Tests that windows are parsed and malformed ones rejected."""
+        self.assertIsNone(parse_maintenance_window(" "))
+        self.assertEqual(parse_maintenance_window("22:30-02:00"), (time(22, 30), time(2, 0)))
+
+        for raw_window in ["22:30", "22:30-25:00", "02:00-02:00", "a-b"]:
+            with self.assertRaises(InvalidParametersError):
+                parse_maintenance_window(raw_window)
+
+    def test_is_in_maintenance_window(self):
+        """Tests that windows spanning midnight are supported."""
+        night = (time(22, 0), time(2, 0))
+        self.assertTrue(
+            is_in_maintenance_window(night, datetime(2024, 5, 1, 23, 0, tzinfo=timezone.utc))
+        )
+        self.assertTrue(
+            is_in_maintenance_window(night, datetime(2024, 5, 1, 1, 59, tzinfo=timezone.utc))
+        )
+        self.assertFalse(
+            is_in_maintenance_window(night, datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc))
+        )
+        self.assertTrue(is_in_maintenance_window(None, datetime.now(timezone.utc)))
+
+    @patch("rolling_compact.RollingCompact.wait_for_catch_up")
+    @patch("rolling_compact.RollingCompact.compact_member")
+    @patch("rolling_compact.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.upgrade_in_progress", new_callable=PropertyMock)
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_rolling_compact_primary_last(
+        self, get_secret, upgrade_in_progress, connection, compact_member, wait_for_catch_up
+    ):
+        """Tests that secondaries are compacted first and the primary once stepped down."""
+        upgrade_in_progress.return_value = False
+        mongod = connection.return_value.__enter__.return_value
+        mongod.primary.return_value = "1.1.1.2"
+        mongod.step_down_primary.return_value = 1.5
+        compact_member.side_effect = [100, 200, 300]
+
+        action_event = mock.Mock()
+        self.charm.rolling_compact._on_rolling_compact_action(action_event)
+
+        action_event.fail.assert_not_called()
+        compact_member.assert_has_calls([call("1.1.1.1"), call("1.1.1.3"), call("1.1.1.2")])
+        wait_for_catch_up.assert_has_calls([call("1.1.1.1"), call("1.1.1.3"), call("1.1.1.2")])
+        mongod.step_down_primary.assert_called_once()
+        # the stepped down primary is unelectable until compacted
+        mongod.set_replicaset_member_priorities.assert_has_calls(
+            [call({"1.1.1.2": 0}), call({"1.1.1.2": Config.Placement.DEFAULT_PRIORITY})]
+        )
+        results = action_event.set_results.call_args.args[0]
+        self.assertEqual(
+            json.loads(results["reclaimed-bytes"]),
+            {"mongodb/0": 100, "mongodb/2": 200, "mongodb/1": 300},
+        )
+        self.assertEqual(results["total-reclaimed-bytes"], 600)
+
+    @patch("rolling_compact.RollingCompact.wait_for_catch_up")
+    @patch("rolling_compact.RollingCompact.compact_member")
+    @patch("rolling_compact.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.upgrade_in_progress", new_callable=PropertyMock)
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_rolling_compact_primary_not_caught_up(
+        self, get_secret, upgrade_in_progress, connection, compact_member, wait_for_catch_up
+    ):
+        """Tests that the primary priority is restored when it does not catch up."""
+        upgrade_in_progress.return_value = False
+        mongod = connection.return_value.__enter__.return_value
+        mongod.primary.return_value = "1.1.1.2"
+        mongod.step_down_primary.return_value = 1.5
+        compact_member.return_value = 100
+        wait_for_catch_up.side_effect = [None, None, RetryError(mock.Mock())]
+
+        action_event = mock.Mock()
+        self.charm.rolling_compact._on_rolling_compact_action(action_event)
+
+        action_event.fail.assert_called_with(
+            "mongodb/1 did not catch up after compaction. Compacted 3 members."
+        )
+        mongod.set_replicaset_member_priorities.assert_called_with(
+            {"1.1.1.2": Config.Placement.DEFAULT_PRIORITY}
+        )
+
+    @patch("rolling_compact.is_in_maintenance_window")
+    @patch("rolling_compact.RollingCompact.wait_for_catch_up")
+    @patch("rolling_compact.RollingCompact.compact_member")
+    @patch("rolling_compact.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.upgrade_in_progress", new_callable=PropertyMock)
+    @patch("charm.MongodbOperatorCharm.get_secret")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_rolling_compact_window_closes(
+        self,
+        get_secret,
+        upgrade_in_progress,
+        connection,
+        compact_member,
+        wait_for_catch_up,
+        is_in_window,
+    ):
+        """Tests that no member is compacted once the maintenance window closed."""
+        upgrade_in_progress.return_value = False
+        with self.harness.hooks_disabled():
+            self.harness.update_config({"maintenance-window": "02:00-04:00"})
+        mongod = connection.return_value.__enter__.return_value
+        mongod.primary.return_value = "1.1.1.2"
+        compact_member.return_value = 100
+        is_in_window.side_effect = [True, True, False]
+
+        action_event = mock.Mock()
+        self.charm.rolling_compact._on_rolling_compact_action(action_event)
+
+        compact_member.assert_called_once_with("1.1.1.1")
+        mongod.step_down_primary.assert_not_called()
+        action_event.set_results.assert_called_with(
+            {"reclaimed-bytes": '{"mongodb/0": 100}', "total-reclaimed-bytes": 100}
+        )
+        action_event.fail.assert_called_with("The maintenance window closed. Compacted 1 members.")
+
+    @patch("rolling_compact.RollingCompact.compact_member")
+    def test_rolling_compact_not_leader(self, compact_member):
+        """Tests that only the leader compacts the members."""
+        with self.harness.hooks_disabled():
+            self.harness.set_leader(False)
+
+        action_event = mock.Mock()
+        self.charm.rolling_compact._on_rolling_compact_action(action_event)
+
+        action_event.fail.assert_called()
+        compact_member.assert_not_called()
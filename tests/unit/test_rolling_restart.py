@@ -0,0 +1,153 @@
+# Copyright 2024 Canonical Ltd.
+# See LICENSE file for licensing details.
+import unittest
+from unittest.mock import PropertyMock, patch
+
+from ops.model import ActiveStatus, WaitingStatus
+from ops.testing import Harness
+
+from charm import MongodbOperatorCharm
+
+from .helpers import patch_network_get
+
+PEER_RELATION_NAME = "database-peers"
+
+
+class TestRollingRestart(unittest.TestCase):
+    @patch("charm.get_charm_revision")
+    @patch("charms.mongodb.v0.set_status.get_charm_revision")
+    @patch_network_get(private_address="1.1.1.1")
+    def setUp(self, *unused):
+        self.harness = Harness(MongodbOperatorCharm)
+        self.harness.begin()
+        with self.harness.hooks_disabled():
+            self.peer_rel_id = self.harness.add_relation(PEER_RELATION_NAME, "mongodb")
+            for unit_id in range(1, 4):
+                self.harness.add_relation_unit(self.peer_rel_id, f"mongodb/{unit_id}")
+            self.harness.set_leader(True)
+        self.charm = self.harness.charm
+        self.addCleanup(self.harness.cleanup)
+
+    def _request_restart(self, unit_name: str) -> None:
+        with self.harness.hooks_disabled():
+            self.harness.update_relation_data(
+                self.peer_rel_id, unit_name, {"restart-request": "requested"}
+            )
+
+    @patch("charm.MongodbOperatorCharm.upgrade_in_progress", new_callable=PropertyMock)
+    @patch("charm.MongodbOperatorCharm.primary", new_callable=PropertyMock)
+    def test_grant_restart_primary_last(self, primary, upgrade_in_progress):
+        """Tests that secondaries are granted a restart before the primary, one at a time."""
+        upgrade_in_progress.return_value = False
+        primary.return_value = "mongodb/1"
+        self._request_restart("mongodb/1")
+        self._request_restart("mongodb/3")
+        self._request_restart("mongodb/2")
+
+        self.charm.rolling_restart.grant_restart()
+        self.assertEqual(self.charm.rolling_restart.granted_unit, "mongodb/2")
+
+        # the grant is held until the unit releases it
+        self.charm.rolling_restart.grant_restart()
+        self.assertEqual(self.charm.rolling_restart.granted_unit, "mongodb/2")
+
+        with self.harness.hooks_disabled():
+            self.harness.update_relation_data(
+                self.peer_rel_id, "mongodb/2", {"restart-request": ""}
+            )
+        self.charm.rolling_restart.grant_restart()
+        self.assertEqual(self.charm.rolling_restart.granted_unit, "mongodb/3")
+
+        with self.harness.hooks_disabled():
+            self.harness.update_relation_data(
+                self.peer_rel_id, "mongodb/3", {"restart-request": ""}
+            )
+        self.charm.rolling_restart.grant_restart()
+        self.assertEqual(self.charm.rolling_restart.granted_unit, "mongodb/1")
+
+        with self.harness.hooks_disabled():
+            self.harness.update_relation_data(
+                self.peer_rel_id, "mongodb/1", {"restart-request": ""}
+            )
+        self.charm.rolling_restart.grant_restart()
+        self.assertIsNone(self.charm.rolling_restart.granted_unit)
+
+    @patch("charm.MongodbOperatorCharm.upgrade_in_progress", new_callable=PropertyMock)
+    def test_grant_restart_during_upgrade(self, upgrade_in_progress):
+        """Tests that no restart is granted while the units refresh."""
+        upgrade_in_progress.return_value = True
+        self._request_restart("mongodb/1")
+
+        self.charm.rolling_restart.grant_restart()
+        self.assertIsNone(self.charm.rolling_restart.granted_unit)
+
+    @patch("charm.MongoDBStatusHandler.process_statuses")
+    @patch("rolling_restart.RollingRestart.has_caught_up")
+    @patch("rolling_restart.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.restart_charm_services")
+    @patch("charm.MongodbOperatorCharm.upgrade_in_progress", new_callable=PropertyMock)
+    @patch("charm.MongodbOperatorCharm.primary", new_callable=PropertyMock)
+    @patch_network_get(private_address="1.1.1.1")
+    def test_request_restart_primary(
+        self,
+        primary,
+        upgrade_in_progress,
+        restart_charm_services,
+        connection,
+        has_caught_up,
+        process_statuses,
+    ):
+        """Tests that the primary steps down, restarts and releases its grant."""
+        upgrade_in_progress.return_value = False
+        primary.return_value = "mongodb/0"
+        process_statuses.return_value = ActiveStatus()
+
+        self.charm.rolling_restart.request_restart()
+
+        connection.return_value.__enter__.return_value.step_down_primary.assert_called()
+        restart_charm_services.assert_called_once_with(skip_if_unchanged=True)
+        has_caught_up.assert_called()
+        self.assertIsNone(self.charm.rolling_restart.restart_state)
+        self.assertIsNone(self.charm.rolling_restart.granted_unit)
+
+    @patch("charm.MongoDBStatusHandler.process_statuses")
+    @patch("rolling_restart.RollingRestart.has_caught_up")
+    @patch("rolling_restart.MongoDBConnection")
+    @patch("charm.MongodbOperatorCharm.restart_charm_services")
+    @patch("charm.MongodbOperatorCharm.upgrade_in_progress", new_callable=PropertyMock)
+    @patch("charm.MongodbOperatorCharm.primary", new_callable=PropertyMock)
+    @patch_network_get(private_address="1.1.1.1")
+    def test_request_restart_not_caught_up(
+        self,
+        primary,
+        upgrade_in_progress,
+        restart_charm_services,
+        connection,
+        has_caught_up,
+        process_statuses,
+    ):
+        """Tests that a member holds its grant until it caught up with the primary."""
+        upgrade_in_progress.return_value = False
+        primary.return_value = "mongodb/1"
+        has_caught_up.return_value = False
+        process_statuses.return_value = ActiveStatus()
+
+        self.charm.rolling_restart.request_restart()
+
+        connection.return_value.__enter__.return_value.step_down_primary.assert_not_called()
+        restart_charm_services.assert_called_once()
+        self.assertEqual(self.charm.rolling_restart.restart_state, "restarted")
+        self.assertEqual(self.charm.rolling_restart.granted_unit, "mongodb/0")
+
+        self.assertEqual(
+            self.charm.unit.status, WaitingStatus("Waiting to catch up after restart")
+        )
+
+        # the member is not restarted a second time once it caught up
+        has_caught_up.return_value = True
+        self.charm.rolling_restart._on_restart_state_changed()
+        restart_charm_services.assert_called_once()
+        self.assertIsNone(self.charm.rolling_restart.restart_state)
+        # the status reflects the unit once restarted, rather than being forced to active
+        process_statuses.assert_called_once()
+        self.assertEqual(self.charm.unit.status, ActiveStatus())
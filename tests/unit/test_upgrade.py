@@ -1,13 +1,20 @@
 # Copyright 2024 Canonical Ltd.
 # See LICENSE file for licensing details.
+import threading
+import time
 import unittest
 from unittest import mock
 from unittest.mock import patch
 
-from ops.model import ActiveStatus, BlockedStatus
+from charms.mongodb.v0.upgrade_helpers import PrecheckFailed, UnitState
+from charms.mongodb.v1.mongodb import MongoDBConnection
+from ops.model import ActiveStatus, BlockedStatus, MaintenanceStatus
 from ops.testing import Harness
+from parameterized import parameterized
+from pymongo.errors import ServerSelectionTimeoutError
 
 from charm import MongodbOperatorCharm
+from config import Config
 
 from .helpers import patch_network_get
 
@@ -84,13 +91,377 @@ class TestCharm(unittest.TestCase):
 
     @patch_network_get(private_address="1.1.1.1")
     @patch("charms.mongodb.v0.upgrade_helpers.MongoDBConnection")
-    @patch("charm.MongoDBUpgrade.is_write_on_secondaries")
-    def test_is_replica_set_able_read_write(self, is_write_on_secondaries, connection):
+    @patch("charm.MongoDBUpgrade.is_write_on_member")
+    def test_is_replica_set_able_read_write(self, is_write_on_member, connection):
         """Test test_is_replica_set_able_read_write function."""
         # case 1: writes are not present on secondaries
-        is_write_on_secondaries.return_value = False
+        is_write_on_member.return_value = False
         assert not self.harness.charm.upgrade.is_replica_set_able_read_write()
 
         # case 2: writes are present on secondaries
-        is_write_on_secondaries.return_value = True
+        is_write_on_member.return_value = True
         assert self.harness.charm.upgrade.is_replica_set_able_read_write()
+
+    @patch("charms.mongodb.v0.upgrade_helpers.MongoDBConnection")
+    @patch("charm.MongoDBUpgrade.is_write_on_member")
+    def test_probe_replica_set_read_write(self, is_write_on_member, connection):
+        """Tests that a majority write is confirmed on every member without dropping anything."""
+        mongod = connection.return_value.__enter__.return_value
+        session = mongod.client.start_session.return_value.__enter__.return_value
+        mongodb_config = mock.Mock(replset="shard-one", hosts={"1.1.1.1", "1.1.1.2"})
+        is_write_on_member.side_effect = lambda config, host, *_: host == "1.1.1.1"
+
+        assert not self.harness.charm.upgrade.probe_replica_set_read_write(mongodb_config)
+
+        mongod.client.start_session.assert_called_with(causal_consistency=True)
+        health_collection = mongod.client["admin"].get_collection.return_value
+        health_collection.update_one.assert_called_once()
+        assert health_collection.update_one.call_args.kwargs["upsert"]
+        mongod.client.drop_database.assert_not_called()
+        probed_hosts = {call.args[1] for call in is_write_on_member.call_args_list}
+        assert probed_hosts == {"1.1.1.1", "1.1.1.2"}
+        for probe in is_write_on_member.call_args_list:
+            assert probe.args[3:] == (session.cluster_time, session.operation_time)
+
+    @patch("charm.MongoDBUpgrade.probe_replica_set_read_write")
+    @patch("charm.MongoDBUpgrade.get_all_replica_set_configs_in_cluster")
+    def test_is_sharded_cluster_able_to_read_write(self, get_configs, probe):
+        """Tests that every replica set in the cluster is probed."""
+        get_configs.return_value = [
+            mock.Mock(replset="config-server"),
+            mock.Mock(replset="shard-one"),
+            mock.Mock(replset="shard-two"),
+        ]
+        probe.return_value = True
+        assert self.harness.charm.upgrade.is_sharded_cluster_able_to_read_write()
+        assert probe.call_count == 3
+
+        probe.side_effect = lambda config, timeout: config.replset != "shard-two"
+        assert not self.harness.charm.upgrade.is_sharded_cluster_able_to_read_write()
+
+    @patch("charm.MongoDBUpgrade.get_all_replica_set_configs_in_cluster")
+    @patch("charms.mongodb.v0.upgrade_helpers.MongoDBConnection")
+    def test_are_replicas_in_sharded_cluster_healthy(self, connection, get_configs):
+        """Tests that every replica set in the cluster is probed and syncing members detected."""
+        shard_one, shard_two = mock.Mock(replset="shard-one"), mock.Mock(replset="shard-two")
+        get_configs.return_value = [shard_one, shard_two]
+        replset_states = {
+            shard_one: {"1.1.1.1": "PRIMARY", "1.1.1.2": "SECONDARY"},
+            shard_two: {"2.2.2.1": "PRIMARY", "2.2.2.2": "SECONDARY"},
+        }
+
+        def connect(mongodb_config):
+            mongod = mock.MagicMock()
+            mongod.__enter__.return_value.get_replset_status.return_value = replset_states[
+                mongodb_config
+            ]
+            return mongod
+
+        connection.side_effect = connect
+        self.assertEqual(
+            self.harness.charm.upgrade.get_cluster_health_map(),
+            {
+                "shard-one": {"1.1.1.1": "PRIMARY", "1.1.1.2": "SECONDARY"},
+                "shard-two": {"2.2.2.1": "PRIMARY", "2.2.2.2": "SECONDARY"},
+            },
+        )
+        self.assertTrue(self.harness.charm.upgrade.are_replicas_in_sharded_cluster_healthy(None))
+
+        replset_states[shard_two]["2.2.2.2"] = "STARTUP2"
+        self.assertFalse(self.harness.charm.upgrade.are_replicas_in_sharded_cluster_healthy(None))
+
+        connection.side_effect = None
+        connection.return_value.__enter__.side_effect = ServerSelectionTimeoutError("timeout")
+        self.assertFalse(self.harness.charm.upgrade.are_replicas_in_sharded_cluster_healthy(None))
+
+    @patch.object(Config.Probe, "DEADLINE", 0.5)
+    @patch("charm.MongoDBUpgrade.get_replica_set_health")
+    @patch("charm.MongoDBUpgrade.get_all_replica_set_configs_in_cluster")
+    def test_cluster_health_map_deadline(self, get_configs, get_replica_set_health):
+        """Tests that a hung replica set does not stall the health check past the deadline."""
+        release = threading.Event()
+        self.addCleanup(release.set)
+        get_configs.return_value = [mock.Mock(replset="shard-one"), mock.Mock(replset="shard-two")]
+
+        def get_health(mongodb_config):
+            if mongodb_config.replset == "shard-two":
+                release.wait(10)
+            return {"1.1.1.1": "PRIMARY"}
+
+        get_replica_set_health.side_effect = get_health
+        start = time.monotonic()
+        health_map = self.harness.charm.upgrade.get_cluster_health_map()
+
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(health_map["shard-one"], {"1.1.1.1": "PRIMARY"})
+        self.assertIsInstance(health_map["shard-two"], TimeoutError)
+
+    def _setup_refresh(self, units: int, unit_number: int, resumed: bool = True) -> None:
+        """Sets up a refresh of an application with the provided number of units."""
+        upgrade_rel_id = self.harness.model.get_relation("upgrade-version-a").id
+        with self.harness.hooks_disabled():
+            self.harness.set_leader(True)
+            self.harness.update_relation_data(
+                upgrade_rel_id,
+                "mongodb",
+                {
+                    "versions": '{"charm": "0", "workload": "6.0.6"}',
+                    "upgrade-resumed": "true" if resumed else "false",
+                },
+            )
+            self.harness.set_leader(False)
+            for number in range(1, units):
+                self.harness.add_relation_unit(upgrade_rel_id, f"mongodb/{number}")
+                self.harness.update_relation_data(
+                    upgrade_rel_id, f"mongodb/{number}", {"snap_revision": "outdated"}
+                )
+
+            self.harness.update_relation_data(
+                upgrade_rel_id, "mongodb/0", {"snap_revision": "outdated"}
+            )
+
+        self.harness.charm.unit.name = f"mongodb/{unit_number}"
+
+    def _set_units_refreshed(self, *unit_numbers: int) -> None:
+        """Marks the provided units as refreshed and healthy."""
+        upgrade_rel_id = self.harness.model.get_relation("upgrade-version-a").id
+        with self.harness.hooks_disabled():
+            for number in unit_numbers:
+                self.harness.update_relation_data(
+                    upgrade_rel_id,
+                    f"mongodb/{number}",
+                    {"snap_revision": str(Config.SNAP_PACKAGES[0][2]), "state": "healthy"},
+                )
+
+    @parameterized.expand(
+        [
+            # units, batch size, min secondaries, expected batch size
+            [3, 3, 1, 1],
+            [5, 3, 1, 2],
+            [7, 3, 1, 3],
+            [9, 2, 1, 2],
+            [9, 4, 5, 3],
+            [2, 3, 1, 1],
+        ]
+    )
+    def test_refresh_batch_size(self, units, batch_size, min_secondaries, expected):
+        """Tests that the batch size keeps a voting majority and enough secondaries up."""
+        self._setup_refresh(units, unit_number=0)
+        with self.harness.hooks_disabled():
+            self.harness.update_config(
+                {"refresh-batch-size": batch_size, "refresh-min-secondaries": min_secondaries}
+            )
+        self.assertEqual(self.harness.charm.upgrade._upgrade.refresh_batch_size, expected)
+
+    def test_authorized_batches(self):
+        """Tests that secondaries refresh in batches and the lowest unit refreshes last."""
+        # 7 units, refresh order: 6 | 5, 4, 3 | 2, 1 | 0
+        self.harness.update_config({"refresh-batch-size": 3})
+        self._setup_refresh(7, unit_number=5)
+        self._set_units_refreshed(6)
+        upgrade = self.harness.charm.upgrade._upgrade
+        for unit_number, authorized in [(5, True), (4, True), (3, True), (2, False), (0, False)]:
+            self.harness.charm.unit.name = f"mongodb/{unit_number}"
+            self.assertEqual(upgrade.authorized, authorized, f"mongodb/{unit_number}")
+
+        self._set_units_refreshed(5, 4, 3)
+        for unit_number, authorized in [(2, True), (1, True), (0, False)]:
+            self.harness.charm.unit.name = f"mongodb/{unit_number}"
+            self.assertEqual(upgrade.authorized, authorized, f"mongodb/{unit_number}")
+
+        self._set_units_refreshed(2, 1)
+        self.harness.charm.unit.name = "mongodb/0"
+        self.assertTrue(upgrade.authorized)
+
+    def test_refresh_batch_size_no_room(self):
+        """Tests that the refresh is refused if no secondary can refresh."""
+        self._setup_refresh(3, unit_number=1)
+        with self.harness.hooks_disabled():
+            self.harness.update_config({"refresh-min-secondaries": 2})
+
+        with self.assertRaises(PrecheckFailed):
+            self.harness.charm.upgrade._upgrade.validate_refresh_batch_size()
+        with self.assertRaises(PrecheckFailed):
+            self.harness.charm.upgrade._upgrade.refresh_batch_size
+        with self.assertRaises(PrecheckFailed):
+            self.harness.charm.upgrade._upgrade.authorized
+
+    @patch("charm.MongoDBUpgrade.is_cluster_able_to_read_write")
+    @patch("charm.MongoDBStatusHandler.is_status_related_to_mismatched_revision")
+    @patch("charms.mongodb.v0.upgrade_helpers.MongoDBConnection")
+    @patch_network_get(private_address="1.1.1.1")
+    def test_post_upgrade_check_batch(
+        self, connection, is_status_related_to_mismatched_revision, is_able_to_read_write
+    ):
+        """Tests that the units of a batch do not wait on each other after refreshing."""
+        # 5 units, refresh order: 4 | 3, 2 | 1 | 0
+        self.harness.update_config({"refresh-batch-size": 2})
+        self._setup_refresh(5, unit_number=2)
+        self._set_units_refreshed(4)
+        upgrade_rel_id = self.harness.model.get_relation("upgrade-version-a").id
+        peer_rel_id = self.harness.model.get_relation("database-peers").id
+        with self.harness.hooks_disabled():
+            # this unit just refreshed its snap
+            self.harness.update_relation_data(
+                upgrade_rel_id, "mongodb/0", {"snap_revision": str(Config.SNAP_PACKAGES[0][2])}
+            )
+            for number in [1, 3, 4]:
+                self.harness.add_relation_unit(peer_rel_id, f"mongodb/{number}")
+                self.harness.update_relation_data(
+                    peer_rel_id, f"mongodb/{number}", {"private-address": f"1.1.1.{number + 1}"}
+                )
+        self.harness.charm.unit.status = ActiveStatus()
+        is_status_related_to_mismatched_revision.return_value = False
+        is_able_to_read_write.return_value = True
+        self.harness.charm.model._backend._run = mock.Mock(
+            return_value={
+                "units": {
+                    "mongodb/0": {"status": "active"},
+                    "mongodb/1": {"status": "active"},
+                    "mongodb/3": {"status": "maintenance"},
+                    "mongodb/4": {"status": "active"},
+                }
+            }
+        )
+        # mongodb/3 of the same batch is still syncing after its restart
+        mongod = connection.return_value.__enter__.return_value
+        mongod.client.admin.command.return_value = {
+            "members": [
+                {"name": "1.1.1.1:27017", "stateStr": "SECONDARY"},
+                {"name": "1.1.1.2:27017", "stateStr": "PRIMARY"},
+                {"name": "1.1.1.4:27017", "stateStr": "STARTUP2"},
+                {"name": "1.1.1.5:27017", "stateStr": "SECONDARY"},
+            ]
+        }
+        mongod.is_any_sync.side_effect = MongoDBConnection.is_any_sync
+
+        upgrade = self.harness.charm.upgrade._upgrade
+        self.assertEqual(upgrade.refreshing_unit_names, {"mongodb/3", "mongodb/2"})
+        self.harness.charm.upgrade.run_post_app_upgrade_task(mock.Mock())
+
+        self.assertEqual(upgrade.unit_state, UnitState.HEALTHY)
+
+        # the next batch starts once both units of the batch are healthy
+        self.harness.charm.unit.name = "mongodb/1"
+        self._set_units_refreshed(3, 2)
+        with self.harness.hooks_disabled():
+            # the databag of this unit now belongs to the outdated mongodb/1
+            self.harness.update_relation_data(
+                upgrade_rel_id, "mongodb/0", {"snap_revision": "outdated", "state": ""}
+            )
+        self.assertTrue(self.harness.charm.upgrade._upgrade.authorized)
+
+    def test_authorized_requires_resume(self):
+        """Tests that only the highest unit refreshes before the refresh is resumed."""
+        self.harness.update_config({"refresh-batch-size": 3})
+        self._setup_refresh(7, unit_number=5, resumed=False)
+        self._set_units_refreshed(6)
+        self.assertFalse(self.harness.charm.upgrade._upgrade.authorized)
+
+    def _add_shard(self, shard_name: str, *states: str) -> int:
+        """Adds a related shard whose units report the provided refresh states."""
+        with self.harness.hooks_disabled():
+            relation_id = self.harness.add_relation("config-server", shard_name)
+            for number, state in enumerate(states):
+                self.harness.add_relation_unit(relation_id, f"{shard_name}/{number}")
+                self.harness.update_relation_data(
+                    relation_id, f"{shard_name}/{number}", {"refresh-state": state}
+                )
+
+        return relation_id
+
+    def _is_shard_authorized(self, relation_id: int) -> bool:
+        return (
+            self.harness.get_relation_data(relation_id, "mongodb").get("refresh-authorized")
+            == "true"
+        )
+
+    def test_reconcile_shard_refresh_waves(self):
+        """Tests that the config-server authorizes shards to refresh in waves."""
+        with self.harness.hooks_disabled():
+            self.harness.set_leader(True)
+            self.harness.update_config({"role": "config-server", "shard-refresh-concurrency": 2})
+
+        shard_one = self._add_shard("shard-one", "outdated", "outdated")
+        shard_two = self._add_shard("shard-two", "healthy", "outdated")
+        shard_three = self._add_shard("shard-three", "outdated", "outdated")
+        shard_four = self._add_shard("shard-four", "healthy", "healthy")
+
+        self.harness.charm.upgrade.reconcile_shard_refresh_waves()
+        self.assertTrue(self._is_shard_authorized(shard_one))
+        self.assertTrue(self._is_shard_authorized(shard_three))
+        self.assertFalse(self._is_shard_authorized(shard_two))
+        self.assertFalse(self._is_shard_authorized(shard_four))
+        self.assertEqual(
+            self.harness.charm.upgrade.get_shard_refresh_status(),
+            MaintenanceStatus("Refreshing shards: 3/4 in progress."),
+        )
+
+        # a finished shard releases its authorization to the next shard
+        with self.harness.hooks_disabled():
+            for unit in ["shard-one/0", "shard-one/1"]:
+                self.harness.update_relation_data(shard_one, unit, {"refresh-state": "healthy"})
+
+        self.harness.charm.upgrade.reconcile_shard_refresh_waves()
+        self.assertFalse(self._is_shard_authorized(shard_one))
+        self.assertTrue(self._is_shard_authorized(shard_two))
+
+    def test_reconcile_shard_refresh_waves_concurrency(self):
+        """Tests that only one shard refreshes at a time and the others are told to wait."""
+        with self.harness.hooks_disabled():
+            self.harness.set_leader(True)
+            self.harness.update_config({"role": "config-server", "shard-refresh-concurrency": 1})
+
+        shards = [
+            self._add_shard(shard_name, "outdated", "outdated")
+            for shard_name in ["shard-one", "shard-two", "shard-three"]
+        ]
+
+        self.harness.charm.upgrade.reconcile_shard_refresh_waves()
+        self.assertEqual(
+            [self._is_shard_authorized(shard) for shard in shards], [True, False, False]
+        )
+        for shard in shards[1:]:
+            self.assertEqual(
+                self.harness.get_relation_data(shard, "mongodb"),
+                {"refresh-authorized": "false", "refresh-concurrency": "1"},
+            )
+
+    def test_reconcile_shard_refresh_waves_halts_on_failure(self):
+        """Tests that no further shard is authorized when a shard fails post-refresh checks."""
+        with self.harness.hooks_disabled():
+            self.harness.set_leader(True)
+            self.harness.update_config({"role": "config-server", "shard-refresh-concurrency": 2})
+
+        self._add_shard("shard-one", "failed", "healthy")
+        shard_two = self._add_shard("shard-two", "outdated", "outdated")
+
+        self.harness.charm.upgrade.reconcile_shard_refresh_waves()
+        self.assertFalse(self._is_shard_authorized(shard_two))
+        self.assertEqual(
+            self.harness.charm.upgrade.get_shard_refresh_status(),
+            BlockedStatus("Shard refresh halted, shard-one failed post-refresh checks."),
+        )
+
+    def test_is_shard_refresh_authorized(self):
+        """Tests that shards wait for authorization only if the config-server gates refreshes."""
+        with self.harness.hooks_disabled():
+            self.harness.update_config({"role": "shard"})
+            relation_id = self.harness.add_relation("sharding", "config-server")
+
+        self.assertTrue(self.harness.charm.upgrade.is_shard_refresh_authorized())
+
+        with self.harness.hooks_disabled():
+            self.harness.update_relation_data(
+                relation_id, "config-server", {"refresh-authorized": "false"}
+            )
+        self.assertFalse(self.harness.charm.upgrade.is_shard_refresh_authorized())
+
+        # a config-server orchestrating the refresh has not authorized this shard yet
+        with self.harness.hooks_disabled():
+            self.harness.update_relation_data(
+                relation_id,
+                "config-server",
+                {"refresh-authorized": "", "refresh-concurrency": "1"},
+            )
+        self.assertFalse(self.harness.charm.upgrade.is_shard_refresh_authorized())